@@ -0,0 +1,282 @@
+"""
+Zellliste (uniformes Gitter) zur Nachbarsuche in einer Kugelpackung.
+
+Der Raum wird in würfelförmige Zellen der Kantenlänge cellSize zerlegt. Jede Zelle speichert die Indizes der
+eingetragenen Elemente (z. B. Kugeln) als verkettete Liste: self.head enthält für jede Zelle den zuletzt eingetragenen
+Index, self.next für jeden Index den nächsten Index derselben Zelle (-1: Ende der Liste). Über self.prev und
+self.cellOf (Zelle jedes Elements) ist die Liste doppelt verkettet. Ein Element wird in O(1) eingetragen oder entfernt.
+Alle Elemente mit einem Abstand kleiner cellSize zu einem Punkt liegen in den 27 Zellen um die Zelle
+des Punktes.
+Die Felder der verketteten Listen sind int32 (4 Byte je Eintrag).
+
+In periodischen Richtungen (siehe periodic.py) wird die Periode ohne Rand in mindestens 3 gleich breite Zellen der
+Breite >= cellSize zerlegt. Die Suche in den 27 Zellen setzt sich über den Rand hinweg auf der gegenüberliegenden Seite
+fort, Abstände werden zum nächstgelegenen Bild gemessen.
+"""
+
+import numpy as np
+from numba import jit # Just-In-Time-Compiler
+
+from periodic import minimumImage
+
+class CellList:
+    def __init__(self, x, y, z, cellSize, capacity, margin=0., period=None):
+        """
+        Konstruktor einer Zellliste für den Raum [-margin, x+margin] x [-margin, y+margin] x [-margin, z+margin].
+
+        Punkte außerhalb des Raumes werden der nächstgelegenen Randzelle zugeordnet. In periodischen Richtungen hat der
+        Raum keinen Rand, die Punkte müssen in [0, period[d]) liegen.
+
+        :param x: float - Raumgröße in x-Richtung
+        :param y: float - Raumgröße in y-Richtung
+        :param z: float - Raumgröße in z-Richtung
+        :param cellSize: float - Kantenlänge einer Zelle (min. Suchradius)
+        :param capacity: int - max. Anzahl Elemente (größter Index + 1)
+        :param margin: float - zusätzlicher Rand um den Raum
+        :param period: np.array(2, dtype=float) - Periode in x- und y-Richtung (None oder 0: nicht periodisch)
+        """
+        self.period = np.zeros(2) if period is None else np.asarray(period, dtype=float)
+        self.origin = np.full(3, -float(margin))
+        extent = np.array([x, y, z], dtype=float) + 2 * margin
+        self.dims = np.maximum(np.ceil(extent / cellSize), 1).astype(np.int64) # Anzahl Zellen je Richtung
+        self.cellSize = np.full(3, float(cellSize)) # Breite der Zellen je Richtung
+        for d in range(2):
+            if self.period[d] > 0:
+                self.dims[d] = int(self.period[d] // cellSize)
+                if self.dims[d] < 3:
+                    raise ValueError(f"Periode {self.period[d]} kleiner als 3 * {cellSize}")
+                self.origin[d] = 0.
+                self.cellSize[d] = self.period[d] / self.dims[d]
+        self.head = np.full(int(np.prod(self.dims)), -1, dtype=np.int32)
+        self.next = np.full(capacity, -1, dtype=np.int32)
+        self.prev = np.full(capacity, -1, dtype=np.int32)
+        self.cellOf = np.full(capacity, -1, dtype=np.int32) # Zelle jedes Elements (-1: nicht eingetragen)
+        self._buffer = np.empty(64, dtype=np.int64) # Puffer für Suchergebnisse
+
+    def insert(self, i, point):
+        """
+        Eintragen des Elements mit Index i an der Position point.
+
+        :param i: int - Index des Elements
+        :param point: np.array([x, y, z, ...], dtype=float) - Position des Elements
+        :return: kein Rückgabewert
+        """
+        insertCell(self.head, self.next, self.prev, self.cellOf, i,
+                   cellIndex(point, self.origin, self.cellSize, self.dims))
+
+    def remove(self, i):
+        """
+        Entfernen des Elements mit Index i.
+
+        :param i: int - Index des Elements
+        :return: kein Rückgabewert
+        """
+        removeCell(self.head, self.next, self.prev, self.cellOf, i)
+
+    def grow(self, capacity):
+        """
+        Vergrößern der max. Anzahl Elemente auf capacity.
+
+        :param capacity: int - neue max. Anzahl Elemente
+        :return: kein Rückgabewert
+        """
+        n = capacity - len(self.next)
+        if n <= 0:
+            return
+        self.next = np.concatenate([self.next, np.full(n, -1, dtype=np.int32)])
+        self.prev = np.concatenate([self.prev, np.full(n, -1, dtype=np.int32)])
+        self.cellOf = np.concatenate([self.cellOf, np.full(n, -1, dtype=np.int32)])
+
+    def query(self, point):
+        """
+        Alle Elemente aus den 27 Zellen um die Zelle von point.
+
+        :param point: np.array([x, y, z, ...], dtype=float) - Position, um die gesucht wird
+        :return: np.array(dtype=int) - Indizes der Elemente (ungeordnet)
+        """
+        c = cellIndex(point, self.origin, self.cellSize, self.dims)
+        n = queryCells(self.head, self.next, c, self.dims, self.period, self._buffer)
+        if n > len(self._buffer): # Puffer zu klein --> vergrößern und erneut suchen
+            self._buffer = np.empty(2 * n, dtype=np.int64)
+            n = queryCells(self.head, self.next, c, self.dims, self.period, self._buffer)
+        return self._buffer[:n].copy()
+
+@jit(nopython=True)
+def cellIndex(point, origin, cellSize, dims):
+    """
+    Berechnung des (linearen) Index der Zelle, in der point liegt.
+
+    :param point: np.array([x, y, z, ...], dtype=float) - Position
+    :param origin: np.array([x, y, z], dtype=float) - untere Ecke des Gitters
+    :param cellSize: np.array(3, dtype=float) - Breite der Zellen je Richtung
+    :param dims: np.array(3, dtype=int) - Anzahl Zellen je Richtung
+    :return: int - Zellindex
+    """
+    c = 0
+    for d in range(3):
+        k = int(np.floor((point[d] - origin[d]) / cellSize[d]))
+        if k < 0:
+            k = 0
+        elif k >= dims[d]:
+            k = dims[d] - 1
+        c = c * dims[d] + k
+    return c
+
+@jit(nopython=True)
+def insertCell(head, next, prev, cellOf, i, c):
+    """
+    Eintragen des Elements i am Anfang der verketteten Liste der Zelle c.
+
+    :param head: np.array(dtype=int) - erstes Element je Zelle
+    :param next: np.array(dtype=int) - nächstes Element derselben Zelle je Element
+    :param prev: np.array(dtype=int) - vorheriges Element derselben Zelle je Element
+    :param cellOf: np.array(dtype=int) - Zelle je Element
+    :param i: int - Index des Elements
+    :param c: int - Zellindex
+    :return: kein Rückgabewert
+    """
+    next[i] = head[c]
+    prev[i] = -1
+    if head[c] >= 0:
+        prev[head[c]] = i
+    head[c] = i
+    cellOf[i] = c
+
+@jit(nopython=True)
+def removeCell(head, next, prev, cellOf, i):
+    """
+    Entfernen des Elements i aus der verketteten Liste seiner Zelle.
+
+    :param head: np.array(dtype=int) - erstes Element je Zelle
+    :param next: np.array(dtype=int) - nächstes Element derselben Zelle je Element
+    :param prev: np.array(dtype=int) - vorheriges Element derselben Zelle je Element
+    :param cellOf: np.array(dtype=int) - Zelle je Element
+    :param i: int - Index des Elements
+    :return: kein Rückgabewert
+    """
+    if prev[i] >= 0:
+        next[prev[i]] = next[i]
+    else:
+        head[cellOf[i]] = next[i]
+    if next[i] >= 0:
+        prev[next[i]] = prev[i]
+    next[i] = -1
+    prev[i] = -1
+    cellOf[i] = -1
+
+@jit(nopython=True)
+def cellRange(c, n, period):
+    """
+    Zellkoordinaten der Nachbarzellen der Zellkoordinate c in einer Richtung.
+
+    In einer periodischen Richtung werden Koordinaten außerhalb von [0, n) über den Rand fortgesetzt (Index modulo n),
+    sonst auf [0, n) beschränkt.
+
+    :param c: int - Zellkoordinate
+    :param n: int - Anzahl Zellen in der Richtung
+    :param period: float - Periode der Richtung (0: nicht periodisch)
+    :return: int, int - erste und letzte + 1 Zellkoordinate (vor der Bildung des Index modulo n)
+    """
+    if period > 0:
+        return c - 1, c + 2
+    return max(c - 1, 0), min(c + 2, n)
+
+@jit(nopython=True)
+def queryCells(head, next, c, dims, period, out):
+    """
+    Sammelt alle Elemente der 27 Zellen um die Zelle c in out.
+
+    :param head: np.array(dtype=int) - erstes Element je Zelle
+    :param next: np.array(dtype=int) - nächstes Element derselben Zelle je Element
+    :param c: int - Zellindex
+    :param dims: np.array(3, dtype=int) - Anzahl Zellen je Richtung
+    :param period: np.array(2, dtype=float) - Periode in x- und y-Richtung (siehe periodic.py)
+    :param out: np.array(dtype=int) - Puffer für die gefundenen Indizes
+    :return: int - Anzahl gefundener Elemente (ist sie größer als len(out), wurde out nicht vollständig gefüllt)
+    """
+    cz = c % dims[2]
+    cy = (c // dims[2]) % dims[1]
+    cx = c // (dims[2] * dims[1])
+    x0, x1 = cellRange(cx, dims[0], period[0])
+    y0, y1 = cellRange(cy, dims[1], period[1])
+    n = 0
+    for ix in range(x0, x1):
+        for iy in range(y0, y1):
+            for iz in range(max(cz - 1, 0), min(cz + 2, dims[2])):
+                j = head[((ix % dims[0]) * dims[1] + iy % dims[1]) * dims[2] + iz]
+                while j >= 0:
+                    if n < len(out):
+                        out[n] = j
+                    n += 1
+                    j = next[j]
+    return n
+
+@jit(nopython=True)
+def overlapsAny(sphere, spheres, head, next, c, dims, period, tol):
+    """
+    Prüft, ob sich sphere mit einem Element der 27 Zellen um die Zelle c überschneidet.
+
+    :param sphere: np.array([x, y, z, r], dtype=float) - zu prüfende Kugel
+    :param spheres: np.array((n, 4), dtype=float) - Kugelliste
+    :param head: np.array(dtype=int) - erstes Element je Zelle
+    :param next: np.array(dtype=int) - nächstes Element derselben Zelle je Element
+    :param c: int - Zellindex von sphere
+    :param dims: np.array(3, dtype=int) - Anzahl Zellen je Richtung
+    :param period: np.array(2, dtype=float) - Periode in x- und y-Richtung (siehe periodic.py)
+    :param tol: float - erlaubte Überschneidung (Abstand der Kugeloberflächen < -tol gilt als Überschneidung)
+    :return: bool - True, wenn eine Überschneidung vorliegt
+    """
+    cz = c % dims[2]
+    cy = (c // dims[2]) % dims[1]
+    cx = c // (dims[2] * dims[1])
+    x0, x1 = cellRange(cx, dims[0], period[0])
+    y0, y1 = cellRange(cy, dims[1], period[1])
+    for ix in range(x0, x1):
+        for iy in range(y0, y1):
+            for iz in range(max(cz - 1, 0), min(cz + 2, dims[2])):
+                j = head[((ix % dims[0]) * dims[1] + iy % dims[1]) * dims[2] + iz]
+                while j >= 0:
+                    d = np.sqrt(minimumImage(sphere[0] - spheres[j, 0], period[0]) ** 2
+                                + minimumImage(sphere[1] - spheres[j, 1], period[1]) ** 2
+                                + (sphere[2] - spheres[j, 2]) ** 2) - (sphere[3] + spheres[j, 3])
+                    if d < -tol:
+                        return True
+                    j = next[j]
+    return False
+
+@jit(nopython=True)
+def collectOverlaps(sphere, items, head, next, c, dims, period, tol, out):
+    """
+    Sammelt alle Elemente der 27 Zellen um die Zelle c, die sich mit sphere überschneiden.
+
+    :param sphere: np.array([x, y, z, r], dtype=float) - Kugel
+    :param items: np.array((n, >=4), dtype=float) - Elemente mit Position und Radius in den ersten 4 Spalten
+    :param head: np.array(dtype=int) - erstes Element je Zelle
+    :param next: np.array(dtype=int) - nächstes Element derselben Zelle je Element
+    :param c: int - Zellindex von sphere
+    :param dims: np.array(3, dtype=int) - Anzahl Zellen je Richtung
+    :param period: np.array(2, dtype=float) - Periode in x- und y-Richtung (siehe periodic.py)
+    :param tol: float - erlaubte Überschneidung (Abstand der Kugeloberflächen < -tol gilt als Überschneidung)
+    :param out: np.array(dtype=int) - Puffer für die gefundenen Indizes
+    :return: int - Anzahl gefundener Elemente (ist sie größer als len(out), wurde out nicht vollständig gefüllt)
+    """
+    cz = c % dims[2]
+    cy = (c // dims[2]) % dims[1]
+    cx = c // (dims[2] * dims[1])
+    x0, x1 = cellRange(cx, dims[0], period[0])
+    y0, y1 = cellRange(cy, dims[1], period[1])
+    n = 0
+    for ix in range(x0, x1):
+        for iy in range(y0, y1):
+            for iz in range(max(cz - 1, 0), min(cz + 2, dims[2])):
+                j = head[((ix % dims[0]) * dims[1] + iy % dims[1]) * dims[2] + iz]
+                while j >= 0:
+                    d = np.sqrt(minimumImage(sphere[0] - items[j, 0], period[0]) ** 2
+                                + minimumImage(sphere[1] - items[j, 1], period[1]) ** 2
+                                + (sphere[2] - items[j, 2]) ** 2) - (sphere[3] + items[j, 3])
+                    if d < -tol:
+                        if n < len(out):
+                            out[n] = j
+                        n += 1
+                    j = next[j]
+    return n
@@ -0,0 +1,223 @@
+"""
+Zerlegte Kugelpackung aus Kugeln unterschiedlicher Größe für große Räume.
+
+Der Raum wird seitlich in tiles[0] x tiles[1] Kacheln zerlegt, die in eigenen Prozessen gepackt werden. Jeder Prozess
+packt mit einer eigenen VariableSizedPacking, deren Pocketmittelpunkte auf seinen Bereich beschränkt sind (siehe
+VariableSizedPacking.bounds). Er erhält alle bereits vorhandenen Kugeln, deren Mittelpunkt höchstens 2 * maxRadius vom
+Bereich entfernt ist: das sind alle Kugeln, die eine neue Kugel im Bereich berühren oder überschneiden können.
+
+Die Kugeln benachbarter Kacheln kennen einander nicht und können sich an den Nähten zu stark überschneiden. Daher werden
+danach für jede Richtung (erst x, dann y) alle in den Kacheln platzierten Kugeln entfernt, deren Mittelpunkt höchstens
+self.halo von einer Naht entfernt ist, und diese Nahtstreifen mit allen übrigen Kugeln als festen Nachbarn neu gepackt.
+Zwei Kugeln auf verschiedenen Seiten einer Naht, die beide weiter als self.halo >= maxRadius von ihr entfernt sind,
+berühren sich nicht. Jede neue Kugel eines Nahtstreifens wird mit pocketValid gegen alle Kugeln in ihrer Umgebung
+geprüft.
+
+Jede platzierte Kugel liegt auf den drei Erzeugendenkugeln ihrer Pocket (VariableSizedPacking.sphereGenerators). Mit den
+Kugeln eines Nahtstreifens werden daher auch alle Kugeln entfernt, die auf einer entfernten Kugel lagen, und darauf
+liegende Kugeln ebenso (siehe removeUnsupported). Der neu gepackte Streifen wird bis über diese Kugeln hinaus
+verbreitert. Streifen einer Richtung, die sich dabei bis auf 2 * maxRadius nähern, werden zu einem Bereich
+zusammengefasst, die übrigen werden parallel gepackt.
+
+Damit erfüllt jede Kugel der zusammengesetzten Kugelpackung die Regeln von pocketValid gegenüber allen Kugeln, die bei
+ihrer Platzierung vorhanden waren, und liegt auf ihren drei Erzeugendenkugeln; entfernt werden nur Kugeln. Bei der
+Methode 'single' gilt das auch für die fertige Kugelpackung, bei 'average' kann das Entfernen einer schwach
+überlappenden Nachbarkugel den mittleren Überlapp einer Kugel erhöhen.
+
+Jeder Bereich zieht seine Radien aus einem eigenen Zufallszahlengenerator mit dem Startwert [Startwert, Testcase,
+Nummer des Bereichs]. Die Kugelpackung hängt daher nicht von der Anzahl Prozesse ab.
+"""
+
+import multiprocessing
+import os
+from contextlib import nullcontext
+from itertools import starmap
+import numpy as np
+
+# eigene Module
+from variableSizedPacking import *
+
+HALO_WIDTH = 2 # halbe Breite eines Nahtstreifens in Vielfachen von maxRadius
+
+class DecomposedPacking(VariableSizedPacking):
+    def __init__(self, input):
+        """
+        Konstruktor einer zerlegten Kugelpackung mit Kugeln unterschiedlicher Größe.
+
+        :param input: Input - enthält alle Eingabedaten der Datei (Kacheln und Prozesse siehe VariableSizedInput)
+        """
+        VariableSizedPacking.__init__(self, input)
+        self.tiles = input._tiles
+        self.processes = input._processes if input._processes > 0 else os.cpu_count()
+        self.halo = HALO_WIDTH * self.maxRadius # halbe Breite eines Nahtstreifens
+        self.seed = None if input._seed is None else [input._seed, input._testcase]
+        self.countRegions = 0 # Anzahl bisher gepackter Bereiche (Nummer des Startwerts)
+        if self.periodic: # die Ränder des Raumes wären zusätzliche Nähte, die nicht neu gepackt werden
+            raise ValueError("zerlegte Kugelpackungen unterstützen keine periodischen Ränder")
+        for n, length in zip(self.tiles, (self.x, self.y)):
+            if n > 1 and length / n < 2 * self.halo + 2 * self.maxRadius:
+                raise ValueError(f"Kacheln zu schmal: {length} / {n} < {2 * self.halo + 2 * self.maxRadius}")
+
+    def generatePacking(self):
+        """
+        Generieren der zerlegten Kugelpackung.
+
+        Nach dem Einlesen der Initialisierungsebene werden alle Kacheln gepackt, danach die Nahtstreifen in x- und in
+        y-Richtung. Die Kugelpackung wird wie bei VariableSizedPacking geschrieben, die Anzahl der Sonderfälle ist die
+        Summe über alle Bereiche.
+
+        :return: kein Rückgabewert
+        """
+        self.initialize(self.fileName("_initialisierungsebene.csv")) # Initialisierungsebene einlesen
+        self.packTiles()
+        self.finishPacking()
+
+    def packTiles(self):
+        """
+        Packen aller Kacheln und danach der Nahtstreifen in x- und in y-Richtung auf den vorhandenen Kugeln (der
+        Initialisierungsebene).
+
+        Bei nur einem Prozess werden die Bereiche ohne Pool nacheinander im eigenen Prozess gepackt, die Kugelpackung
+        ist dieselbe.
+
+        :return: kein Rückgabewert
+        """
+        self.countInitial = self.countSpheres # Kugeln der Initialisierungsebene werden nie entfernt
+        self.counts = np.zeros(7, dtype=int)
+        self.countOverlappedSpheres = 0
+        # Prozesse werden neu gestartet (spawn) statt geforkt: ein Fork nach dem Start der numba-Threads kann hängen
+        with multiprocessing.get_context('spawn').Pool(self.processes) if self.processes > 1 else nullcontext() as pool:
+            xs = np.linspace(0, self.x, self.tiles[0] + 1)
+            ys = np.linspace(0, self.y, self.tiles[1] + 1)
+            self.packRegions(pool, [[xs[i], xs[i + 1], ys[j], ys[j + 1], 0., self.z]
+                                    for i in range(self.tiles[0]) for j in range(self.tiles[1])])
+            for axis, seams in ((0, xs[1:-1]), (1, ys[1:-1])):
+                if len(seams) == 0:
+                    continue
+                self.packRegions(pool, self.removeSeams(axis, seams))
+
+    def packRegions(self, pool, regions):
+        """
+        Paralleles Packen unabhängiger Bereiche und Anhängen der neuen Kugeln an self.spheres (mit ihren
+        Erzeugendenkugeln an self.sphereGenerators).
+
+        :param pool: multiprocessing.Pool oder None - Prozesse (None: im eigenen Prozess packen)
+        :param regions: Liste aus [x_min, x_max, y_min, y_max, z_min, z_max] - Bereiche für die Pocketmittelpunkte
+        :return: kein Rückgabewert
+        """
+        margin = 2 * self.maxRadius
+        spheres = self.spheres[:self.countSpheres]
+        jobs = []
+        contexts = [] # Indizes der übergebenen Kugeln je Bereich
+        for bounds in regions:
+            near = (spheres[:, 0] >= bounds[0] - margin) & (spheres[:, 0] <= bounds[1] + margin) \
+                   & (spheres[:, 1] >= bounds[2] - margin) & (spheres[:, 1] <= bounds[3] + margin)
+            self.countRegions += 1
+            seed = None if self.seed is None else self.seed + [self.countRegions]
+            jobs.append((self.input, spheres[near], bounds, seed))
+            contexts.append(np.nonzero(near)[0])
+        results = (pool.starmap if pool is not None else starmap)(packRegion, jobs)
+        for context, (new, generators, counts, overlapped) in zip(contexts, results):
+            self.reserveSpheres(self.countSpheres + len(new))
+            # Indizes des Bereichs: erst die übergebenen Kugeln, dann die neuen Kugeln ab self.countSpheres
+            local = np.concatenate((context, np.arange(self.countSpheres, self.countSpheres + len(new))))
+            self.spheres[self.countSpheres:self.countSpheres + len(new)] = new
+            self.sphereGenerators[self.countSpheres:self.countSpheres + len(new)] = local[generators]
+            self.countSpheres += len(new)
+            self.counts += counts
+            self.countOverlappedSpheres += overlapped
+        print(f"{len(regions)} Bereiche gepackt, {self.countSpheres} Kugeln")
+
+    def removeSeams(self, axis, seams):
+        """
+        Entfernen aller platzierten Kugeln (nicht der Initialisierungsebene), deren Mittelpunkt in Richtung axis
+        höchstens self.halo von einer Naht entfernt ist, und aller Kugeln, die (mittelbar) auf ihnen lagen.
+
+        Jede Naht erhält einen Streifen der Breite 2 * self.halo, der bis über die entfernten Kugeln verbreitert wird,
+        die ihr am nächsten liegen. Streifen, deren Abstand höchstens 2 * maxRadius beträgt, werden zusammengefasst,
+        damit sich die neuen Kugeln verschiedener Bereiche nicht berühren.
+
+        :param axis: int - Richtung (0: x, 1: y)
+        :param seams: np.array(dtype=float) - Lage der Nähte (aufsteigend)
+        :return: Liste aus [x_min, x_max, y_min, y_max, z_min, z_max] - neu zu packende Bereiche
+        """
+        spheres = self.spheres[:self.countSpheres]
+        generators = self.sphereGenerators[:self.countSpheres]
+        dist = np.abs(spheres[:, axis, None] - seams[None, :])
+        removed = (np.arange(self.countSpheres) >= self.countInitial) & (np.min(dist, axis=1) <= self.halo)
+        removeUnsupported(removed, generators, self.countInitial)
+        # Streifen je Naht, verbreitert bis über die entfernten Kugeln, die der Naht am nächsten liegen
+        lower, upper = seams - self.halo, seams + self.halo
+        nearest = np.argmin(dist[removed], axis=1)
+        np.minimum.at(lower, nearest, spheres[removed, axis])
+        np.maximum.at(upper, nearest, spheres[removed, axis])
+        # Kugeln entfernen und die Indizes der Erzeugendenkugeln anpassen
+        keep = ~removed
+        index = np.cumsum(keep) - 1
+        n = keep.sum()
+        self.spheres[:n] = spheres[keep]
+        self.spheres[n:self.countSpheres] = -1.
+        self.sphereGenerators[:n] = np.where(generators[keep] >= 0, index[generators[keep]], -1)
+        self.sphereGenerators[n:self.countSpheres] = -1
+        self.countSpheres = n
+        print(f"{removed.sum()} Kugeln an {len(seams)} Nähten entfernt")
+        # nahe Streifen zusammenfassen
+        regions = []
+        for lo, hi in sorted(zip(lower, upper)):
+            if regions and lo - regions[-1][2 * axis + 1] <= 2 * self.maxRadius:
+                regions[-1][2 * axis + 1] = max(regions[-1][2 * axis + 1], hi)
+                continue
+            bounds = [0., self.x, 0., self.y, 0., self.z]
+            bounds[2 * axis:2 * axis + 2] = lo, hi
+            regions.append(bounds)
+        return regions
+
+@jit(nopython=True)
+def removeUnsupported(removed, generators, countInitial):
+    """
+    Markieren aller platzierten Kugeln, die auf einer entfernten Kugel liegen.
+
+    Die Erzeugendenkugeln einer Kugel haben kleinere Indizes als sie selbst, ein Durchlauf in aufsteigender Reihenfolge
+    erfasst daher auch Kugeln, die nur mittelbar auf einer entfernten Kugel liegen.
+
+    :param removed: np.array(n, dtype=bool) - entfernte Kugeln (wird ergänzt)
+    :param generators: np.array((n, 3), dtype=int) - Indizes der Erzeugendenkugeln (-1: keine)
+    :param countInitial: int - Anzahl Kugeln der Initialisierungsebene (werden nie entfernt)
+    :return: kein Rückgabewert
+    """
+    for i in range(countInitial, len(removed)):
+        if removed[i]:
+            continue
+        for k in range(3):
+            if generators[i, k] >= 0 and removed[generators[i, k]]:
+                removed[i] = True
+                break
+
+def packRegion(input, spheres, bounds, seed):
+    """
+    Packen eines Bereichs in einem eigenen Prozess.
+
+    Die übergebenen Kugeln bilden den Ausgangszustand (wie die Initialisierungsebene), neue Kugeln werden nur mit
+    einem Mittelpunkt im Bereich bounds platziert.
+
+    :param input: VariableSizedInput - Eingabedaten
+    :param spheres: np.array((n, 4), dtype=float) - vorhandene Kugeln in der Umgebung des Bereichs
+    :param bounds: [x_min, x_max, y_min, y_max, z_min, z_max] - Bereich für die Pocketmittelpunkte
+    :param seed: Liste aus int oder None - Startwert der Radiusquelle
+    :return: np.array((m, 4), dtype=float), np.array((m, 3), dtype=int), np.array(7, dtype=int), int - neue Kugeln,
+        ihre Erzeugendenkugeln (Indizes in spheres gefolgt von den neuen Kugeln), Anzahl Aufrufe calcPocket und
+        Sonderfälle und Anzahl überlappend platzierter Kugeln
+    """
+    packing = VariableSizedPacking(input)
+    packing.bounds = np.asarray(bounds, dtype=float)
+    packing.snapshotInterval = 0
+    packing.radiusSource = RadiusSource(packing.minRadius, packing.maxRadius, packing.distribution, packing.beta_p,
+                                        packing.beta_q, seed, input._radiusTable)
+    packing.reserveSpheres(len(spheres))
+    packing.spheres[:len(spheres)] = spheres
+    packing.countSpheres = len(spheres)
+    packing.startPacking()
+    packing.placementLoop()
+    new = slice(len(spheres), packing.countSpheres)
+    return packing.spheres[new].copy(), packing.sphereGenerators[new].copy(), packing.counts, \
+        packing.countOverlappedSpheres
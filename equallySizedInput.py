@@ -14,6 +14,12 @@ einzulesene Werte aus Eingabedatei:
 - self._z: int - z-Dimension des Raumes
 - self._radius: float - Radius der Kugeln
 - self._suf: string - Zusatz zur Dateibezeichnung (optional)
+- self._pocketQueue: string - Verwaltung der Pocketliste ('heap' oder 'sort')
+- self._engine: string - Ausführung der Platzierungsschleife ('python' oder 'numba')
+- self._parallelInit: bool - Pockets der Initialisierungsebene parallel berechnen
+- self._batchSize: int - max. Anzahl Kugeln, die in einem Schleifendurchlauf platziert werden (Stapelplatzierung)
+- self._pocketDtype: string - Datentyp der gespeicherten Pocketkoordinaten ('float64' oder 'float32')
+- self._periodic: bool - periodische Ränder in x- und y-Richtung
 """
 
 from input import *
@@ -46,6 +52,12 @@ class EquallySizedInput(Input):
         #self.eps = 5.0
         self._suf = ''
         self._suffix = ''
+        self._pocketQueue = 'heap'
+        self._engine = 'python'
+        self._parallelInit = True
+        self._batchSize = 1
+        self._pocketDtype = 'float64'
+        self._periodic = False
         #self.testpoints = 500
         #self.reachPorosity = True
         #self.targetPorosity = 0.25
@@ -64,6 +76,12 @@ class EquallySizedInput(Input):
         print(f"\ty: {self._y}")
         print(f"\tz: {self._z}")
         print(f"Kugelradius: {self._radius}")
+        print(f"Pocketliste: {self._pocketQueue}")
+        print(f"Engine: {self._engine}")
+        print(f"Initialisierung parallel: {self._parallelInit}")
+        print(f"Batchplatzierung: {self._batchSize}")
+        print(f"Pocketkoordinaten: {self._pocketDtype}")
+        print(f"Periodisch: {self._periodic}")
 
     def readInput(self):
         """
@@ -120,6 +138,39 @@ class EquallySizedInput(Input):
                                 defined = False # Default
                         except ValueError:
                             defined = False # Default
+                    elif line.startswith('Pocketliste'):
+                        temp = line.split(':')[1].strip() # Leerzeichen entfernen
+                        if temp in ('heap', 'sort'):
+                            self._pocketQueue = temp
+                        else:
+                            defined = False # Default
+                    elif line.startswith('Engine'):
+                        temp = line.split(':')[1].strip() # Leerzeichen entfernen
+                        if temp in ('python', 'numba'):
+                            self._engine = temp
+                        else:
+                            defined = False # Default
+                    elif line.startswith('Initialisierung parallel'):
+                        # true: parallele Berechnung, alle anderen Eingaben ergeben false
+                        self._parallelInit = line.split(':')[1].strip() == 'true'
+                    elif line.startswith('Batchplatzierung'):
+                        try:
+                            temp = int(line.split(':')[1])
+                            if temp > 0:
+                                self._batchSize = temp
+                            else:
+                                defined = False # Default
+                        except ValueError:
+                            defined = False # Default
+                    elif line.startswith('Pocketkoordinaten'):
+                        temp = line.split(':')[1].strip() # Leerzeichen entfernen
+                        if temp in ('float64', 'float32'):
+                            self._pocketDtype = temp
+                        else:
+                            defined = False # Default
+                    elif line.startswith('Periodisch'):
+                        # true: periodische Ränder in x- und y-Richtung, alle anderen Eingaben ergeben false
+                        self._periodic = line.split(':')[1].strip() == 'true'
                     elif line.startswith('suffix'):
                         self._suffix = line.split(':')[1].strip() # Leerzeichen entfernen
                         if len(self._suffix) > 0:
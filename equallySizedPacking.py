@@ -4,14 +4,17 @@
 @Date: 04.04.2022
 """
 import numpy as np
-from numba import jit # Just-In-Time-Compiler
+from numba import jit, prange # Just-In-Time-Compiler
 from random import randrange
+import heapq
 import time
 import sys
 import traceback
 # eigene Module
 from packing import *
 from input import Input
+from cellList import CellList, overlapsAny, cellIndex, insertCell, removeCell, queryCells, collectOverlaps
+from neighborList import NeighborList, appendNeighbor, gatherNeighbors
 
 
 np.seterr(all='raise')
@@ -31,20 +34,56 @@ class EquallySizedPacking(Packing):
         self.radius = input._radius
         Packing.__init__(self, input)
 
-        n = self.maxNumOfSpheres()
-        # max. Anzahl entfernte Nachbarn pro Kugel
-        self.maxNeighbors = 50 ##TODO: wie viele entfernte Nachbarn kann eine Kugel maximal haben?
-        # Feld, das in Zeile i die Indizes der entfernten Nachbarkugeln zu Kugel i speichert
-        self.distantNeighbors = np.full((n, self.maxNeighbors), -1., dtype=int)
-        # max. Anzahl Pockets in einem Raum
-        self._numOfPockets = int(2 * self.x * self.y / (np.pi * np.power(self.radius, 2))) ##TODO: wie viele Pockets max.?
-        # Feld aus Pockets
-        # jede Zeile: [x, y, z, r, k1, k2, k3]
-        #   x-, y- und z-Koordinate des Mittelpunkts der Pocket und Radius r
-        #   k1, k2, k3: 3 bereits platzierte Kugeln, aus denen die Pocket erzeugt wurde
-        self.pockets = np.zeros((self._numOfPockets, 7), dtype=float)
+        n = len(self.spheres)
+        # Nachbarliste, die für Kugel i die Indizes der entfernten Nachbarkugeln speichert (wächst bei Bedarf)
+        self.distantNeighbors = NeighborList(n)
+        # Zellliste zur Nachbarsuche: Zellgröße 4 * radius (max. Abstand entfernter Nachbarn). Bei periodischen Rändern
+        # setzt sie sich über den Rand fort (mind. 3 Zellen je Richtung, also x, y >= 12 * radius).
+        self.cells = CellList(self.x, self.y, self.z, 4 * self.radius, n, period=self.period)
+        # Anfangsgröße der Pocketliste, sie wird bei Bedarf verdoppelt (siehe growPocketList)
+        self._numOfPockets = INITIAL_CAPACITY
+        # Pocketliste aus zwei zusammenhängenden Feldern mit derselben Zeile je Pocket:
+        #   self.pockets: [x, y, z, r] - Mittelpunkt und Radius der Pocket (Datentyp self.pocketDtype, float64 oder
+        #                 float32)
+        #   self.pocketSpheres: [k1, k2, k3] - 3 bereits platzierte Kugeln, aus denen die Pocket erzeugt wurde (int32)
+        self.pocketDtype = np.dtype(input._pocketDtype)
+        self.pockets = np.zeros((self._numOfPockets, 4), dtype=self.pocketDtype)
+        self.pocketSpheres = np.full((self._numOfPockets, 3), -1, dtype=np.int32)
         self.countPockets = 0 # Zähler, wie viele Pockets belegt sind
 
+        # Verwaltung der Pocketliste:
+        #   'heap': Prioritätswarteschlange nach der z-Koordinate, überschnittene Pockets werden über eine Zellliste
+        #           der Pockets gefunden und gelöscht, ihre Einträge in der Warteschlange erst bei der Entnahme
+        #           verworfen (lazy invalidation)
+        #   'sort': Referenzverfahren, Pocketliste wird nach jeder Platzierung vollständig sortiert
+        self.pocketQueue = input._pocketQueue
+        # jeder Eintrag: (z, nr, zeile) - z-Koordinate der Pocket, fortlaufende Nummer (eindeutige Reihenfolge bei
+        # gleicher z-Koordinate) und Zeile der Pocket in self.pockets
+        self.pocketHeap = []
+        self.pocketSeq = 0 # fortlaufende Nummer der nächsten Pocket
+        self.freeRows = [] # freigegebene Zeilen in self.pockets
+        self.usedRows = 0 # Anzahl bisher verwendeter Zeilen in self.pockets
+        # fortlaufende Nummer der Pocket in jeder Zeile von self.pockets (-1: Zeile frei). Einträge in self.pocketHeap,
+        # deren Nummer nicht mehr mit der Zeile übereinstimmt, gehören zu gelöschten Pockets und werden übersprungen.
+        self.rowSeq = np.full(self._numOfPockets, -1, dtype=np.int64)
+        # Zellliste der Pockets: Zellgröße 2 * radius, nur Pockets mit einem Abstand < 2 * radius zu einer neuen Kugel
+        # können sich mit ihr überschneiden
+        self.pocketCells = CellList(self.x, self.y, self.z, 2 * self.radius, self._numOfPockets, period=self.period)
+
+        # Ausführung der Platzierungsschleife:
+        #   'python': Schleife im Interpreter, Kernfunktionen kompiliert
+        #   'numba': gesamte Platzierungsschleife kompiliert (depositionLoop), arbeitet immer mit der
+        #            Prioritätswarteschlange und liefert dieselbe Kugelpackung wie 'python' mit 'heap'
+        self.engine = input._engine
+        if self.engine == 'numba':
+            self.pocketQueue = 'heap'
+        # Pockets der Initialisierungsebene parallel auf allen Kernen berechnen
+        self.parallelInit = input._parallelInit
+        # max. Anzahl Kugeln je Schleifendurchlauf (Stapelplatzierung, siehe placeBatch)
+        self.batchSize = input._batchSize
+        if self.batchSize > 1 and (self.engine != 'python' or self.pocketQueue != 'heap'):
+            raise ValueError(f"Batchplatzierung {self.batchSize} nur mit Engine 'python' und Pocketliste 'heap'")
+
     # overriding abstract method
     def maxNumOfSpheres(self):
         """
@@ -69,58 +108,28 @@ class EquallySizedPacking(Packing):
         n = (p * v_r) / v_s # max. Anzahl Kugeln
         return int(n + 1)
 
-    # def nextInNeighbors(self, i):
-    #     """
-    #     Gibt Index für nächstes freies Feld zum Abspeichern einer Nachbarkugel der Kugel i.
-    #
-    #     Für die Kugel mit Index i werden die Indizes der entfernten Nachbarn im Feld self.distantNeighbors gespeichert.
-    #     Alle freien Felder, die kein Nachbarindex enthalten sind mit dem Wert -1 initialisiert.
-    #     Die Methode gibt den Index des ersten freien Feldes (< 0) von self.distantNeighbors[i] zurück.
-    #
-    #     :param i: int - Kugel mit Index i aus der Kugelliste self.spheres
-    #     :return: int - Index 1. Feld mit noch nicht belegter Nachbarkugel für Kugel i
-    #     """
-    #     # nächsten freien Platz in Nachbarsliste finden für die Kugel i
-    #     for j in range(self.maxNeighbors):
-    #         if self.distantNeighbors[i, j] < 0: # alle nicht freien Werte sind durch Werte >= 0 belegt
-    #             return j
-    #     raise ValueError("kein freies Feld für weitere Nachbarkugel")
-    #     #return -1
-
     def pocketValid(self, pocket):
         """
         Prüft, ob die übergebene Pocket gültig ist.
 
         Eine Pocket ist gültig, wenn der Mittelpunkt innerhalb des Raumes mit den Seitenlängen x, y und z liegt
-        und sich die Pocket nicht mit einer bereits existierenden Kugeln überschneidet.
+        und sich die Pocket nicht mit einer bereits existierenden Kugeln überschneidet. Bei periodischen Rändern liegt
+        der Mittelpunkt in x- und y-Richtung immer im Raum (siehe periodicPocket), Überschneidungen werden mit dem
+        nächstgelegenen Bild jeder Kugel geprüft.
 
-        Eine
-        :param pocket: np.array(7, dtype=float) - [x, y, z, r, nb1, nb2, nb3]
+        :param pocket: np.array(4, dtype=float) - [x, y, z, r]
             x, y und z: Position Mittelpunkt Pocket
             r: Radius Pocket
-            nb1, nb2, nb3: (int) Index Nachbarkugeln aus denen, die Pocket erzeugt wurde
         :return: bool - true, wenn Pocket gültig
         """
         if (pocket[0] < 0) or (pocket[0] > self.x) or (pocket[1] < 0) or (pocket[1] > self.y) or (pocket[2] < 0) or (pocket[2] > self.z):
             return False # Mittelpunkt der Pocket liegt nicht im Raum
         # Überprüfung: Überschneidung Pocket mit einer bereits platzierten Kugel
-        # Entfernte Nachbarkugeln der 3 Erzeugendenkugeln durch gehen
-        # Aus den 3 Erzeugendenkugeln wurde eine neue Pocket berechnet
-        for i in range(4,7):
-            index = int(pocket[i]) # Index der Erzeugendenkugel
-            try:
-                #last = self.nextInNeighbors(index)
-                last = nextInNeighbors(self.distantNeighbors[index])
-            except ValueError as ex:
-                ex_type, ex_value, ex_traceback = sys.exc_info()
-                print("Exception message : %s" % ex_value)
-                print("Erhöhe self.maxNeighbors im Konstruktor von EquallySizedPacking")
-                exit()
-            for j in range(last):
-                neighbor = self.distantNeighbors[index, j] # Index entfernte Nachbarkugel
-                if sphereDistance(pocket[:4], self.spheres[neighbor]) < -0.0001:
-                    return False
-        return True
+        # Jede Kugel, die die Pocket schneidet, hat einen Abstand < 2 * radius zum Mittelpunkt der Pocket und liegt
+        # daher in einer der 27 Zellen um die Zelle der Pocket
+        c = cellIndex(pocket, self.cells.origin, self.cells.cellSize, self.cells.dims)
+        return not overlapsAny(pocket[:4], self.spheres, self.cells.head, self.cells.next, c, self.cells.dims,
+                               self.period, 0.0001)
 
     def sortPocketList(self):
         """
@@ -128,17 +137,115 @@ class EquallySizedPacking(Packing):
 
         Alle Pockets werden aufsteigend nach ihrer z-Koordinate sortiert, sodass die Pocket mit der niedrigsten
         z-Koordinate an Position self.pockets[0] steht.
-        Alle nicht belegten Pockets ([-1, -1, -1, -1, -1, -1, -1]) befinden sich am Ende des Feldes.
+        Alle nicht belegten Pockets ([-1, -1, -1, -1]) befinden sich am Ende des Feldes. self.pocketSpheres wird in
+        derselben Reihenfolge umsortiert.
 
         :return: kein Rückgabewert
         """
         sortedPockets = self.pockets[:,2].argsort() # Indizes der sortierten Pockets
-        numOfEmptyPockets = self._numOfPockets-self.countPockets # Anzahl nicht belegter Pockets in self.pockets
+        numOfEmptyPockets = len(self.pockets)-self.countPockets # Anzahl nicht belegter Pockets in self.pockets
         emptyPockets = sortedPockets[:numOfEmptyPockets].copy() # Array der Indizes nicht belegten Pockets
         # Verschieben der Indizes der belegten Pockets an den Beginn von sortedPockets
         sortedPockets[:self.countPockets] = sortedPockets[numOfEmptyPockets:]
         sortedPockets[self.countPockets:] = emptyPockets
         self.pockets = self.pockets[sortedPockets] # Umsortierung
+        self.pocketSpheres = self.pocketSpheres[sortedPockets]
+
+    def storePocket(self, pocket, generators):
+        """
+        Eintragen einer gültigen Pocket in die Pocketliste.
+
+        Im Modus 'sort' wird die Pocket hinter der letzten belegten Pocket eingetragen, die Pocketliste muss danach
+        sortiert werden. Im Modus 'heap' wird die Pocket in einer freien Zeile von self.pockets gespeichert, in die
+        Zellliste der Pockets eingetragen und mit ihrer (gespeicherten) z-Koordinate in self.pocketHeap eingefügt
+        (O(log P)).
+
+        :param pocket: np.array(4, dtype=float) - [x, y, z, r]
+        :param generators: (int, int, int) - Indizes der Erzeugendenkugeln
+        :return: kein Rückgabewert
+        """
+        if self.pocketQueue == 'sort':
+            if self.countPockets == len(self.pockets): # Feld voll --> Kapazität verdoppeln
+                self.growPocketList()
+            self.pockets[self.countPockets] = pocket
+            self.pocketSpheres[self.countPockets] = generators
+            self.countPockets += 1
+            return
+        if np.isnan(pocket[2]):
+            return # keine berechenbare Position (wird im Modus 'sort' ans Ende sortiert und nie gefüllt)
+        if self.freeRows:
+            row = self.freeRows.pop()
+        else:
+            if self.usedRows == len(self.pockets): # Feld voll --> Kapazität verdoppeln
+                self.growPocketList()
+            row = self.usedRows
+            self.usedRows += 1
+        self.pockets[row] = pocket
+        self.pocketSpheres[row] = generators
+        self.rowSeq[row] = self.pocketSeq
+        self.pocketCells.insert(row, self.pockets[row])
+        heapq.heappush(self.pocketHeap, (self.pockets[row, 2], self.pocketSeq, row))
+        self.pocketSeq += 1
+        self.countPockets += 1
+
+    def growPocketList(self):
+        """
+        Verdoppeln der Kapazität der Pocketliste.
+
+        :return: kein Rückgabewert
+        """
+        n = len(self.pockets)
+        self.pockets = growBuffer(self.pockets, 2 * n, 0.)
+        self.pocketSpheres = growBuffer(self.pocketSpheres, 2 * n, -1)
+        self.rowSeq = growBuffer(self.rowSeq, 2 * n, -1)
+        self.pocketCells.grow(2 * n)
+        self.recordMemory()
+
+    def spheresGrown(self, capacity):
+        """
+        Vergrößern der Zell- und Nachbarliste, nachdem die Kugelliste auf capacity Kugeln vergrößert wurde.
+
+        :param capacity: int - neue Kapazität der Kugelliste
+        :return: kein Rückgabewert
+        """
+        self.cells.grow(capacity)
+        self.distantNeighbors.growSpheres(capacity)
+
+    def deletePocket(self, row):
+        """
+        Löschen der Pocket in Zeile row (Modus 'heap').
+
+        Die Zeile wird freigegeben, der Eintrag in self.pocketHeap bleibt bestehen und wird bei der Entnahme verworfen.
+
+        :param row: int - Zeile der Pocket in self.pockets
+        :return: kein Rückgabewert
+        """
+        self.pocketCells.remove(row)
+        self.rowSeq[row] = -1
+        self.freeRows.append(row)
+        self.countPockets -= 1
+
+    def nextPocket(self):
+        """
+        Gibt die niedrigste gültige Pocket zurück.
+
+        Im Modus 'sort' steht die niedrigste Pocket an Position self.pockets[0]. Im Modus 'heap' werden Einträge
+        aus self.pocketHeap entnommen, bis ein Eintrag gefunden wird, dessen Pocket noch nicht gelöscht wurde.
+        Die Pocket wird aus der Pocketliste entfernt.
+
+        :return: np.array(4, dtype=float) - niedrigste gültige Pocket oder None, wenn keine freie Pocket vorhanden ist
+        """
+        if self.pocketQueue == 'sort':
+            if self.pockets[0, 2] > 0:
+                return self.pockets[0].copy()
+            return None
+        while self.pocketHeap:
+            z, seq, row = heapq.heappop(self.pocketHeap)
+            if self.rowSeq[row] == seq: # sonst wurde die Pocket bereits gelöscht
+                pocket = self.pockets[row].copy()
+                self.deletePocket(row)
+                return pocket
+        return None
 
     def initPocketList(self):
         """
@@ -152,151 +259,203 @@ class EquallySizedPacking(Packing):
         # self.distantNeighbors initialisieren:
         # für jede Kugel aus der Initialisierungsebene werden entfernte Nachbarkugeln gespeichert
         for i in range(self.countSpheres):
-            for j in range(i+1, self.countSpheres):
-                if pointDistance(self.spheres[i,:3], self.spheres[j,:3]) <= 4 * self.radius:
-                    try:
-                        #free = self.nextInNeighbors(i)
-                        free = nextInNeighbors(self.distantNeighbors[i])
-                    except ValueError as ex:
-                        ex_type, ex_value, ex_traceback = sys.exc_info()
-                        print("Exception message : %s" % ex_value)
-                        print("Erhöhe self.maxNeighbors im Konstruktor von EquallySizedPacking")
-                        exit()
-                    #free = self.nextInNeighbors(i)
-                    self.distantNeighbors[i, free] = j
-                    # Nachbarn symmetrisch abspeichern
-                    #free = self.nextInNeighbors(j)
-                    try:
-                        #free = self.nextInNeighbors(j)
-                        free = nextInNeighbors(self.distantNeighbors[j])
-                    except ValueError as ex:
-                        ex_type, ex_value, ex_traceback = sys.exc_info()
-                        print("Exception message : %s" % ex_value)
-                        print("Erhöhe self.maxNeighbors im Konstruktor von EquallySizedPacking")
-                        exit()
-                    self.distantNeighbors[j, free] = i
+            self.cells.insert(i, self.spheres[i])
+        for i in range(self.countSpheres):
+            # nur Kugeln aus den 27 benachbarten Zellen kommen als entfernte Nachbarn in Frage
+            candidates = np.sort(self.cells.query(self.spheres[i]))
+            for j in candidates[candidates > i]:
+                if imageDistance(self.spheres[i], self.spheres[j], self.period) <= 4 * self.radius:
+                    self.distantNeighbors.append(i, j)
+                    self.distantNeighbors.append(j, i) # Nachbarn symmetrisch abspeichern
 
         # aus entfernten Nachbarkugeln Pockets berechnen
+        if self.parallelInit:
+            # alle Dreierkombinationen in derselben Reihenfolge wie in der seriellen Schleife aufzählen, parallel
+            # auswerten und anschließend in dieser Reihenfolge eintragen (gleiche Pocketliste wie seriell)
+            nb = self.distantNeighbors
+            triples = enumerateTriples(nb.count, nb.first, nb.blocks, nb.blockNext, self.countSpheres)
+            cells = self.cells
+            pockets, valid = evaluateTriples(self.spheres, triples, cells.head, cells.next, cells.origin,
+                                             cells.cellSize, cells.dims, self.period, self.x, self.y, self.z,
+                                             self.pockets)
+            for t in np.nonzero(valid)[0]:
+                self.storePocket(pockets[t], triples[t])
+            if self.pocketQueue == 'sort':
+                self.sortPocketList()
+            return
         for i in range(self.countSpheres):
-            try:
-                #last = self.nextInNeighbors(i)
-                last = nextInNeighbors(self.distantNeighbors[i])
-            except ValueError as ex:
-                ex_type, ex_value, ex_traceback = sys.exc_info()
-                print("Exception message : %s" % ex_value)
-                print("Erhöhe self.maxNeighbors im Konstruktor von EquallySizedPacking")
-                exit()
-            #last = self.nextInNeighbors(i)
+            neighbors = self.distantNeighbors.get(i)
+            last = len(neighbors)
             for j in range(last):
                 for k in range(j+1, last):
-                    nb1 = self.distantNeighbors[i, j] # Index entfernter Nachbar 1 Kugel i
-                    nb2 = self.distantNeighbors[i, k] # Index entfernter Nachbar 2 Kugel i
+                    nb1 = neighbors[j] # Index entfernter Nachbar 1 Kugel i
+                    nb2 = neighbors[k] # Index entfernter Nachbar 2 Kugel i
                     if (nb1 > i) and (nb2 > i): # sonst wurde Pocket bereits in frueherem Schleifendurchlauf berechnet
-                        if pocketPossibleAlt(self.spheres[i], self.spheres[nb1], self.spheres[nb2]):
-                            temp = calculatePocket(self.spheres[i], self.spheres[nb1], self.spheres[nb2])
-                            pocket = np.full(7, -1.)
-                            pocket[4:7] = np.array([i, nb1, nb2]) # Erzeugendenkugeln der Pocket
-                            pocket[:4] = temp # Position und Radius der Pocket
+                        possible, px, py, pz, pr = periodicPocket(self.spheres[i], self.spheres[nb1],
+                                                                  self.spheres[nb2], self.period)
+                        if possible:
+                            pocket = np.array([px, py, pz, pr]) # Position und Radius der Pocket
+                            roundPocket(pocket, self.pockets)
                             if self.pocketValid(pocket):
-                                self.pockets[self.countPockets] = pocket
-                                self.countPockets += 1
-        self.sortPocketList()
+                                self.storePocket(pocket, (i, nb1, nb2))
+        if self.pocketQueue == 'sort':
+            self.sortPocketList()
         #self.pockets = sortPocketList(self.pockets, self.countPockets, self._numOfPockets)
 
-    def updatePocketList(self):
+    def updatePocketList(self, newPockets=None):
         """
         Pocketliste aktualisieren nachdem in der niedrigsten Pocket eine Kugel platziert wurde.
 
         Beim Aktualisieren der Pocketliste müssen alle Pockets gelöscht werden, die sich mit der gerade platzierten
         Kugel überschneiden. Zudem müssen alle neuen Pockets berechnet werden, die sich aus der geraden platzierten
-        Kugel und ihren entfernten Nachbarkugeln ergeben.
+        Kugel und ihren entfernten Nachbarkugeln ergeben (siehe insertSphere).
+
+        Bei der Stapelplatzierung (siehe placeBatch) werden alle Kugeln des Stapels in einem Aufruf nachgetragen: für
+        jede Kugel in der Reihenfolge der Platzierung werden die überschneidenden Pockets gelöscht und ihre neuen
+        Pockets eingetragen, wie nach der Platzierung jeder einzelnen Kugel.
 
+        :param newPockets: Liste - je Kugel des Stapels die mit insertSphere berechneten neuen Pockets (die Kugeln sind
+            die letzten len(newPockets) Kugeln); None: nur die neuste Kugel, ihre neuen Pockets werden hier berechnet
         :return: kein Rückgabewert
         """
-        kugelId = self.countSpheres - 1 # Index der neusten platzierten Kugel
-
-        # überschneidende Pockets löschen
-        n = self.countPockets
-        for i in range(n):
-            if sphereDistance(self.spheres[kugelId], self.pockets[i,:4]) < -0.0001:
-                self.pockets[i] = np.full(7, -1)
-                self.countPockets -= 1
-        self.sortPocketList()
+        if newPockets is None:
+            newPockets = [self.insertSphere(self.countSpheres - 1)]
+        first = self.countSpheres - len(newPockets) # Index der ersten neuen Kugel
+        for k, pockets in enumerate(newPockets):
+            self.removeOverlapping(first + k)
+            for pocket, generators in pockets:
+                self.storePocket(pocket, generators)
+        if self.pocketQueue == 'sort':
+            self.sortPocketList()
         #self.pockets = sortPocketList(self.pockets, self.countPockets, self._numOfPockets)
 
-        # Nachbarn der neuen Kugel bestimmen (Variante 1: Teilliste durchgehen)
-        # Bedingungen, die erfüllt sein müssen, damit Kugel entfernte Nachbarkugel der neuen Kugel sein kann
-        dist = (self.spheres[kugelId,3] * 4) * 1.0001 # max. Abstand, damit Kugeln benachbart sein können
-        con1 = (self.spheres[:,0] > self.spheres[kugelId,0] - dist) & (self.spheres[:,0] < self.spheres[kugelId,0] + dist)
-        con2 = (self.spheres[:,1] > self.spheres[kugelId,1] - dist) & (self.spheres[:,1] < self.spheres[kugelId,1] + dist)
-        con3 = (self.spheres[:,2] > self.spheres[kugelId,2] - dist) & (self.spheres[:,2] < self.spheres[kugelId,2] + dist)
-        con4 = (self.spheres[:,0] > 0) & (self.spheres[:,1] > 0) & (self.spheres[:,2] > 0)
-        # Anzahl Kugeln, die die Bedingungen (con1 - con3) (nicht) erfüllen
-        n = (con1 & con2 & con3 & con4).sum()
-        nr = len(self.spheres) - n  # (con1 & con2 & con3).sum() = Anzahl True in Array
-        # Indizes der Kugeln, die die Bedingungen (con1 - con3) erfüllen
-        indices = (con1 & con2 & con3 & con4).argsort()[nr:]
+    def removeOverlapping(self, kugelId):
+        """
+        Löschen aller Pockets, die sich mit der Kugel kugelId überschneiden.
+
+        :param kugelId: int - Index der platzierten Kugel
+        :return: kein Rückgabewert
+        """
+        if self.pocketQueue == 'heap':
+            # nur Pockets aus den 27 Zellen um die neue Kugel können sich mit ihr überschneiden
+            cells = self.pocketCells
+            c = cellIndex(self.spheres[kugelId], cells.origin, cells.cellSize, cells.dims)
+            buffer = np.empty(self.countPockets, dtype=np.int64)
+            n = collectOverlaps(self.spheres[kugelId], self.pockets, cells.head, cells.next, c, cells.dims,
+                                self.period, 0.0001, buffer)
+            for row in np.sort(buffer[:n]):
+                self.deletePocket(row)
+        else:
+            n = self.countPockets
+            for i in range(n):
+                pocket = self.pockets[i].astype(float)
+                d = imageDistance(self.spheres[kugelId], pocket, self.period) - (self.spheres[kugelId, 3] + pocket[3])
+                if d < -0.0001:
+                    self.pockets[i] = -1
+                    self.pocketSpheres[i] = -1
+                    self.countPockets -= 1
+            self.sortPocketList()
+
+    def insertSphere(self, kugelId):
+        """
+        Eintragen der platzierten Kugel kugelId in die Zell- und Nachbarliste und Berechnen ihrer neuen Pockets.
+
+        Neue Pockets ergeben sich aus der Kugel und je zwei ihrer entfernten Nachbarkugeln. Sie werden mit allen bisher
+        eingetragenen Kugeln auf Gültigkeit geprüft, aber noch nicht in die Pocketliste eingetragen (siehe
+        updatePocketList).
+
+        :param kugelId: int - Index der platzierten Kugel
+        :return: Liste aus (np.array(4, dtype=float), (int, int, int)) - gültige neue Pockets mit den Indizes ihrer
+            Erzeugendenkugeln
+        """
+        # Nachbarn der neuen Kugel bestimmen (Variante 3: Zellliste)
+        # neue Kugel in die Zellliste eintragen, potentielle Nachbarkugeln liegen in den 27 benachbarten Zellen
+        self.cells.insert(kugelId, self.spheres[kugelId])
+        indices = np.sort(self.cells.query(self.spheres[kugelId]))
+        n = len(indices)
 
         # aus potentiellen Nachbarkugeln alle entfernten Nachbarkugeln berechnen
         for i in range(n):
             potNei = indices[i] # Index potentielle Nachbarkugel
-            if (pointDistance(self.spheres[kugelId], self.spheres[potNei]) <= (4 * self.radius)) and (potNei != kugelId):
-
-                # last = self.nextInNeighbors(kugelId)
-                try:
-                    #last = self.nextInNeighbors(kugelId)
-                    last = nextInNeighbors(self.distantNeighbors[kugelId])
-                except ValueError as ex:
-                    ex_type, ex_value, ex_traceback = sys.exc_info()
-                    print("Exception message : %s" % ex_value)
-                    print("Erhöhe self.maxNeighbors im Konstruktor von EquallySizedPacking")
-                    exit()
-                self.distantNeighbors[kugelId, last] = potNei
-                # Nachbarkugeln symmetrisch abspeichern
-                # last = self.nextInNeighbors(potNei)
-                try:
-                    #last = self.nextInNeighbors(potNei)
-                    last = nextInNeighbors(self.distantNeighbors[potNei])
-                except ValueError as ex:
-                    ex_type, ex_value, ex_traceback = sys.exc_info()
-                    print("Exception message : %s" % ex_value)
-                    print("Erhöhe self.maxNeighbors im Konstruktor von EquallySizedPacking")
-                    exit()
-                self.distantNeighbors[potNei, last] = kugelId
+            if (imageDistance(self.spheres[kugelId], self.spheres[potNei], self.period) <= (4 * self.radius)) \
+                    and (potNei != kugelId):
+                self.distantNeighbors.append(kugelId, potNei)
+                self.distantNeighbors.append(potNei, kugelId) # Nachbarkugeln symmetrisch abspeichern
 
         # Nachbarn der neuen Kugel bestimmen (Variante 2: gesamte Liste durchgehen)
         # for i in range(kugelId): # gesamte Kugelliste (außer neue Kugel selbst) nach entfernten Nachbarn durchsuchen
         #     if pointDistance(self.spheres[kugelId], self.spheres[i]) <= (4 * self.radius):
-        #         last = self.nextInNeighbors(kugelId)
-        #         self.distantNeighbors[kugelId, last] = i
-        #         # Nachbarkugeln symmetrisch abspeichern
-        #         last = self.nextInNeighbors(i)
-        #         self.distantNeighbors[i, last] = kugelId
+        #         self.distantNeighbors.append(kugelId, i)
+        #         self.distantNeighbors.append(i, kugelId)
 
         # neue Pockets aus Nachbarn der neuen Kugel berechnen
-        # last = self.nextInNeighbors(kugelId)
-        try:
-            #last = self.nextInNeighbors(kugelId)
-            last = nextInNeighbors(self.distantNeighbors[kugelId])
-        except ValueError as ex:
-            ex_type, ex_value, ex_traceback = sys.exc_info()
-            print("Exception message : %s" % ex_value)
-            print("Erhöhe self.maxNeighbors im Konstruktor von EquallySizedPacking")
-            exit()
+        newPockets = []
+        neighbors = self.distantNeighbors.get(kugelId)
+        last = len(neighbors)
         for i in range(last):
             for j in range(i+1, last):
-                nb1 = self.distantNeighbors[kugelId, i] # Index einer Nachbarkugeln
-                nb2 = self.distantNeighbors[kugelId, j] # Index einer weiteren Nachbarkugeln
-                if pocketPossibleAlt(self.spheres[kugelId], self.spheres[nb1], self.spheres[nb2]):
-                    temp = calculatePocket(self.spheres[kugelId], self.spheres[nb1], self.spheres[nb2])
-                    pocket = np.full(7, -1.)
-                    pocket[4:7] = np.array([kugelId, nb1, nb2])  # Erzeugendenkugeln der Pocket
-                    pocket[:4] = temp  # Position und Radius der Pocket
+                nb1 = neighbors[i] # Index einer Nachbarkugeln
+                nb2 = neighbors[j] # Index einer weiteren Nachbarkugeln
+                possible, px, py, pz, pr = periodicPocket(self.spheres[kugelId], self.spheres[nb1],
+                                                          self.spheres[nb2], self.period)
+                if possible:
+                    pocket = np.array([px, py, pz, pr])  # Position und Radius der Pocket
+                    roundPocket(pocket, self.pockets)
                     if self.pocketValid(pocket):
-                        self.pockets[self.countPockets] = pocket
-                        self.countPockets += 1
-        self.sortPocketList()
-        #self.pockets = sortPocketList(self.pockets, self.countPockets, self._numOfPockets)
+                        newPockets.append((pocket, (kugelId, nb1, nb2)))
+        return newPockets
+
+    def placeBatch(self, lowestPoc):
+        """
+        Platzieren eines Stapels von Kugeln, beginnend mit der niedrigsten Pocket lowestPoc.
+
+        Die Kugeln werden platziert und mit insertSphere eingetragen, die Pocketliste wird erst danach für alle Kugeln
+        gemeinsam aktualisiert (siehe updatePocketList). Nach jeder Kugel wird die nächste Pocket der
+        Prioritätswarteschlange geprüft (höchstens self.batchSize Kugeln, nur mit Engine 'python' und Modus 'heap'):
+        - überschneidet sie sich mit einer Kugel des Stapels, würde sie auch bei der Platzierung einzelner Kugeln
+          gelöscht, sie wird verworfen und die nächste Pocket geprüft
+        - liegt sie nicht höher als alle noch gültigen neuen Pockets der Kugeln des Stapels, wäre sie auch bei der
+          Platzierung einzelner Kugeln die nächste Pocket (bei gleicher z-Koordinate hat sie die kleinere fortlaufende
+          Nummer), sie wird in den Stapel aufgenommen
+        - sonst endet der Stapel, da eine neue Pocket zuerst gefüllt werden müsste
+        Die Kugelpackung ist daher unabhängig von self.batchSize dieselbe wie bei der Platzierung einzelner Kugeln.
+
+        :param lowestPoc: np.array(4, dtype=float) - niedrigste gültige Pocket
+        :return: Liste - je Kugel des Stapels die neuen Pockets (siehe insertSphere)
+        """
+        first = self.countSpheres # Index der ersten Kugel des Stapels
+        newPockets = []
+        candidates = [] # noch gültige neue Pockets der Kugeln des Stapels
+        pocket = lowestPoc
+        while True:
+            kugelId = self.countSpheres
+            self.reserveSpheres(kugelId + 1)
+            self.spheres[kugelId] = pocket[:4]
+            self.countSpheres += 1
+            newPockets.append(self.insertSphere(kugelId))
+            # neue Pockets früherer Kugeln, die die neue Kugel überschneidet, werden bei der Aktualisierung gelöscht
+            candidates = [p for p in candidates if not overlapping(self.spheres[kugelId], p, self.period)]
+            candidates += [p for p, generators in newPockets[-1] if not np.isnan(p[2])]
+            if len(newPockets) >= self.batchSize:
+                break
+            limit = min((p[2] for p in candidates), default=np.inf)
+            pocket = None
+            while self.pocketHeap:
+                z, seq, row = self.pocketHeap[0]
+                if self.rowSeq[row] != seq: # gelöschte Pocket
+                    heapq.heappop(self.pocketHeap)
+                elif z > limit:
+                    break
+                elif any(overlapping(self.spheres[i], self.pockets[row], self.period)
+                         for i in range(first, self.countSpheres)):
+                    heapq.heappop(self.pocketHeap)
+                    self.deletePocket(row)
+                else:
+                    pocket = self.nextPocket()
+                    break
+            if pocket is None:
+                break
+        return newPockets
 
     def generatePacking(self):
         """
@@ -314,12 +473,69 @@ class EquallySizedPacking(Packing):
         self.initialize(csvIn) # Initialisierungsebene einlesen
         self.initPocketList()
         #print(len(self.pockets[(self.pockets[:,3] > 0)]))
-        while self.pockets[0,2] > 0: # Solange freie Pockets vorhanden sind
-            lowestPoc = self.pockets[0]
-            self.spheres[self.countSpheres] = lowestPoc[:4]
-            self.countSpheres += 1
-            self.updatePocketList()
+        if self.engine == 'numba':
+            self.runDepositionLoop()
+        else:
+            lowestPoc = self.nextPocket()
+            while lowestPoc is not None: # Solange freie Pockets vorhanden sind
+                self.updatePocketList(self.placeBatch(lowestPoc))
+                lowestPoc = self.nextPocket()
         self.writeCsvFile(csvOut)
+        self.trimBuffers()
+        self.reportMemory()
+
+    def runDepositionLoop(self):
+        """
+        Kompilierte Platzierungsschleife (Engine 'numba').
+
+        Die Zustände von Pocketliste, Prioritätswarteschlange, Zellliste und Nachbarliste werden als Felder an
+        depositionLoop übergeben, die die Schleife aus generatePacking vollständig kompiliert ausführt. Reicht die
+        Größe eines Feldes für die nächste Platzierung nicht aus, kehrt depositionLoop vor dieser Platzierung zurück,
+        das Feld wird verdoppelt und die Schleife fortgesetzt. Danach wird der Zustand in die Attribute der Kugelpackung
+        zurückgeschrieben.
+
+        :return: kein Rückgabewert
+        """
+        heapSize = len(self.pocketHeap)
+        capacity = max(2 * heapSize, 1024)
+        heapZ = np.zeros(capacity)
+        heapSeq = np.zeros(capacity, dtype=np.int64)
+        heapRow = np.zeros(capacity, dtype=np.int64)
+        # eine Liste aus heapq erfüllt bereits die Heap-Bedingung und kann direkt übernommen werden
+        for i, (z, seq, row) in enumerate(self.pocketHeap):
+            heapZ[i], heapSeq[i], heapRow[i] = z, seq, row
+        freeRows = np.zeros(len(self.pockets), dtype=np.int64)
+        freeRows[:len(self.freeRows)] = self.freeRows
+        # Zustand: [countSpheres, usedRows, countFree, heapSize, pocketSeq, countPockets, status]
+        state = np.array([self.countSpheres, self.usedRows, len(self.freeRows), heapSize, self.pocketSeq,
+                          self.countPockets, 0], dtype=np.int64)
+        nb = self.distantNeighbors
+        while True:
+            cells = self.cells
+            pCells = self.pocketCells
+            depositionLoop(self.spheres, self.pockets, self.pocketSpheres, self.rowSeq, freeRows, heapZ, heapSeq,
+                           heapRow, state, cells.head, cells.next, cells.prev, cells.cellOf, cells.origin,
+                           cells.cellSize, cells.dims, pCells.head, pCells.next, pCells.prev, pCells.cellOf,
+                           pCells.origin, pCells.cellSize, pCells.dims, nb.count, nb.first, nb.last, nb.blocks,
+                           nb.blockNext, nb.usedBlocks, self.period, self.x, self.y, self.z, self.radius)
+            status = state[6]
+            if status == LOOP_DONE:
+                break
+            elif status == LOOP_GROW_SPHERES:
+                self.reserveSpheres(len(self.spheres) + 1)
+            elif status == LOOP_GROW_POCKETS:
+                self.growPocketList()
+                freeRows = np.concatenate([freeRows, np.zeros(len(freeRows), dtype=np.int64)])
+            elif status == LOOP_GROW_HEAP:
+                heapZ = np.concatenate([heapZ, np.zeros(len(heapZ))])
+                heapSeq = np.concatenate([heapSeq, np.zeros(len(heapSeq), dtype=np.int64)])
+                heapRow = np.concatenate([heapRow, np.zeros(len(heapRow), dtype=np.int64)])
+            elif status == LOOP_GROW_NEIGHBORS:
+                nb.grow()
+                self.recordMemory()
+        self.countSpheres, self.usedRows, countFree, heapSize, self.pocketSeq, self.countPockets = state[:6]
+        self.freeRows = list(freeRows[:countFree])
+        self.pocketHeap = [(heapZ[i], heapSeq[i], heapRow[i]) for i in range(heapSize)]
 
 @jit(nopython=True)
 def calculatePocket(k1, k2, k3):
@@ -393,23 +609,402 @@ def pocketPossibleAlt(k1, k2, k3):
         return True
     return False
 
+TOUCH_TOLERANCE = 1e-9 # erlaubte Rundung des Abstandsquadrats |P - K3|^2 in equalSizedPocket (relativ zu r^2)
+
+@jit(nopython=True)
+def equalSizedPocket(k1, k2, k3):
+    """
+    Berechnet, ob aus 3 gleich großen Kugeln eine Pocket berechnet werden kann, und ihre Position.
+
+    Geschlossene Form von pocketPossibleAlt und calculatePocket in einem Durchlauf ohne Winkelfunktionen und temporäre
+    Felder (u = K2 - K1, v = K3 - K1, n = u x v):
+    - wie in pocketPossibleAlt ist keine Pocket möglich, wenn h < r (|u|^2 > 12 r^2) oder wenn der Punkt P der Ebene
+      durch K1, K2, K3 mit dem Abstand 2r zu K1 und K2 auf der Seite von K3 weiter als 2r von K3 entfernt ist. Statt
+      über die Winkel beta und beta_hat wird |P - K3|^2 = |v - u/2|^2 + h^2 - 2h |n| / |u| direkt berechnet.
+    - der Mittelpunkt der Pocket liegt wie in calculatePocket über dem Umkreismittelpunkt
+      C = K1 + (|u|^2 (v x n) - |v|^2 (u x n)) / (2 |n|^2) des Dreiecks in der Höhe sqrt(4r^2 - |C - K1|^2) in
+      Richtung n (bzw. -n, falls n nach unten zeigt). Ist die Höhe nicht reell oder liegen die Kugeln auf einer
+      Geraden, ist keine Pocket möglich.
+    pocketPossibleAlt verlangt |P - K3|^2 > 0, um die Wurzel zu schützen. Berührt K3 die Kugeln K1 und K2 (P = K3),
+    entscheidet dort nur die Rundung; hier wird die Pocket bis zur Rundung -TOUCH_TOLERANCE * r^2 angenommen.
+
+    :param k1: np.array([x, y, z, r], dtype=float) - Kugel 1 mit x-, y- und z-Koordinate sowie Radius r
+    :param k2: np.array([x, y, z, r], dtype=float) - Kugel 2 mit x-, y- und z-Koordinate sowie Radius r
+    :param k3: np.array([x, y, z, r], dtype=float) - Kugel 3 mit x-, y- und z-Koordinate sowie Radius r
+    :return: bool, float, float, float, float - True, wenn Pocket möglich ist, sowie x-, y-, z-Koordinate und Radius
+        der Pocket
+    """
+    radius = k1[3]
+    rr = radius * radius
+    ux, uy, uz = k2[0] - k1[0], k2[1] - k1[1], k2[2] - k1[2] # K1 -> K2
+    vx, vy, vz = k3[0] - k1[0], k3[1] - k1[1], k3[2] - k1[2] # K1 -> K3
+    aa = ux * ux + uy * uy + uz * uz
+    if aa > 12 * rr: # h < radius
+        return False, 0., 0., 0., 0.
+    nx, ny, nz = uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx # Normalenvektor der Ebene
+    nn = nx * nx + ny * ny + nz * nz
+    if nn == 0: # Kugeln liegen auf einer Geraden
+        return False, 0., 0., 0., 0.
+    h = np.sqrt(4 * rr - aa / 4)
+    mx, my, mz = vx - ux / 2, vy - uy / 2, vz - uz / 2 # Mittelpunkt zwischen K1 und K2 -> K3
+    determinante = mx * mx + my * my + mz * mz + h * h - 2 * h * np.sqrt(nn / aa) # |P - K3|^2
+    if determinante < -TOUCH_TOLERANCE * rr or determinante > 4 * rr:
+        return False, 0., 0., 0., 0.
+    vv = vx * vx + vy * vy + vz * vz
+    cx = (aa * (vy * nz - vz * ny) - vv * (uy * nz - uz * ny)) / (2 * nn) # Umkreismittelpunkt - K1
+    cy = (aa * (vz * nx - vx * nz) - vv * (uz * nx - ux * nz)) / (2 * nn)
+    cz = (aa * (vx * ny - vy * nx) - vv * (ux * ny - uy * nx)) / (2 * nn)
+    hh = 4 * rr - (cx * cx + cy * cy + cz * cz) # Quadrat der Höhe über dem Umkreismittelpunkt
+    if hh < 0:
+        return False, 0., 0., 0., 0.
+    s = np.sqrt(hh / nn)
+    if nz < 0: # höhere der beiden Lösungen
+        s = -s
+    return True, k1[0] + cx + s * nx, k1[1] + cy + s * ny, k1[2] + cz + s * nz, radius
+
 @jit(nopython=True)
-def nextInNeighbors(neighbors):
+def periodicPocket(k1, k2, k3, period):
     """
-    Gibt Index für nächstes freies Feld zum Abspeichern einer Nachbarkugel.
+    Berechnet wie equalSizedPocket die Pocket aus 3 gleich großen Kugeln.
 
-    Alle freien Felder, die kein Nachbarindex enthalten sind mit dem Wert -1 initialisiert.
-    Die Methode gibt den Index des ersten freien Feldes (< 0) von neighbors zurück.
+    Bei periodischen Rändern werden statt der Kugeln 2 und 3 ihre Bilder verwendet, die Kugel 1 am nächsten liegen, und
+    der Mittelpunkt der Pocket wird in den Raum [0, x) x [0, y) verschoben (siehe periodic.py).
 
-    :param neighbors: np.array(self.maxNeighbors, dtype=int) - Feld aus Indizes von Nachbarn einer Kugel
-    :return: int - Index 1. Feld mit noch nicht belegter Nachbarkugel für Kugel i
+    :param k1: np.array([x, y, z, r], dtype=float) - Kugel 1
+    :param k2: np.array([x, y, z, r], dtype=float) - Kugel 2
+    :param k3: np.array([x, y, z, r], dtype=float) - Kugel 3
+    :param period: np.array(2, dtype=float) - Periode in x- und y-Richtung
+    :return: bool, float, float, float, float - wie equalSizedPocket
+    """
+    if period[0] == 0 and period[1] == 0:
+        return equalSizedPocket(k1, k2, k3)
+    possible, px, py, pz, r = equalSizedPocket(k1, nearestImage(k2, k1, period), nearestImage(k3, k1, period))
+    return possible, wrapCoordinate(px, period[0]), wrapCoordinate(py, period[1]), pz, r
+
+@jit(nopython=True)
+def overlapping(sphere, pocket, period):
     """
-    # nächsten freien Platz in Nachbarsliste finden für die Kugel i
-    for j in range(len(neighbors)):
-        if neighbors[j] < 0:  # alle nicht freien Werte sind durch Werte >= 0 belegt
-            return j
-    raise ValueError("kein freies Feld für weitere Nachbarkugel")
-    # return -1
+    Prüft, ob sich die Kugel sphere und die Pocket pocket überschneiden (wie in collectOverlaps mit Toleranz 0.0001).
+
+    :param sphere: np.array([x, y, z, r], dtype=float) - Kugel
+    :param pocket: np.array(4, dtype=float) - Pocket [x, y, z, r]
+    :param period: np.array(2, dtype=float) - Periode in x- und y-Richtung (siehe periodic.py)
+    :return: bool - True, wenn sich Kugel und Pocket überschneiden
+    """
+    d = np.sqrt(minimumImage(sphere[0] - pocket[0], period[0]) ** 2
+                + minimumImage(sphere[1] - pocket[1], period[1]) ** 2
+                + (sphere[2] - pocket[2]) ** 2) - (sphere[3] + pocket[3])
+    return d < -0.0001
+
+@jit(nopython=True)
+def enumerateTriples(nbCount, nbFirst, nbBlocks, nbBlockNext, n):
+    """
+    Aufzählen aller Dreierkombinationen (i, nb1, nb2) aus Kugel i und zwei ihrer entfernten Nachbarn mit nb1 > i und
+    nb2 > i für die Kugeln 0 bis n-1 in der Reihenfolge der seriellen Schleife aus initPocketList.
+
+    :param nbCount, nbFirst, nbBlocks, nbBlockNext: Nachbarliste (siehe neighborList.NeighborList)
+    :param n: int - Anzahl Kugeln
+    :return: np.array((t, 3), dtype=int) - Dreierkombinationen
+    """
+    count = 0
+    for i in range(n):
+        neighbors = gatherNeighbors(nbCount, nbFirst, nbBlocks, nbBlockNext, i)
+        m = np.sum(neighbors > i)
+        count += m * (m - 1) // 2
+    triples = np.empty((count, 3), dtype=np.int64)
+    t = 0
+    for i in range(n):
+        neighbors = gatherNeighbors(nbCount, nbFirst, nbBlocks, nbBlockNext, i)
+        last = len(neighbors)
+        for j in range(last):
+            for k in range(j + 1, last):
+                if neighbors[j] > i and neighbors[k] > i:
+                    triples[t, 0] = i
+                    triples[t, 1] = neighbors[j]
+                    triples[t, 2] = neighbors[k]
+                    t += 1
+    return triples
+
+@jit(nopython=True)
+def evaluateTriple(spheres, i1, i2, i3, pocket, cellHead, cellNext, cellOrigin, cellSize, cellDims, period, x, y, z,
+                   stored):
+    """
+    Berechnung der Pocket aus den Kugeln i1, i2 und i3 wie in initPocketList.
+
+    Es wird geprüft, ob eine Pocket möglich ist, ihre Position berechnet (periodicPocket), auf den Datentyp der
+    Pocketliste gerundet (roundPocket) und ihre Gültigkeit geprüft (pocketValid).
+
+    :param spheres: np.array((n, 4), dtype=float) - Kugelliste
+    :param i1, i2, i3: int - Indizes der Erzeugendenkugeln
+    :param pocket: np.array(4, dtype=float) - Ergebnis [x, y, z, r]
+    :param cellHead, cellNext, cellOrigin, cellSize, cellDims: Zellliste der Kugeln (siehe cellList.CellList)
+    :param period: np.array(2, dtype=float) - Periode in x- und y-Richtung (siehe periodic.py)
+    :param x: float - Raumgröße in x-Richtung
+    :param y: float - Raumgröße in y-Richtung
+    :param z: float - Raumgröße in z-Richtung
+    :param stored: np.array((m, 4), dtype=float64 oder float32) - Pocketliste
+    :return: bool - True, wenn die Pocket gültig ist
+    """
+    possible, px, py, pz, pr = periodicPocket(spheres[i1], spheres[i2], spheres[i3], period)
+    if not possible:
+        return False
+    pocket[0] = px
+    pocket[1] = py
+    pocket[2] = pz
+    pocket[3] = pr
+    roundPocket(pocket, stored)
+    if (pocket[0] < 0) or (pocket[0] > x) or (pocket[1] < 0) or (pocket[1] > y) or (pocket[2] < 0) or (pocket[2] > z):
+        return False
+    c = cellIndex(pocket, cellOrigin, cellSize, cellDims)
+    return not overlapsAny(pocket, spheres, cellHead, cellNext, c, cellDims, period, 0.0001)
+
+@jit(nopython=True, parallel=True)
+def evaluateTriples(spheres, triples, cellHead, cellNext, cellOrigin, cellSize, cellDims, period, x, y, z, stored):
+    """
+    Parallele Berechnung der Pockets aus den Dreierkombinationen triples (siehe evaluateTriple).
+
+    Jeder Durchlauf schreibt nur in seine eigene Zeile der Ergebnisfelder. Die Ergebnisse werden anschließend in der
+    Reihenfolge von triples zusammengeführt, sodass das Ergebnis unabhängig von der Anzahl Threads ist.
+
+    :param spheres: np.array((n, 4), dtype=float) - Kugelliste
+    :param triples: np.array((t, 3), dtype=int) - Dreierkombinationen aus Kugelindizes
+    :param cellHead, cellNext, cellOrigin, cellSize, cellDims: Zellliste der Kugeln (siehe cellList.CellList)
+    :param period: np.array(2, dtype=float) - Periode in x- und y-Richtung (siehe periodic.py)
+    :param x: float - Raumgröße in x-Richtung
+    :param y: float - Raumgröße in y-Richtung
+    :param z: float - Raumgröße in z-Richtung
+    :param stored: np.array((m, 4), dtype=float64 oder float32) - Pocketliste (siehe roundPocket)
+    :return: np.array((t, 4), dtype=float), np.array(t, dtype=bool) - Pockets [x, y, z, r] und ob die Pocket gültig
+        ist
+    """
+    t = len(triples)
+    pockets = np.full((t, 4), -1.)
+    valid = np.zeros(t, dtype=np.bool_)
+    for i in prange(t):
+        valid[i] = evaluateTriple(spheres, triples[i, 0], triples[i, 1], triples[i, 2], pockets[i], cellHead,
+                                  cellNext, cellOrigin, cellSize, cellDims, period, x, y, z, stored)
+    return pockets, valid
+
+# Statuswerte von depositionLoop
+LOOP_DONE = 0 # keine freien Pockets mehr vorhanden
+LOOP_GROW_SPHERES = 1 # Kugelliste voll
+LOOP_GROW_POCKETS = 2 # keine freie Zeile in der Pocketliste
+LOOP_GROW_HEAP = 3 # Prioritätswarteschlange voll
+LOOP_GROW_NEIGHBORS = 4 # Nachbarliste voll
+
+@jit(nopython=True)
+def heapLess(z1, seq1, z2, seq2):
+    """
+    Ordnung der Prioritätswarteschlange: nach der z-Koordinate, bei gleicher z-Koordinate nach der fortlaufenden
+    Nummer (entspricht dem Tupelvergleich von heapq).
+
+    :return: bool - True, wenn Eintrag 1 vor Eintrag 2 entnommen wird
+    """
+    return z1 < z2 or (z1 == z2 and seq1 < seq2)
+
+@jit(nopython=True)
+def heapPush(heapZ, heapSeq, heapRow, size, z, seq, row):
+    """
+    Einfügen eines Eintrags in die Prioritätswarteschlange (binärer Min-Heap).
+
+    :param heapZ: np.array(dtype=float) - z-Koordinaten der Einträge
+    :param heapSeq: np.array(dtype=int) - fortlaufende Nummern der Einträge
+    :param heapRow: np.array(dtype=int) - Zeilen der Pockets in der Pocketliste
+    :param size: int - aktuelle Anzahl Einträge
+    :param z: float - z-Koordinate der Pocket
+    :param seq: int - fortlaufende Nummer der Pocket
+    :param row: int - Zeile der Pocket in der Pocketliste
+    :return: int - neue Anzahl Einträge
+    """
+    i = size
+    while i > 0:
+        parent = (i - 1) // 2
+        if not heapLess(z, seq, heapZ[parent], heapSeq[parent]):
+            break
+        heapZ[i], heapSeq[i], heapRow[i] = heapZ[parent], heapSeq[parent], heapRow[parent]
+        i = parent
+    heapZ[i], heapSeq[i], heapRow[i] = z, seq, row
+    return size + 1
+
+@jit(nopython=True)
+def heapPop(heapZ, heapSeq, heapRow, size):
+    """
+    Entnahme des kleinsten Eintrags aus der Prioritätswarteschlange (binärer Min-Heap).
+
+    :param heapZ: np.array(dtype=float) - z-Koordinaten der Einträge
+    :param heapSeq: np.array(dtype=int) - fortlaufende Nummern der Einträge
+    :param heapRow: np.array(dtype=int) - Zeilen der Pockets in der Pocketliste
+    :param size: int - aktuelle Anzahl Einträge (> 0)
+    :return: float, int, int, int - z-Koordinate, fortlaufende Nummer und Zeile des entnommenen Eintrags, neue Anzahl
+        Einträge
+    """
+    z, seq, row = heapZ[0], heapSeq[0], heapRow[0]
+    size -= 1
+    lz, lseq, lrow = heapZ[size], heapSeq[size], heapRow[size]
+    i = 0
+    while True:
+        child = 2 * i + 1
+        if child >= size:
+            break
+        if child + 1 < size and heapLess(heapZ[child + 1], heapSeq[child + 1], heapZ[child], heapSeq[child]):
+            child += 1
+        if not heapLess(heapZ[child], heapSeq[child], lz, lseq):
+            break
+        heapZ[i], heapSeq[i], heapRow[i] = heapZ[child], heapSeq[child], heapRow[child]
+        i = child
+    if size > 0:
+        heapZ[i], heapSeq[i], heapRow[i] = lz, lseq, lrow
+    return z, seq, row, size
+
+@jit(nopython=True)
+def depositionLoop(spheres, pockets, pocketSpheres, rowSeq, freeRows, heapZ, heapSeq, heapRow, state, cellHead,
+                   cellNext, cellPrev, cellOf, cellOrigin, cellSize, cellDims, pHead, pNext, pPrev, pCellOf, pOrigin,
+                   pCellSize, pDims, nbCount, nbFirst, nbLast, nbBlocks, nbBlockNext, nbUsed, period, x, y, z, radius):
+    """
+    Kompilierte Platzierungsschleife einer EquallySizedPacking.
+
+    Entspricht der Schleife aus generatePacking mit nextPocket und updatePocketList im Modus 'heap': Die niedrigste
+    gültige Pocket wird entnommen, dort eine Kugel platziert, die Kugel in Zellliste und Nachbarliste eingetragen,
+    alle überschnittenen Pockets gelöscht und alle neuen Pockets aus der Kugel und ihren entfernten Nachbarn in die
+    Prioritätswarteschlange eingefügt.
+    Bevor eine Kugel platziert wird, wird geprüft, ob alle Felder groß genug sind. Sonst wird die entnommene Pocket
+    zurückgelegt und die Schleife mit dem entsprechenden Status beendet, sodass sie nach dem Vergrößern des Feldes
+    ohne Unterschied fortgesetzt werden kann.
+
+    :param spheres: np.array((n, 4), dtype=float) - Kugelliste
+    :param pockets: np.array((m, 4), dtype=float64 oder float32) - Pocketliste: Mittelpunkt und Radius
+    :param pocketSpheres: np.array((m, 3), dtype=int32) - Pocketliste: Indizes der Erzeugendenkugeln
+    :param rowSeq: np.array(m, dtype=int) - fortlaufende Nummer der Pocket je Zeile (-1: Zeile frei)
+    :param freeRows: np.array(m, dtype=int) - Stapel freigegebener Zeilen der Pocketliste
+    :param heapZ: np.array(dtype=float) - Prioritätswarteschlange: z-Koordinaten
+    :param heapSeq: np.array(dtype=int) - Prioritätswarteschlange: fortlaufende Nummern
+    :param heapRow: np.array(dtype=int) - Prioritätswarteschlange: Zeilen in der Pocketliste
+    :param state: np.array(7, dtype=int) - [countSpheres, usedRows, countFree, heapSize, pocketSeq, countPockets,
+        status]
+    :param cellHead, cellNext, cellPrev, cellOf, cellOrigin, cellSize, cellDims: Zellliste der Kugeln
+        (siehe cellList.CellList)
+    :param pHead, pNext, pPrev, pCellOf, pOrigin, pCellSize, pDims: Zellliste der Pockets
+    :param nbCount, nbFirst, nbLast, nbBlocks, nbBlockNext, nbUsed: Nachbarliste (siehe neighborList.NeighborList)
+    :param period: np.array(2, dtype=float) - Periode in x- und y-Richtung (siehe periodic.py)
+    :param x: float - Raumgröße in x-Richtung
+    :param y: float - Raumgröße in y-Richtung
+    :param z: float - Raumgröße in z-Richtung
+    :param radius: float - Kugelradius
+    :return: kein Rückgabewert (Status in state[6])
+    """
+    countSpheres, usedRows, countFree, heapSize, pocketSeq, countPockets = state[0], state[1], state[2], state[3], \
+        state[4], state[5]
+    blockSize = nbBlocks.shape[1]
+    buffer = np.empty(1024, dtype=np.int64)
+    temp = np.empty(4) # Position und Radius einer neuen Pocket
+    status = LOOP_DONE
+    while True:
+        # niedrigste gültige Pocket entnehmen
+        found = False
+        pocket = np.empty(4)
+        pz, pseq = 0., 0
+        row = -1
+        while heapSize > 0:
+            pz, pseq, row, heapSize = heapPop(heapZ, heapSeq, heapRow, heapSize)
+            if rowSeq[row] == pseq: # sonst wurde die Pocket bereits gelöscht
+                pocket[:] = pockets[row]
+                found = True
+                break
+        if not found:
+            status = LOOP_DONE
+            break
+
+        # Prüfen, ob alle Felder für die Platzierung groß genug sind
+        c = cellIndex(pocket, cellOrigin, cellSize, cellDims)
+        k = queryCells(cellHead, cellNext, c, cellDims, period, buffer) + 1 # max. Anzahl neuer Nachbarn
+        if k > len(buffer):
+            buffer = np.empty(2 * k, dtype=np.int64)
+        newPockets = k * (k - 1) // 2 # max. Anzahl neuer Pockets
+        if countSpheres >= len(spheres):
+            status = LOOP_GROW_SPHERES
+        elif nbUsed[0] + k + k // blockSize + 1 > nbBlocks.shape[0]:
+            status = LOOP_GROW_NEIGHBORS
+        elif countFree + 1 + (len(pockets) - usedRows) < newPockets:
+            status = LOOP_GROW_POCKETS
+        elif heapSize + newPockets > len(heapZ):
+            status = LOOP_GROW_HEAP
+        if status != LOOP_DONE:
+            # entnommene Pocket zurücklegen
+            heapSize = heapPush(heapZ, heapSeq, heapRow, heapSize, pz, pseq, row)
+            break
+
+        # entnommene Pocket löschen
+        removeCell(pHead, pNext, pPrev, pCellOf, row)
+        rowSeq[row] = -1
+        freeRows[countFree] = row
+        countFree += 1
+        countPockets -= 1
+
+        # Kugel platzieren
+        kugelId = countSpheres
+        spheres[kugelId] = pocket[:4]
+        countSpheres += 1
+
+        # überschneidende Pockets löschen
+        c = cellIndex(spheres[kugelId], pOrigin, pCellSize, pDims)
+        n = collectOverlaps(spheres[kugelId], pockets, pHead, pNext, c, pDims, period, 0.0001, buffer)
+        if n > len(buffer):
+            buffer = np.empty(2 * n, dtype=np.int64)
+            n = collectOverlaps(spheres[kugelId], pockets, pHead, pNext, c, pDims, period, 0.0001, buffer)
+        for r in np.sort(buffer[:n]):
+            removeCell(pHead, pNext, pPrev, pCellOf, r)
+            rowSeq[r] = -1
+            freeRows[countFree] = r
+            countFree += 1
+            countPockets -= 1
+
+        # Nachbarn der neuen Kugel bestimmen
+        c = cellIndex(spheres[kugelId], cellOrigin, cellSize, cellDims)
+        insertCell(cellHead, cellNext, cellPrev, cellOf, kugelId, c)
+        n = queryCells(cellHead, cellNext, c, cellDims, period, buffer)
+        indices = np.sort(buffer[:n])
+        for i in range(n):
+            potNei = indices[i]
+            if (imageDistance(spheres[kugelId], spheres[potNei], period) <= (4 * radius)) and (potNei != kugelId):
+                appendNeighbor(nbCount, nbFirst, nbLast, nbBlocks, nbBlockNext, nbUsed, kugelId, potNei)
+                appendNeighbor(nbCount, nbFirst, nbLast, nbBlocks, nbBlockNext, nbUsed, potNei, kugelId)
+
+        # neue Pockets aus Nachbarn der neuen Kugel berechnen
+        neighbors = gatherNeighbors(nbCount, nbFirst, nbBlocks, nbBlockNext, kugelId)
+        last = len(neighbors)
+        for i in range(last):
+            for j in range(i + 1, last):
+                nb1 = neighbors[i]
+                nb2 = neighbors[j]
+                possible, qx, qy, qz, qr = periodicPocket(spheres[kugelId], spheres[nb1], spheres[nb2], period)
+                if possible:
+                    temp[0], temp[1], temp[2], temp[3] = qx, qy, qz, qr
+                    roundPocket(temp, pockets)
+                    if (temp[0] < 0) or (temp[0] > x) or (temp[1] < 0) or (temp[1] > y) or (temp[2] < 0) \
+                            or (temp[2] > z):
+                        continue
+                    c = cellIndex(temp, cellOrigin, cellSize, cellDims)
+                    if overlapsAny(temp, spheres, cellHead, cellNext, c, cellDims, period, 0.0001):
+                        continue
+                    if np.isnan(temp[2]):
+                        continue
+                    if countFree > 0:
+                        countFree -= 1
+                        row = freeRows[countFree]
+                    else:
+                        row = usedRows
+                        usedRows += 1
+                    pockets[row] = temp
+                    pocketSpheres[row, 0] = kugelId
+                    pocketSpheres[row, 1] = nb1
+                    pocketSpheres[row, 2] = nb2
+                    rowSeq[row] = pocketSeq
+                    insertCell(pHead, pNext, pPrev, pCellOf, row, cellIndex(pockets[row], pOrigin, pCellSize, pDims))
+                    heapSize = heapPush(heapZ, heapSeq, heapRow, heapSize, pockets[row, 2], pocketSeq, row)
+                    pocketSeq += 1
+                    countPockets += 1
+    state[0], state[1], state[2], state[3], state[4], state[5], state[6] = countSpheres, usedRows, countFree, \
+        heapSize, pocketSeq, countPockets, status
 
 # @jit(nopython=True)
 # def sortPocketList(pockets, n, nmax):
@@ -7,6 +7,17 @@ from numba import jit # Just-In-Time-Compiler
 # eigene Module:
 from positioningExceptions import StraightException, OverlapException, SpacingException, UnknownError
 from specialCases import SpecialCase
+from periodic import nearestImage
+
+# Statuswerte der kompilierten Pocketberechnung calcPocketStatus (Werte aus SpecialCase)
+STATUS_DEFAULT = SpecialCase.DEFAULT.value
+STATUS_STRAIGHT = SpecialCase.STRAIGHT.value
+STATUS_DISTANCE = SpecialCase.DISTANCE.value
+STATUS_HEIGHT = SpecialCase.HEIGHT.value
+STATUS_NEWRADIUS = SpecialCase.NEWRADIUS.value
+STATUS_OVERLAPCALCPOC = SpecialCase.OVERLAPCALCPOC.value
+STATUS_NOROOT = SpecialCase.NOROOT.value
+STATUS_UNKNOWN = SpecialCase.UNKNOWN.value
 
 @jit(nopython=True)
 def heightTetraeder(p1, p2, p3, r4):
@@ -21,6 +32,24 @@ def heightTetraeder(p1, p2, p3, r4):
     :param r4: float - Radius der zu zu platzierenden 4. Kugel
     :return: Höhe des allgemeinen Tetraeders, der durch die Mittelpunkte der 4 Kugeln gebildet wird
     """
+    success, h = heightTetraederStatus(p1, p2, p3, r4)
+    if not success:
+        #raise SpacingException(r4)
+        raise SpacingException()
+    return h
+
+@jit(nopython=True)
+def heightTetraederStatus(p1, p2, p3, r4):
+    """
+    Berechnung der Höhe des allgemeinen Tetraeders wie heightTetraeder, aber ohne Exception.
+
+    :param p1: np.array([x, y, z, r], dtype=float) - Kugelposition und Radius Kugel 1
+    :param p2: np.array([x, y, z, r], dtype=float) - Kugelposition und Radius Kugel 2
+    :param p3: np.array([x, y, z, r], dtype=float) - Kugelposition und Radius Kugel 3
+    :param r4: float - Radius der zu zu platzierenden 4. Kugel
+    :return: Boolean, float - False, wenn die neue Kugel nicht alle 3 Kugeln gleichzeitig berühren kann, sonst True
+        und die Höhe des allgemeinen Tetraeders
+    """
     a = np.linalg.norm(p1[:3] - p2[:3])
     b = np.linalg.norm(p2[:3] - p3[:3])
     c = np.linalg.norm(p1[:3] - p3[:3])
@@ -38,15 +67,14 @@ def heightTetraeder(p1, p2, p3, r4):
     if determinante < 0:
         # negative Determinante abfangen
         # raise ValueError(f"neue Kugel kann nicht alle 3 Kugeln gleichzeitig berühren: ({determinante}, {f_a}, {f_b}, {f_c}, {delta})")
-        #raise SpacingException(r4)
-        raise SpacingException()
+        return False, 0.
     # Volumen
     V = 1 / 12 * np.sqrt(determinante)
     # Fläche Grundfläche
     A = 1 / 4 * np.sqrt((a + b + c) * (-a + b + c) * (a - b + c) * (a + b - c))
     # Höhe Tetraeder
     h = 3 * V / A
-    return h
+    return True, h
 
 @jit(nopython=True)
 def lineDistance(rv1, sv1, rv2, sv2, eps=1e-9):
@@ -64,11 +92,28 @@ def lineDistance(rv1, sv1, rv2, sv2, eps=1e-9):
     :param eps: float - Kriterium zum Überprüfen der Parallelität der beiden Geraden
     :return: float - Abstand zwischen g1 und g2
     """
+    d = lineDistanceStatus(rv1, sv1, rv2, sv2, eps)
+    if d < 0:  # Kreuzprodukt ist Nullvektor
+        # raise ValueError("Kreuzprodukt ist Nullvektor. Die beiden Geraden sind parallel.")
+        raise StraightException()
+    return d
+
+@jit(nopython=True)
+def lineDistanceStatus(rv1, sv1, rv2, sv2, eps=1e-9):
+    """
+    Berechnung des Abstands zwischen 2 Geraden im R^3 wie lineDistance, aber ohne Exception.
+
+    :param rv1: np.array([x, y, z], dtype=float) - Richtungsvektor Gerade 1
+    :param sv1: np.array([x, y, z], dtype=float) - Stützvektor Gerade 1
+    :param rv2: np.array([x, y, z], dtype=float) - Richtungsvektor Gerade 2
+    :param sv2: np.array([x, y, z], dtype=float) - Stützvektor Gerade 2
+    :param eps: float - Kriterium zum Überprüfen der Parallelität der beiden Geraden
+    :return: float - Abstand zwischen g1 und g2, -1 bei zwei parallelen Geraden
+    """
     u = np.cross(rv1, rv2)
     a = np.linalg.norm(u)
     if np.linalg.norm(u) < eps:  # Kreuzprodukt ist Nullvektor
-        # raise ValueError("Kreuzprodukt ist Nullvektor. Die beiden Geraden sind parallel.")
-        raise StraightException()
+        return -1.
     d = np.absolute(np.dot(sv1 - sv2, u)) / a
     return d
 
@@ -121,33 +166,53 @@ def calcSLines(p1, p2, p3, r4):
     :param r4: float - Radius der Kugel 4
     :return: Liste der drei Geraden aus Tupeln, die jeweils den Stütz- und den Richtungsvektor enthalten
     """
-    paare = [(p1, p2), (p2, p3), (p3, p1)]
-    n = np.cross(p1[:3] - p2[:3], p3[:3] - p2[:3])
+    success, s, v = calcSLinesStatus(p1, p2, p3, r4)
+    if not success:
+        raise SpacingException()
     geraden = []
+    for i in range(3):
+        geraden.append((s[i], v[i]))
+    return geraden
 
-    for paar in paare:
-        k1 = paar[0]
-        k2 = paar[1]
+@jit(nopython=True)
+def calcSLinesStatus(p1, p2, p3, r4):
+    """
+    Berechnung der Geraden durch S1 und H_s, S2 und H_s sowie S3 und H_s wie calcSLines, aber ohne Exception.
+
+    :param p1: np.array([x, y, z, r], dtype=float) - Kugelposition und Radius Kugel 1
+    :param p2: np.array([x, y, z, r], dtype=float) - Kugelposition und Radius Kugel 2
+    :param p3: np.array([x, y, z, r], dtype=float) - Kugelposition und Radius Kugel 3
+    :param r4: float - Radius der Kugel 4
+    :return: Boolean, np.array((3, 3), dtype=float), np.array((3, 3), dtype=float) - False, wenn der Abstand zwischen
+        2 Kugeln zu groß ist, sonst True, sowie Stütz- und Richtungsvektoren der drei Geraden (zeilenweise)
+    """
+    n = np.cross(p1[:3] - p2[:3], p3[:3] - p2[:3])
+    s = np.zeros((3, 3))
+    v = np.zeros((3, 3))
+
+    for i in range(3): # Paare (p1, p2), (p2, p3), (p3, p1)
+        if i == 0:
+            k1, k2 = p1, p2
+        elif i == 1:
+            k1, k2 = p2, p3
+        else:
+            k1, k2 = p3, p1
         d1 = np.linalg.norm(k2[:3] - k1[:3])
         d2 = k1[3] + r4
         d3 = k2[3] + r4
 
-        if d1 < 0 or d2 < 0 or d3 < 0:
-            print(d1, d2, d3)
-            print(p1, p2, p3, r4)
         alpha_quer = (np.power(d1, 2) + np.power(d2, 2) - np.power(d3, 2)) / (2 * d1 * d2)
         if np.abs(alpha_quer) > 1:
-            raise SpacingException()
+            return False, s, v
         alpha = np.arccos(np.abs(alpha_quer))
 
         ps = np.cos(alpha) * (k1[3] + r4)
         if alpha_quer > 0:
-            s = k1[:3] + (ps / np.linalg.norm(k2[:3] - k1[:3])) * (k2[:3] - k1[:3])
+            s[i] = k1[:3] + (ps / np.linalg.norm(k2[:3] - k1[:3])) * (k2[:3] - k1[:3])
         else:
-            s = k1[:3] - (ps / np.linalg.norm(k2[:3] - k1[:3])) * (k2[:3] - k1[:3])
-        v = np.cross(k2[:3] - k1[:3], n)
-        geraden.append((s, v))
-    return geraden
+            s[i] = k1[:3] - (ps / np.linalg.norm(k2[:3] - k1[:3])) * (k2[:3] - k1[:3])
+        v[i] = np.cross(k2[:3] - k1[:3], n)
+    return True, s, v
 
 @jit(nopython=True)
 def radikand(x, a, b, c, r1, r2, r3):
@@ -256,22 +321,44 @@ def calcPocket_v3(p1, p2, p3, r4, eps=1e-9):
     :return: Boolean, np.array([x, y, z, r], dtype=float) - True und Pocketposition und -radius, wenn Pocketberechnung
         erfolgreich, sonst False und Dummy Pocketposition und -radius.
     """
+    success, p4, status = calcPocketInPlane(p1, p2, p3, r4, eps)
+    if status == STATUS_STRAIGHT:
+        raise StraightException()
+    elif status == STATUS_UNKNOWN:
+        raise UnknownError('calcPocket')
+    return success, p4
+
+@jit(nopython=True)
+def calcPocketInPlane(p1, p2, p3, r4, eps=1e-9):
+    """
+    Berechnung Mittelpunkt Pocket aus p1, p2, p3 und r4 in der Ebene von p1, p2 und p3 wie calcPocket_v3, aber ohne
+    Exception.
+
+    :param p1: np.array([x, y, z, r], dtype=float) - Kugelposition und Radius Kugel 1
+    :param p2: np.array([x, y, z, r], dtype=float) - Kugelposition und Radius Kugel 2
+    :param p3: np.array([x, y, z, r], dtype=float) - Kugelposition und Radius Kugel 3
+    :param r4: float - Radius Kugel 4
+    :param eps: float - Kriterium zum Überprüfen der Parallelität der beiden Geraden
+    :return: Boolean, np.array([x, y, z, r], dtype=float), int - wie calcPocket_v3 sowie STATUS_DEFAULT,
+        STATUS_STRAIGHT (statt StraightException) oder STATUS_UNKNOWN (statt UnknownError)
+    """
     n = np.cross(p1[:3] - p2[:3], p3[:3] - p2[:3])
     if np.linalg.norm(n) < eps:  # Kreuzprodukt ist Nullvektor
-        raise StraightException()
-    try:
-        geraden = calcSLines(p1, p2, p3, r4)
-    except SpacingException:
-        return False, np.zeros(4)  # Dummy-Pocket zurückgeben
-    else: # Höhe Tetraeder h = 0
-        g1 = geraden[0]
-        g2 = geraden[1]
-        if lineDistance(g1[1], g1[0], g2[1], g2[0]) < 0.00001:
-            # Aufruf von lineDistance kann StraightException werfen
-            hs = calcIntersectionPoint(g1, g2)
-            p4 = np.concatenate([hs, np.array([r4])])
-            return True, p4
-    raise UnknownError('calcPocket')
+        return False, np.zeros(4), STATUS_STRAIGHT
+    success, s, v = calcSLinesStatus(p1, p2, p3, r4)
+    if not success:
+        return False, np.zeros(4), STATUS_DEFAULT  # Dummy-Pocket zurückgeben
+    # Höhe Tetraeder h = 0
+    d = lineDistanceStatus(v[0], s[0], v[1], s[1])
+    if d < 0:
+        return False, np.zeros(4), STATUS_STRAIGHT
+    if d < 0.00001:
+        hs = calcIntersectionPoint((s[0], v[0]), (s[1], v[1]))
+        p4 = np.zeros(4)
+        p4[:3] = hs
+        p4[3] = r4
+        return True, p4, STATUS_DEFAULT
+    return False, np.zeros(4), STATUS_UNKNOWN
 
 @jit(nopython=True)
 def a_pqformel(a, b, c, r1, r2, r3):
@@ -481,6 +568,306 @@ def calcPocket(p1, p2, p3, r4, pOverlap, methodOverlap='single'):
                 return True, p4, case
     raise UnknownError('calcPocket')
 
+# Spalten der radiusunabhängigen Invarianten einer Pocket (siehe calcInvariants)
+INV_NORMAL = 0 # Normalenvektor n = (p1 - p2) x (p3 - p2) der Ebene durch die Mittelpunkte (3 Spalten)
+INV_NORMAL_LENGTH = 3 # |n|
+INV_EDGES = 4 # Abstände a = |p1 - p2|, b = |p2 - p3|, c = |p1 - p3| (3 Spalten)
+INV_AREA = 7 # Fläche des Dreiecks aus den Mittelpunkten
+INV_V1 = 8 # Richtungsvektor der Geraden durch S1 und H_s (3 Spalten)
+INV_V2 = 11 # Richtungsvektor der Geraden durch S2 und H_s (3 Spalten)
+INV_U = 14 # Kreuzprodukt der beiden Richtungsvektoren (3 Spalten)
+INV_U_LENGTH = 17 # Länge des Kreuzprodukts
+INV_PQ = 18 # Ergebnis der pq-Formel: Erfolg (0 oder 1) und die beiden Nullstellen (3 Spalten)
+NUM_INVARIANTS = 21
+
+@jit(nopython=True)
+def calcInvariants(p1, p2, p3, inv):
+    """
+    Berechnung der Größen der Pocketberechnung, die nicht vom Radius der 4. Kugel abhängen.
+
+    Die Werte werden genauso berechnet wie in calcSLines, lineDistance, heightTetraeder und der pq-Formel von
+    calcPocket, sodass calcPocketCached dasselbe Ergebnis liefert wie calcPocket.
+
+    :param p1: np.array([x, y, z, r], dtype=float) - Kugelposition und Radius Kugel 1
+    :param p2: np.array([x, y, z, r], dtype=float) - Kugelposition und Radius Kugel 2
+    :param p3: np.array([x, y, z, r], dtype=float) - Kugelposition und Radius Kugel 3
+    :param inv: np.array(NUM_INVARIANTS, dtype=float) - Ergebnis (Spalten siehe INV_*)
+    :return: kein Rückgabewert
+    """
+    n = np.cross(p1[:3] - p2[:3], p3[:3] - p2[:3])
+    inv[INV_NORMAL:INV_NORMAL + 3] = n
+    inv[INV_NORMAL_LENGTH] = np.sqrt(np.dot(n, n)) # wie np.linalg.norm in calcPocket
+    a = np.linalg.norm(p1[:3] - p2[:3])
+    b = np.linalg.norm(p2[:3] - p3[:3])
+    c = np.linalg.norm(p1[:3] - p3[:3])
+    inv[INV_EDGES] = a
+    inv[INV_EDGES + 1] = b
+    inv[INV_EDGES + 2] = c
+    inv[INV_AREA] = 1 / 4 * np.sqrt((a + b + c) * (-a + b + c) * (a - b + c) * (a + b - c))
+    v1 = np.cross(p2[:3] - p1[:3], n)
+    v2 = np.cross(p3[:3] - p2[:3], n)
+    inv[INV_V1:INV_V1 + 3] = v1
+    inv[INV_V2:INV_V2 + 3] = v2
+    u = np.cross(v1, v2)
+    inv[INV_U:INV_U + 3] = u
+    inv[INV_U_LENGTH] = np.linalg.norm(u)
+    # pq-Formel (schlecht konditioniert --> Abstände wie np.linalg.norm in calcPocket berechnen)
+    success, x1, x2 = pqformel(np.sqrt(np.dot(p1[:3] - p2[:3], p1[:3] - p2[:3])),
+                               np.sqrt(np.dot(p2[:3] - p3[:3], p2[:3] - p3[:3])),
+                               np.sqrt(np.dot(p1[:3] - p3[:3], p1[:3] - p3[:3])), p1[3], p2[3], p3[3])
+    inv[INV_PQ] = 1. if success else 0.
+    inv[INV_PQ + 1] = x1
+    inv[INV_PQ + 2] = x2
+
+@jit(nopython=True)
+def calcInvariantsRows(spheres, pockets, period, inv):
+    """
+    Berechnung der Invarianten (siehe calcInvariants) für alle Pockets.
+
+    Bei periodischen Rändern werden die Erzeugendenkugeln 2 und 3 durch ihr Bild ersetzt, das Kugel 1 am nächsten
+    liegt (siehe periodic.py).
+
+    :param spheres: np.array((n, 4), dtype=float) - Kugelliste
+    :param pockets: np.array((m, 3), dtype=int) - Indizes der Erzeugendenkugeln je Pocket
+    :param period: np.array(2, dtype=float) - Periode in x- und y-Richtung (0: nicht periodisch)
+    :param inv: np.array((m, NUM_INVARIANTS), dtype=float) - Ergebnis
+    :return: kein Rückgabewert
+    """
+    periodic = period[0] > 0 or period[1] > 0
+    for k in range(len(pockets)):
+        p1 = spheres[pockets[k, 0]]
+        p2 = spheres[pockets[k, 1]]
+        p3 = spheres[pockets[k, 2]]
+        if periodic:
+            p2 = nearestImage(p2, p1, period)
+            p3 = nearestImage(p3, p1, period)
+        calcInvariants(p1, p2, p3, inv[k])
+
+@jit(nopython=True)
+def intersectSLines(p1, p2, p3, r4, inv):
+    """
+    Schnittpunkt H_s der Geraden durch S1 und H_s sowie S2 und H_s (wie calcSLines, lineDistance und
+    calcIntersectionPoint) mit den gespeicherten Invarianten.
+
+    :param p1: np.array([x, y, z, r], dtype=float) - Kugelposition und Radius Kugel 1
+    :param p2: np.array([x, y, z, r], dtype=float) - Kugelposition und Radius Kugel 2
+    :param p3: np.array([x, y, z, r], dtype=float) - Kugelposition und Radius Kugel 3
+    :param r4: float - Radius Kugel 4
+    :param inv: np.array(NUM_INVARIANTS, dtype=float) - Invarianten der Pocket
+    :return: int, np.array(3, dtype=float) - 0: Schnittpunkt berechnet, 1: Abstand zwischen 2 Kugeln zu groß,
+        2: Geraden parallel, 3: Geraden schneiden sich nicht; sowie der Schnittpunkt
+    """
+    s = np.zeros((2, 3))
+    for i in range(2): # Paare (p1, p2), (p2, p3)
+        if i == 0:
+            k1, k2 = p1, p2
+        else:
+            k1, k2 = p2, p3
+        d1 = inv[INV_EDGES + i]
+        d2 = k1[3] + r4
+        d3 = k2[3] + r4
+        alpha_quer = (np.power(d1, 2) + np.power(d2, 2) - np.power(d3, 2)) / (2 * d1 * d2)
+        if np.abs(alpha_quer) > 1:
+            return 1, s[0]
+        alpha = np.arccos(np.abs(alpha_quer))
+        ps = np.cos(alpha) * (k1[3] + r4)
+        if alpha_quer > 0:
+            s[i] = k1[:3] + (ps / d1) * (k2[:3] - k1[:3])
+        else:
+            s[i] = k1[:3] - (ps / d1) * (k2[:3] - k1[:3])
+    # 3. Gerade (p3, p1) wie in calcSLines (nur Abbruchkriterium)
+    d1 = inv[INV_EDGES + 2]
+    d2 = p3[3] + r4
+    d3 = p1[3] + r4
+    if np.abs((np.power(d1, 2) + np.power(d2, 2) - np.power(d3, 2)) / (2 * d1 * d2)) > 1:
+        return 1, s[0]
+    if inv[INV_U_LENGTH] < 1e-9: # Kreuzprodukt ist Nullvektor
+        return 2, s[0]
+    d = np.absolute(np.dot(s[0] - s[1], inv[INV_U:INV_U + 3])) / inv[INV_U_LENGTH]
+    if d >= 0.00001:
+        return 3, s[0]
+    hs = calcIntersectionPoint((s[0], inv[INV_V1:INV_V1 + 3]), (s[1], inv[INV_V2:INV_V2 + 3]))
+    return 0, hs
+
+@jit(nopython=True)
+def calcPocketCached(p1, p2, p3, r4, pOverlap, methodOverlap, inv):
+    """
+    Berechnung Mittelpunkt Pocket wie calcPocketStatus mit den gespeicherten Invarianten der Pocket (siehe
+    calcInvariants). Es wird nur noch die vom Radius r4 abhängige Rechnung ausgeführt.
+
+    :param p1: np.array([x, y, z, r], dtype=float) - Kugelposition und Radius Kugel 1
+    :param p2: np.array([x, y, z, r], dtype=float) - Kugelposition und Radius Kugel 2
+    :param p3: np.array([x, y, z, r], dtype=float) - Kugelposition und Radius Kugel 3
+    :param r4: float - Radius Kugel 4
+    :param pOverlap: float - maximal erlaubter relativer Überlapp
+    :param methodOverlap: string - Methode, wie der Überlapp berechnet wird ('single' oder 'average')
+    :param inv: np.array(NUM_INVARIANTS, dtype=float) - Invarianten der Pocket
+    :return: Boolean, np.array([x, y, z, r], dtype=float), int - wie calcPocketStatus
+    """
+    code, hs = intersectSLines(p1, p2, p3, r4, inv)
+    if code == 1:
+        return False, np.zeros(4), STATUS_DISTANCE  # Dummy-Pocket zurückgeben
+    elif code == 2:
+        return False, np.zeros(4), STATUS_STRAIGHT
+    elif code == 3:
+        return False, np.zeros(4), STATUS_UNKNOWN
+
+    # Höhe Tetraeder (wie heightTetraeder)
+    a = inv[INV_EDGES]
+    b = inv[INV_EDGES + 1]
+    c = inv[INV_EDGES + 2]
+    aHat = p3[3] + r4
+    bHat = p1[3] + r4
+    cHat = p2[3] + r4
+    f_a = np.power(b, 2) + np.power(bHat, 2) + np.power(c, 2) + np.power(cHat, 2) - np.power(a, 2) - np.power(aHat, 2)
+    f_b = np.power(a, 2) + np.power(aHat, 2) + np.power(c, 2) + np.power(cHat, 2) - np.power(b, 2) - np.power(bHat, 2)
+    f_c = np.power(a, 2) + np.power(aHat, 2) + np.power(b, 2) + np.power(bHat, 2) - np.power(c, 2) - np.power(cHat, 2)
+    delta = np.power(a, 2) * np.power(b, 2) * np.power(c, 2) + np.power(a, 2) * np.power(bHat, 2) * np.power(cHat, 2) \
+            + np.power(aHat, 2) * np.power(b, 2) * np.power(cHat, 2) \
+            + np.power(aHat, 2) * np.power(bHat, 2) * np.power(c, 2)
+    determinante = np.power(a, 2) * np.power(aHat, 2) * f_a + np.power(b, 2) * np.power(bHat, 2) * f_b \
+                   + np.power(c, 2) * np.power(cHat, 2) * f_c - delta
+    if determinante >= 0:
+        h = 3 * (1 / 12 * np.sqrt(determinante)) / inv[INV_AREA]
+        n = inv[INV_NORMAL:INV_NORMAL + 3]
+        p41 = hs + (h / inv[INV_NORMAL_LENGTH]) * n
+        p42 = hs - (h / inv[INV_NORMAL_LENGTH]) * n
+        p4 = np.zeros(4)
+        if p41[2] >= p42[2]:
+            p4[:3] = p41
+        else:
+            p4[:3] = p42
+        p4[3] = r4
+        return True, p4, STATUS_DEFAULT
+
+    # überlappende Position über die Nullstellen des Radikanden (pq-Formel)
+    x1 = inv[INV_PQ + 1]
+    x2 = inv[INV_PQ + 2]
+    if inv[INV_PQ] == 0.:
+        return False, np.zeros(4), STATUS_NOROOT
+    elif ((x1 <= 0 or x1 > r4) and (x2 <= 0 or x2 > r4)):
+        return False, np.zeros(4), STATUS_HEIGHT
+    elif (x1 > 0 and x1 <= r4) and (x2 > 0 and x2 <= r4):
+        if x1 >= x2:
+            res = x1
+        else:
+            res = x2
+    elif x1 > 0 and x1 <= r4:
+        res = x1
+    else: # x2 > 0 and x2 <= r4
+        res = x2
+    # Kugelposition mit r_neu mit h=0 berechnen (wie calcPocketInPlane)
+    if inv[INV_NORMAL_LENGTH] < 1e-9: # Kreuzprodukt ist Nullvektor
+        return False, np.zeros(4), STATUS_STRAIGHT
+    code, hs = intersectSLines(p1, p2, p3, res, inv)
+    if code == 1:
+        return False, np.zeros(4), STATUS_NEWRADIUS
+    elif code == 2:
+        return False, np.zeros(4), STATUS_STRAIGHT
+    elif code == 3:
+        return False, np.zeros(4), STATUS_UNKNOWN
+    p4 = np.zeros(4)
+    p4[:3] = hs
+    p4[3] = res
+    if methodOverlap == 'average':
+        relOverlap = absoluteOverlap(p4[:3], r4, p1, p2, p3) / \
+                     (sphereVolume(p1[3]) + sphereVolume(p2[3]) + sphereVolume(p3[3]))
+        if relOverlap > pOverlap:
+            return False, np.zeros(4), STATUS_OVERLAPCALCPOC
+    else: # methodOverlap == 'single'
+        for k in (p1, p2, p3):
+            ovl = calcOverlap(k, p4)
+            if ovl / sphereVolume(k[3]) > pOverlap or ovl / sphereVolume(r4) > pOverlap:
+                return False, np.zeros(4), STATUS_OVERLAPCALCPOC
+    p4[3] = r4
+    return True, p4, STATUS_NEWRADIUS
+
+@jit(nopython=True)
+def calcPocketStatus(p1, p2, p3, r4, pOverlap, methodOverlap='single'):
+    """
+    Berechnung Mittelpunkt Pocket wie calcPocket, aber kompiliert und ohne Exceptions.
+
+    Statt einer Exception und eines SpecialCase wird ein Statuswert (Wert eines SpecialCase) zurückgegeben:
+        STATUS_DEFAULT: Normalfall
+        STATUS_STRAIGHT: p1, p2 und p3 liegen auf einer Geraden (StraightException)
+        STATUS_DISTANCE: Abstand zwischen 2 Kugeln zu groß
+        STATUS_HEIGHT: Höhe des Tetraeders kann nicht berechnet werden, pq-Formel liefert keinen passenden Radius
+        STATUS_NEWRADIUS: Position mit neuem Radius aus der pq-Formel berechnet
+        STATUS_OVERLAPCALCPOC: max. erlaubte Überlappung überschritten (OverlapException)
+        STATUS_NOROOT: pq-Formel liefert keine Nullstelle (SpacingException)
+        STATUS_UNKNOWN: unbekannter Fehler (UnknownError)
+
+    Die Berechnung erfolgt über die Invarianten der Pocket (siehe calcInvariants und calcPocketCached).
+
+    :param p1: np.array([x, y, z, r], dtype=float) - Kugelposition und Radius Kugel 1
+    :param p2: np.array([x, y, z, r], dtype=float) - Kugelposition und Radius Kugel 2
+    :param p3: np.array([x, y, z, r], dtype=float) - Kugelposition und Radius Kugel 3
+    :param r4: float - Radius Kugel 4
+    :param pOverlap: float - maximal erlaubter relativer Überlapp
+    :param methodOverlap: string - Methode, wie der Überlapp berechnet wird ('single' oder 'average')
+    :return: Boolean, np.array([x, y, z, r], dtype=float), int - True und Pocketposition und -radius, wenn
+        Pocketberechnung erfolgreich, sonst False und Dummy Pocketposition und -radius, sowie der Statuswert
+    """
+    inv = np.empty(NUM_INVARIANTS)
+    calcInvariants(p1, p2, p3, inv)
+    return calcPocketCached(p1, p2, p3, r4, pOverlap, methodOverlap, inv)
+
+def calcPocketBatch(p1, p2, p3, r4, pOverlap, methodOverlap='single', invariants=None):
+    """
+    Berechnung der Pockets vieler Dreierkombinationen auf einmal mit calcPocketCached.
+
+    Zeile k der Ergebnisse gehört zu den Kugeln p1[k], p2[k], p3[k] und dem Radius r4 bzw. r4[k]. Die Ergebnisse sind
+    identisch mit einzelnen Aufrufen von calcPocketStatus.
+
+    :param p1: np.array((N, 4), dtype=float) - Kugelposition und Radius Kugel 1 je Dreierkombination
+    :param p2: np.array((N, 4), dtype=float) - Kugelposition und Radius Kugel 2 je Dreierkombination
+    :param p3: np.array((N, 4), dtype=float) - Kugelposition und Radius Kugel 3 je Dreierkombination
+    :param r4: float oder np.array(N, dtype=float) - Radius Kugel 4 (für alle oder je Dreierkombination)
+    :param pOverlap: float - maximal erlaubter relativer Überlapp
+    :param methodOverlap: string - Methode, wie der Überlapp berechnet wird ('single' oder 'average')
+    :param invariants: np.array((N, NUM_INVARIANTS), dtype=float) - gespeicherte Invarianten je Dreierkombination
+        (None: werden berechnet)
+    :return: np.array(N, dtype=bool), np.array((N, 4), dtype=float), np.array(N, dtype=int8) - Erfolg, Pocketposition
+        und -radius sowie Statuswert je Dreierkombination
+    """
+    p1 = np.ascontiguousarray(p1, dtype=float)
+    p2 = np.ascontiguousarray(p2, dtype=float)
+    p3 = np.ascontiguousarray(p3, dtype=float)
+    r4 = np.ascontiguousarray(np.broadcast_to(np.asarray(r4, dtype=float), (len(p1),)))
+    if invariants is None:
+        invariants = np.empty((len(p1), NUM_INVARIANTS))
+        for k in range(len(p1)):
+            calcInvariants(p1[k], p2[k], p3[k], invariants[k])
+    success = np.zeros(len(p1), dtype=np.bool_)
+    pockets = np.zeros((len(p1), 4))
+    status = np.zeros(len(p1), dtype=np.int8)
+    calcPocketRows(p1, p2, p3, r4, pOverlap, methodOverlap, np.ascontiguousarray(invariants), success, pockets,
+                   status)
+    return success, pockets, status
+
+@jit(nopython=True)
+def calcPocketRows(p1, p2, p3, r4, pOverlap, methodOverlap, invariants, success, pockets, status):
+    """
+    Kompilierte Schleife von calcPocketBatch: calcPocketCached für jede Zeile.
+
+    :param p1: np.array((N, 4), dtype=float) - Kugelposition und Radius Kugel 1 je Dreierkombination
+    :param p2: np.array((N, 4), dtype=float) - Kugelposition und Radius Kugel 2 je Dreierkombination
+    :param p3: np.array((N, 4), dtype=float) - Kugelposition und Radius Kugel 3 je Dreierkombination
+    :param r4: np.array(N, dtype=float) - Radius Kugel 4 je Dreierkombination
+    :param pOverlap: float - maximal erlaubter relativer Überlapp
+    :param methodOverlap: string - Methode, wie der Überlapp berechnet wird ('single' oder 'average')
+    :param invariants: np.array((N, NUM_INVARIANTS), dtype=float) - Invarianten je Dreierkombination
+    :param success: np.array(N, dtype=bool) - Ergebnis: Erfolg je Dreierkombination
+    :param pockets: np.array((N, 4), dtype=float) - Ergebnis: Pocketposition und -radius je Dreierkombination
+    :param status: np.array(N, dtype=int8) - Ergebnis: Statuswert je Dreierkombination
+    :return: kein Rückgabewert
+    """
+    for k in range(len(p1)):
+        ok, p4, st = calcPocketCached(p1[k], p2[k], p3[k], r4[k], pOverlap, methodOverlap, invariants[k])
+        success[k] = ok
+        pockets[k] = p4
+        status[k] = st
+
 def calcPocket_optOverlap(p1, p2, p3, r4, pOverlap, methodOverlap):
     """
     Berechnung Mittelpunkt Pocket als berührende bzw. überlappende Position aus p1, p2, p3 und r4, falls möglich.
@@ -6,6 +6,7 @@
 Klasse zum Erzeugen einer Kugelpackung aus Kugeln gleicher oder unterschiedlicher Größe
 """
 
+import sys
 import time
 
 # Importieren eigener Module
@@ -13,9 +14,18 @@ from equallySizedPacking import *
 from equallySizedInput import *
 from variableSizedPacking import *
 from variableSizedInput import *
+from decomposedPacking import DecomposedPacking
 
 class Generator:
-    def __init__(self):
+    def __init__(self, snapshot=None):
+        """
+        Erzeugen der Kugelpackungen aus den Eingabedaten oder Fortsetzen einer abgebrochenen Kugelpackung.
+
+        :param snapshot: string - Dateiname eines Snapshots (None: neue Kugelpackungen erzeugen)
+        """
+        if snapshot is not None:
+            self.resumeVariableSizedPacking(snapshot)
+            return
         eingabe = "../resources/Eingabedaten.txt"
         #self.inp = EquallySizedInput(eingabe)
         self.inp = VariableSizedInput(eingabe)
@@ -38,23 +48,47 @@ class Generator:
             self.kupa.generatePacking()
             print(f"Kugelpackung Testcase {i+1} von {self.inp._n} erzeugt.")
 
-    def generateVariableSizedPacking(self):
+    def generateVariableSizedPacking(self, first=0):
         """
         Kugelpackung aus Kugeln unterschiedlicher Größe wird erzeugt.
 
+        :param first: int - Anzahl bereits erzeugter Testcases, die übersprungen werden
         :return:
         """
         print("Erzeuge Kugelpackung")
-        for i in range(self.inp._n):  # insgesamt werden inp._n Kugelpackungen erzeugt
+        for i in range(first, self.inp._n):  # insgesamt werden inp._n Kugelpackungen erzeugt
             self.inp.setSuffix(i + 1)
-            self.kupa = VariableSizedPacking(self.inp)
+            if self.inp._tiles != (1, 1): # zerlegte Kugelpackung, Kacheln in eigenen Prozessen
+                self.kupa = DecomposedPacking(self.inp)
+            else:
+                self.kupa = VariableSizedPacking(self.inp)
             start = time.time()
             self.kupa.generatePacking()
             print("benötigte Zeit:", time.time() - start)
             print(f"Kugelpackung Testcase {i + 1} von {self.inp._n} erzeugt.")
 
+    def resumeVariableSizedPacking(self, snapshot):
+        """
+        Kugelpackung aus Kugeln unterschiedlicher Größe wird ab ihrem letzten Snapshot (siehe Snapshotintervall in den
+        Eingabedaten) fortgesetzt, das Ergebnis ist identisch mit der Kugelpackung ohne Abbruch. Danach werden die
+        übrigen Testcases mit den im Snapshot gespeicherten Eingabedaten erzeugt, wie ohne Abbruch.
+
+        :param snapshot: string - Dateiname des Snapshots
+        :return:
+        """
+        print("Setze Kugelpackung fort:", snapshot)
+        self.kupa = readSnapshot(snapshot)
+        self.inp = self.kupa.input
+        start = time.time()
+        self.kupa.continuePacking()
+        print("benötigte Zeit:", time.time() - start)
+        print(f"Kugelpackung Testcase {self.inp._testcase} von {self.inp._n} mit {self.kupa.countSpheres} Kugeln "
+              f"erzeugt.")
+        self.generateVariableSizedPacking(self.inp._testcase)
+
 def main():
-    gen = Generator()
+    # optionales Argument: Snapshot einer abgebrochenen Kugelpackung, die fortgesetzt wird
+    gen = Generator(sys.argv[1] if len(sys.argv) > 1 else None)
     #gen.generateEquallySizedPacking()
     #gen.generateVariableSizedPacking()
 
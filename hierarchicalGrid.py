@@ -0,0 +1,202 @@
+"""
+Hierarchisches Gitter zur Nachbarsuche in einer Kugelpackung mit unterschiedlich großen Kugeln.
+
+Die Kugeln werden nach ihrem Radius in Klassen (Ebenen) eingeteilt: Ebene l enthält die Kugeln mit einem Radius im
+Intervall (maxRadius / 2^(l+1), maxRadius / 2^l], die unterste Ebene zusätzlich alle kleineren Kugeln. Jede Ebene ist
+ein uniformes Gitter (wie cellList.CellList) mit der Kantenlänge 2 * maxRadius / 2^l. Die verketteten Listen aller
+Ebenen liegen in gemeinsamen Feldern: self.head enthält die Zellen aller Ebenen hintereinander (Ebene l ab
+self.offset[l]), self.next, self.prev und self.cellOf je Element (alle int32).
+
+Alle Kugeln, die eine Kugel mit Radius r am Punkt p berühren können, liegen in Ebene l in den Zellen des Quaders um p
+mit der halben Kantenlänge r + self.radius[l] (größter Radius der Ebene). Kleine Kugeln werden so in feinen, große
+Kugeln in groben Zellen gesucht. Die Anzahl durchsuchter Kugeln je gefundener Kugel hängt damit nicht vom Verhältnis
+zwischen größtem und kleinstem Radius ab, anders als bei einem einheitlichen Gitter, dessen Kantenlänge sich nach dem
+größten Suchradius richten muss.
+
+In periodischen Richtungen (siehe periodic.py) wird die Suche für die um -1, 0 und +1 Perioden verschobenen Bilder des
+Suchpunktes wiederholt, deren Suchquader den Raum schneidet. Die Periode muss mindestens doppelt so groß sein wie die
+halbe Kantenlänge jedes Suchquaders, damit keine Kugel unter zwei Verschiebungen gefunden wird.
+"""
+
+import numpy as np
+from numba import jit # Just-In-Time-Compiler
+
+from cellList import insertCell, removeCell
+from periodic import imageShifts
+
+class HierarchicalGrid:
+    def __init__(self, x, y, z, minRadius, maxRadius, capacity, period=None):
+        """
+        Konstruktor eines hierarchischen Gitters für den Raum [0, x] x [0, y] x [0, z].
+
+        Punkte außerhalb des Raumes werden der nächstgelegenen Randzelle ihrer Ebene zugeordnet.
+
+        :param x: float - Raumgröße in x-Richtung
+        :param y: float - Raumgröße in y-Richtung
+        :param z: float - Raumgröße in z-Richtung
+        :param minRadius: float - minimaler Radius (bestimmt die Anzahl Ebenen)
+        :param maxRadius: float - maximaler Radius
+        :param capacity: int - max. Anzahl Elemente (größter Index + 1)
+        :param period: np.array(2, dtype=float) - Periode in x- und y-Richtung (None oder 0: nicht periodisch)
+        """
+        self.period = np.zeros(2) if period is None else np.asarray(period, dtype=float)
+        numOfLevels = 1
+        if 0 < minRadius < maxRadius:
+            numOfLevels = int(np.floor(np.log2(maxRadius / minRadius))) + 1
+        self.radius = maxRadius / 2. ** np.arange(numOfLevels) # größter Radius je Ebene
+        self.cellSize = 2 * self.radius # Kantenlänge der Zellen je Ebene
+        extent = np.array([x, y, z], dtype=float)
+        self.dims = np.maximum(np.ceil(extent / self.cellSize[:, None]), 1).astype(np.int64) # Zellen je Ebene/Richtung
+        self.offset = np.concatenate([[0], np.cumsum(np.prod(self.dims, axis=1))]).astype(np.int64)
+        self.head = np.full(self.offset[-1], -1, dtype=np.int32)
+        self.next = np.full(capacity, -1, dtype=np.int32)
+        self.prev = np.full(capacity, -1, dtype=np.int32)
+        self.cellOf = np.full(capacity, -1, dtype=np.int32) # Zelle jedes Elements (-1: nicht eingetragen)
+        self._buffer = np.empty(64, dtype=np.int64) # Puffer für Suchergebnisse
+
+    def insert(self, i, sphere):
+        """
+        Eintragen der Kugel mit Index i.
+
+        :param i: int - Index der Kugel
+        :param sphere: np.array([x, y, z, r], dtype=float) - Kugel
+        :return: kein Rückgabewert
+        """
+        insertGrid(self.head, self.next, self.prev, self.cellOf, self.offset, self.dims, self.cellSize, self.radius, i,
+                   sphere)
+
+    def remove(self, i):
+        """
+        Entfernen der Kugel mit Index i.
+
+        :param i: int - Index der Kugel
+        :return: kein Rückgabewert
+        """
+        removeCell(self.head, self.next, self.prev, self.cellOf, i)
+
+    def grow(self, capacity):
+        """
+        Vergrößern der max. Anzahl Elemente auf capacity.
+
+        :param capacity: int - neue max. Anzahl Elemente
+        :return: kein Rückgabewert
+        """
+        n = capacity - len(self.next)
+        if n <= 0:
+            return
+        self.next = np.concatenate([self.next, np.full(n, -1, dtype=np.int32)])
+        self.prev = np.concatenate([self.prev, np.full(n, -1, dtype=np.int32)])
+        self.cellOf = np.concatenate([self.cellOf, np.full(n, -1, dtype=np.int32)])
+
+    def neighbors(self, spheres, point, reach):
+        """
+        Alle eingetragenen Kugeln j, deren Mittelpunkt in jeder Richtung einen Abstand kleiner reach + r_j zu point hat.
+
+        Mit reach = r ist das eine Obermenge aller Kugeln, die eine Kugel mit Radius r am Punkt point berühren. In
+        periodischen Richtungen wird der Abstand zum nächstgelegenen Bild gemessen.
+
+        :param spheres: np.array((n, 4), dtype=float) - Kugelliste
+        :param point: np.array([x, y, z, ...], dtype=float) - Position, um die gesucht wird
+        :param reach: float - Suchradius
+        :return: np.array(dtype=int) - Indizes der Kugeln (aufsteigend sortiert)
+        """
+        n = collectNeighbors(spheres, self.head, self.next, self.offset, self.dims, self.cellSize, self.radius, point,
+                             reach, self.period, self._buffer)
+        if n > len(self._buffer): # Puffer zu klein --> vergrößern und erneut suchen
+            self._buffer = np.empty(2 * n, dtype=np.int64)
+            n = collectNeighbors(spheres, self.head, self.next, self.offset, self.dims, self.cellSize, self.radius,
+                                 point, reach, self.period, self._buffer)
+        return np.sort(self._buffer[:n])
+
+@jit(nopython=True)
+def gridLevel(radius, levelRadius):
+    """
+    Ebene, in die eine Kugel mit Radius radius eingetragen wird.
+
+    :param radius: float - Radius der Kugel
+    :param levelRadius: np.array(dtype=float) - größter Radius je Ebene
+    :return: int - Ebene
+    """
+    l = 0
+    while l + 1 < len(levelRadius) and radius <= levelRadius[l + 1]:
+        l += 1
+    return l
+
+@jit(nopython=True)
+def gridCoord(v, l, d, dims, cellSize):
+    """
+    Zellkoordinate der Koordinate v in Richtung d und Ebene l (außerhalb des Raumes: nächstgelegene Randzelle).
+
+    :param v: float - Koordinate
+    :param l: int - Ebene
+    :param d: int - Richtung (0: x, 1: y, 2: z)
+    :param dims: np.array((L, 3), dtype=int) - Anzahl Zellen je Ebene und Richtung
+    :param cellSize: np.array(L, dtype=float) - Kantenlänge der Zellen je Ebene
+    :return: int - Zellkoordinate
+    """
+    return min(max(int(np.floor(v / cellSize[l])), 0), dims[l, d] - 1)
+
+@jit(nopython=True)
+def insertGrid(head, next, prev, cellOf, offset, dims, cellSize, levelRadius, i, sphere):
+    """
+    Eintragen der Kugel i in die Zelle ihrer Ebene.
+
+    Ist die Kugel größer als der größte Radius der obersten Ebene, wird dieser vergrößert, damit die Suche sie findet.
+
+    :param head, next, prev, cellOf, offset, dims, cellSize: hierarchisches Gitter (siehe HierarchicalGrid)
+    :param levelRadius: np.array(L, dtype=float) - größter Radius je Ebene
+    :param i: int - Index der Kugel
+    :param sphere: np.array([x, y, z, r], dtype=float) - Kugel
+    :return: kein Rückgabewert
+    """
+    l = gridLevel(sphere[3], levelRadius)
+    if sphere[3] > levelRadius[l]:
+        levelRadius[l] = sphere[3]
+    c = (gridCoord(sphere[0], l, 0, dims, cellSize) * dims[l, 1] + gridCoord(sphere[1], l, 1, dims, cellSize)) \
+        * dims[l, 2] + gridCoord(sphere[2], l, 2, dims, cellSize)
+    insertCell(head, next, prev, cellOf, i, offset[l] + c)
+
+@jit(nopython=True)
+def collectNeighbors(spheres, head, next, offset, dims, cellSize, levelRadius, point, reach, period, out):
+    """
+    Sammelt alle Kugeln j, deren Mittelpunkt in jeder Richtung einen Abstand kleiner reach + r_j zu point hat, in out.
+
+    In periodischen Richtungen werden zusätzlich die um eine Periode verschobenen Bilder von point durchsucht, sofern
+    ihr Suchquader den Raum schneidet.
+
+    :param spheres: np.array((n, 4), dtype=float) - Kugelliste
+    :param head, next, offset, dims, cellSize: hierarchisches Gitter (siehe HierarchicalGrid)
+    :param levelRadius: np.array(L, dtype=float) - größter Radius je Ebene
+    :param point: np.array([x, y, z, ...], dtype=float) - Position, um die gesucht wird
+    :param reach: float - Suchradius
+    :param period: np.array(2, dtype=float) - Periode in x- und y-Richtung (siehe periodic.py)
+    :param out: np.array(dtype=int) - Puffer für die gefundenen Indizes
+    :return: int - Anzahl gefundener Kugeln (ist sie größer als len(out), wurde out nicht vollständig gefüllt)
+    """
+    n = 0
+    shiftsX, shiftsY = imageShifts(period)
+    for l in range(len(levelRadius)):
+        d = reach + levelRadius[l]
+        for sx in range(-shiftsX, shiftsX + 1):
+            px = point[0] + sx * period[0]
+            if sx != 0 and (px + d < 0 or px - d > period[0]):
+                continue # Suchquader des Bildes liegt außerhalb des Raumes
+            for sy in range(-shiftsY, shiftsY + 1):
+                py = point[1] + sy * period[1]
+                if sy != 0 and (py + d < 0 or py - d > period[1]):
+                    continue
+                for ix in range(gridCoord(px - d, l, 0, dims, cellSize), gridCoord(px + d, l, 0, dims, cellSize) + 1):
+                    for iy in range(gridCoord(py - d, l, 1, dims, cellSize),
+                                    gridCoord(py + d, l, 1, dims, cellSize) + 1):
+                        for iz in range(gridCoord(point[2] - d, l, 2, dims, cellSize),
+                                        gridCoord(point[2] + d, l, 2, dims, cellSize) + 1):
+                            j = head[offset[l] + (ix * dims[l, 1] + iy) * dims[l, 2] + iz]
+                            while j >= 0:
+                                dj = reach + spheres[j, 3]
+                                if abs(spheres[j, 0] - px) < dj and abs(spheres[j, 1] - py) < dj \
+                                        and abs(spheres[j, 2] - point[2]) < dj:
+                                    if n < len(out):
+                                        out[n] = j
+                                    n += 1
+                                j = next[j]
+    return n
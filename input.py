@@ -42,6 +42,7 @@ class Input(ABC):
         :return: kein Rückgabewert
         """
         self._suffix = f"_TC{i:02d}{self._suf}"
+        self._testcase = i
         #self._suffix = f"_TC{i:02d}"
 
     @abstractmethod
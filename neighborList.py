@@ -0,0 +1,135 @@
+"""
+Wachsende Nachbarliste (Adjazenzliste) für die Kugeln einer Kugelpackung.
+
+Die Nachbarindizes aller Kugeln werden in Blöcken fester Größe (self.blockSize) in einem gemeinsamen Feld self.blocks
+gespeichert. Die Blöcke einer Kugel sind über self.blockNext verkettet, self.first und self.last enthalten den ersten
+bzw. letzten Block jeder Kugel und self.count die Anzahl ihrer Nachbarn. Ein neuer Nachbar wird in O(1) angehängt.
+Ist self.blocks voll, wird die Anzahl Blöcke verdoppelt, statt das Programm abzubrechen.
+
+Speicherbedarf: Kugeln belegen nur so viele Blöcke, wie sie Nachbarn haben, und alle Indizes sind int32. Ein festes
+Feld (n, 50) aus int64 benötigt dagegen 400 Byte pro Kugel, auch für Kugeln ohne Nachbarn.
+"""
+
+import numpy as np
+from numba import jit # Just-In-Time-Compiler
+
+class NeighborList:
+    def __init__(self, n, blockSize=16):
+        """
+        Konstruktor einer leeren Nachbarliste für n Kugeln.
+
+        :param n: int - max. Anzahl Kugeln
+        :param blockSize: int - Anzahl Nachbarindizes pro Block
+        """
+        self.blockSize = blockSize
+        self.count = np.zeros(n, dtype=np.int32) # Anzahl Nachbarn je Kugel
+        self.first = np.full(n, -1, dtype=np.int32) # erster Block je Kugel
+        self.last = np.full(n, -1, dtype=np.int32) # letzter Block je Kugel
+        numOfBlocks = max(n // 4, 16) # Startgröße, wächst bei Bedarf
+        self.blocks = np.full((numOfBlocks, blockSize), -1, dtype=np.int32)
+        self.blockNext = np.full(numOfBlocks, -1, dtype=np.int32)
+        self.usedBlocks = np.zeros(1, dtype=np.int64) # Anzahl belegter Blöcke (Feld, damit numba es ändern kann)
+
+    def append(self, i, j):
+        """
+        Nachbar j an die Nachbarliste der Kugel i anhängen.
+
+        :param i: int - Index der Kugel
+        :param j: int - Index der Nachbarkugel
+        :return: kein Rückgabewert
+        """
+        if not appendNeighbor(self.count, self.first, self.last, self.blocks, self.blockNext, self.usedBlocks, i, j):
+            self.grow()
+            appendNeighbor(self.count, self.first, self.last, self.blocks, self.blockNext, self.usedBlocks, i, j)
+
+    def grow(self):
+        """
+        Verdoppeln der Anzahl Blöcke.
+
+        :return: kein Rückgabewert
+        """
+        self.blocks = np.concatenate([self.blocks, np.full(self.blocks.shape, -1, dtype=np.int32)])
+        self.blockNext = np.concatenate([self.blockNext, np.full(self.blockNext.shape, -1, dtype=np.int32)])
+
+    def growSpheres(self, n):
+        """
+        Vergrößern der max. Anzahl Kugeln auf n.
+
+        :param n: int - neue max. Anzahl Kugeln
+        :return: kein Rückgabewert
+        """
+        k = n - len(self.count)
+        if k <= 0:
+            return
+        self.count = np.concatenate([self.count, np.zeros(k, dtype=np.int32)])
+        self.first = np.concatenate([self.first, np.full(k, -1, dtype=np.int32)])
+        self.last = np.concatenate([self.last, np.full(k, -1, dtype=np.int32)])
+
+    def get(self, i):
+        """
+        Alle Nachbarn der Kugel i in der Reihenfolge, in der sie angehängt wurden.
+
+        :param i: int - Index der Kugel
+        :return: np.array(dtype=int32) - Indizes der Nachbarkugeln
+        """
+        return gatherNeighbors(self.count, self.first, self.blocks, self.blockNext, i)
+
+    def nbytes(self):
+        """
+        Belegter Speicher der Nachbarliste in Byte.
+
+        :return: int - Speicherbedarf
+        """
+        return self.count.nbytes + self.first.nbytes + self.last.nbytes + self.blocks.nbytes + self.blockNext.nbytes
+
+@jit(nopython=True)
+def appendNeighbor(count, first, last, blocks, blockNext, usedBlocks, i, j):
+    """
+    Nachbar j an die Nachbarliste der Kugel i anhängen.
+
+    :param count: np.array(dtype=int32) - Anzahl Nachbarn je Kugel
+    :param first: np.array(dtype=int32) - erster Block je Kugel
+    :param last: np.array(dtype=int32) - letzter Block je Kugel
+    :param blocks: np.array((m, blockSize), dtype=int32) - Blöcke aus Nachbarindizes
+    :param blockNext: np.array(m, dtype=int32) - nächster Block derselben Kugel je Block
+    :param usedBlocks: np.array(1, dtype=int) - Anzahl belegter Blöcke
+    :param i: int - Index der Kugel
+    :param j: int - Index der Nachbarkugel
+    :return: bool - False, wenn ein neuer Block benötigt wird, aber kein freier Block vorhanden ist
+    """
+    blockSize = blocks.shape[1]
+    pos = count[i] % blockSize
+    if pos == 0: # letzter Block voll (oder noch kein Block vorhanden) --> neuen Block anhängen
+        if usedBlocks[0] >= blocks.shape[0]:
+            return False
+        b = usedBlocks[0]
+        usedBlocks[0] += 1
+        if first[i] < 0:
+            first[i] = b
+        else:
+            blockNext[last[i]] = b
+        last[i] = b
+    blocks[last[i], pos] = j
+    count[i] += 1
+    return True
+
+@jit(nopython=True)
+def gatherNeighbors(count, first, blocks, blockNext, i):
+    """
+    Sammelt alle Nachbarn der Kugel i in einem zusammenhängenden Feld.
+
+    :param count: np.array(dtype=int32) - Anzahl Nachbarn je Kugel
+    :param first: np.array(dtype=int32) - erster Block je Kugel
+    :param blocks: np.array((m, blockSize), dtype=int32) - Blöcke aus Nachbarindizes
+    :param blockNext: np.array(m, dtype=int32) - nächster Block derselben Kugel je Block
+    :param i: int - Index der Kugel
+    :return: np.array(count[i], dtype=int32) - Indizes der Nachbarkugeln
+    """
+    blockSize = blocks.shape[1]
+    out = np.empty(count[i], dtype=np.int32)
+    b = first[i]
+    for k in range(count[i]):
+        if k > 0 and k % blockSize == 0:
+            b = blockNext[b]
+        out[k] = blocks[b, k % blockSize]
+    return out
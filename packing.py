@@ -8,20 +8,33 @@
 import numpy as np
 from numba import jit # Just-In-Time-Compiler
 import csv
+import os
+import pickle
+import sys
 from abc import ABC, abstractmethod
+try:
+    import resource # nur unter Unix verfügbar (max. Speicherbedarf des Prozesses)
+except ImportError:
+    resource = None
 
 # eigene Module
 from funktionen import *
+from periodic import *
+from cellList import CellList, cellIndex, collectOverlaps
+
+INITIAL_CAPACITY = 1024 # Anfangsgröße der Kugel- und Pocketlisten, sie wachsen bei Bedarf
 
 class Packing(ABC):
     def __init__(self, input):
         """
         Konstruktor zum Erzeugen einer Kugelpackung.
 
-        Eine Kugelpackung entsteht in einem Raum mit den Seiten x, y und z. Sie besteht aus maximal n Kugeln, die in
-        einer Kugelliste self.spheres gespeichert werden. Die aktuelle Anzahl Kugeln in der Kugelpackung beträgt
-        self.countSpheres. self.suffix ist ein (optionaler) Zusatz für die Bezeichnung aller Dateien, die im
-        Zusammenhang mit dem Generieren der Kugelpackung erstellt werden.
+        Eine Kugelpackung entsteht in einem Raum mit den Seiten x, y und z. Ihre Kugeln werden in einer Kugelliste
+        self.spheres gespeichert, die klein beginnt und bei Bedarf verdoppelt wird (siehe reserveSpheres). Die aktuelle
+        Anzahl Kugeln in der Kugelpackung beträgt self.countSpheres. self.suffix ist ein (optionaler) Zusatz für die
+        Bezeichnung aller Dateien, die im Zusammenhang mit dem Generieren der Kugelpackung erstellt werden. Bei
+        periodischen Rändern (self.periodic) setzt sich der Raum in x- und y-Richtung fort, die Kugelpackung lässt sich
+        lückenlos aneinandersetzen.
 
         :param input: Input - enthält alle Eingabedaten der Datei
         """
@@ -30,9 +43,13 @@ class Packing(ABC):
         self.z = input._z
         self.suffix = input._suffix
         self.countSpheres = 0 # Zaehlt wie viele Kugeln bereits platziert wurden
+        # periodische Ränder in x- und y-Richtung (siehe periodic.py): Periode je Richtung, 0: nicht periodisch
+        self.periodic = input._periodic
+        self.period = np.array([self.x, self.y], dtype=float) if self.periodic else np.zeros(2)
 
-        n = self.maxNumOfSpheres()
+        n = min(self.maxNumOfSpheres(), INITIAL_CAPACITY)
         self.spheres = np.full((n, 4), -1., dtype=float)
+        self.peakBytes = 0 # größter Speicherbedarf aller Felder in Byte (siehe recordMemory)
 
     @abstractmethod
     def maxNumOfSpheres(self):
@@ -43,6 +60,93 @@ class Packing(ABC):
         """
         pass
 
+    def reserveSpheres(self, n):
+        """
+        Sicherstellen, dass die Kugelliste mindestens n Kugeln aufnehmen kann.
+
+        Ist self.spheres zu klein, wird die Kapazität verdoppelt (mindestens auf n), das Anhängen einer Kugel kostet
+        daher amortisiert O(1). Felder mit einem Eintrag je Kugel werden in spheresGrown vergrößert.
+
+        :param n: int - benötigte Anzahl Kugeln
+        :return: kein Rückgabewert
+        """
+        if n <= len(self.spheres):
+            return
+        capacity = max(2 * len(self.spheres), n)
+        self.spheres = growBuffer(self.spheres, capacity, -1.)
+        self.spheresGrown(capacity)
+        self.recordMemory()
+
+    def spheresGrown(self, capacity):
+        """
+        Vergrößern aller Felder mit einem Eintrag je Kugel (z. B. Zelllisten), nachdem die Kugelliste auf capacity
+        Kugeln vergrößert wurde.
+
+        :param capacity: int - neue Kapazität der Kugelliste
+        :return: kein Rückgabewert
+        """
+        pass
+
+    def trimBuffers(self):
+        """
+        Kürzen der Kugelliste auf die platzierten Kugeln (nach dem Generieren der Kugelpackung).
+
+        :return: kein Rückgabewert
+        """
+        self.recordMemory()
+        self.spheres = self.spheres[:self.countSpheres].copy()
+
+    def bufferBytes(self):
+        """
+        Speicherbedarf aller numpy-Felder der Kugelpackung und ihrer Hilfsobjekte (Zell-, Nachbarlisten usw.) in Byte.
+
+        :return: int - Speicherbedarf
+        """
+        total = 0
+        for obj in [self] + [v for v in vars(self).values() if hasattr(v, '__dict__')]:
+            total += sum(v.nbytes for v in vars(obj).values() if isinstance(v, np.ndarray))
+        return total
+
+    def recordMemory(self):
+        """
+        Aktualisieren des größten Speicherbedarfs self.peakBytes.
+
+        Felder werden nur beim Vergrößern größer, es genügt daher ein Aufruf nach jedem Vergrößern.
+
+        :return: kein Rückgabewert
+        """
+        self.peakBytes = max(self.peakBytes, self.bufferBytes())
+
+    def reportMemory(self):
+        """
+        Ausgabe des größten Speicherbedarfs aller Felder und, falls verfügbar, des gesamten Prozesses.
+
+        :return: kein Rückgabewert
+        """
+        self.recordMemory()
+        print(f"max. Speicherbedarf Felder: {self.peakBytes / 2 ** 20:.1f} MiB")
+        if resource is not None:
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss # Linux: KiB, macOS: Byte
+            if sys.platform == 'darwin':
+                peak /= 1024
+            print(f"max. Speicherbedarf Prozess: {peak / 2 ** 10:.1f} MiB")
+
+    def writeSnapshot(self, datei):
+        """
+        Speichern des gesamten Zustands der Kugelpackung (Kugeln, Pockets, Zähler, Zustand des Zufallszahlengenerators
+        usw.) als Binärdatei (pickle), siehe readSnapshot.
+
+        Die Datei wird zuerst unter einem temporären Namen geschrieben und dann umbenannt. Bricht das Programm während
+        des Schreibens ab, bleibt der vorherige Snapshot erhalten.
+
+        :param datei: string - Dateiname des Snapshots
+        :return: kein Rückgabewert
+        """
+        temp = datei + '.tmp'
+        with open(temp, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, datei)
+
     def readCsvFile(self, datei):
         """
         Einlesen einer Kugelliste als csv-Datei.
@@ -84,16 +188,100 @@ class Packing(ABC):
     def initialize(self, datei):
         """
         Kugelpackung wird initialisiert, indem die Kugeln aus der Initialisierungsebene eingelesen und in self.spheres
-        gespeichert werden.
+        gespeichert werden. Bei periodischen Rändern werden sie in den Raum verschoben (siehe wrapInitialSpheres).
 
         :param datei: string - Dateiname der csv-Datei, die die Kugeln der Initialisierungsebene enthält
         :return: kein Rückgabewert
         """
         list = self.readCsvFile(datei)
+        self.reserveSpheres(len(list))
         self.countSpheres = len(list)
         self.spheres[:len(list)] = np.asarray(list)
+        self.wrapInitialSpheres()
+
+    def wrapInitialSpheres(self):
+        """
+        Verschieben der Mittelpunkte der Kugeln der Initialisierungsebene in den Raum [0, x) x [0, y) bei periodischen
+        Rändern.
+
+        Die Initialisierungsebene ist für einen Raum mit Rändern angelegt, eine Kugel an einem Rand kann sich mit dem
+        Bild einer Kugel am gegenüberliegenden Rand überschneiden. Jede Kugel, die sich über den periodischen Rand mit
+        einer vorherigen verbliebenen Kugel überschneidet, wird entfernt. Überschneidungen innerhalb des Raumes werden
+        wie ohne periodische Ränder nicht geprüft.
+
+        :return: kein Rückgabewert
+        """
+        if not self.periodic:
+            return
+        spheres = self.spheres[:self.countSpheres]
+        for i in range(self.countSpheres):
+            wrapPosition(spheres[i], self.period)
+        cells = CellList(self.x, self.y, self.z, 2 * spheres[:, 3].max(), self.countSpheres, period=self.period)
+        keep = np.zeros(self.countSpheres, dtype=bool)
+        out = np.empty(64, dtype=np.int64) # Puffer für überschneidende Kugeln
+        for i in range(self.countSpheres):
+            c = cellIndex(spheres[i], cells.origin, cells.cellSize, cells.dims)
+            # Überschneidung wie bei gleich großen Kugeln (siehe equallySizedPacking.pocketValid)
+            n = collectOverlaps(spheres[i], spheres, cells.head, cells.next, c, cells.dims, self.period, 0.0001, out)
+            if n > len(out): # Puffer zu klein --> vergrößern und erneut suchen
+                out = np.empty(2 * n, dtype=np.int64)
+                n = collectOverlaps(spheres[i], spheres, cells.head, cells.next, c, cells.dims, self.period, 0.0001,
+                                    out)
+            # Überschneidungen über den Rand: ohne Verschiebung um eine Periode überschneiden sich die Kugeln nicht
+            others = spheres[out[:n]]
+            direct = np.linalg.norm(others[:, :3] - spheres[i, :3], axis=1) - (others[:, 3] + spheres[i, 3])
+            if np.all(direct < -0.0001):
+                keep[i] = True
+                cells.insert(i, spheres[i])
+        n = keep.sum()
+        if n < self.countSpheres:
+            print(f"{self.countSpheres - n} Kugeln der Initialisierungsebene überschneiden sich über den periodischen "
+                  f"Rand und werden entfernt")
+        self.spheres[:n] = spheres[keep]
+        self.spheres[n:self.countSpheres] = -1.
+        self.countSpheres = n
 
 # Hilfsmethoden
+def readSnapshot(datei):
+    """
+    Einlesen einer mit Packing.writeSnapshot gespeicherten Kugelpackung.
+
+    :param datei: string - Dateiname des Snapshots
+    :return: Packing - Kugelpackung im gespeicherten Zustand
+    """
+    with open(datei, "rb") as f:
+        return pickle.load(f)
+
+def growBuffer(array, capacity, fill):
+    """
+    Vergrößern eines Feldes auf capacity Zeilen, die neuen Zeilen werden mit fill belegt.
+
+    :param array: np.array - Feld
+    :param capacity: int - neue Anzahl Zeilen
+    :param fill: Wert der neuen Zeilen
+    :return: np.array - vergrößertes Feld (gleicher Datentyp)
+    """
+    grown = np.full((capacity,) + array.shape[1:], fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+@jit(nopython=True)
+def roundPocket(pocket, stored):
+    """
+    Runden einer berechneten Pocket auf den Datentyp des Feldes, in dem Pocketkoordinaten gespeichert werden (siehe
+    Eingabe Pocketkoordinaten).
+
+    Gültigkeit und Platzierung beziehen sich damit auf dieselbe gerundete Pocket, unabhängig davon, ob sie neu
+    berechnet oder gespeichert ist. Bei float64 bleibt die Pocket unverändert.
+
+    :param pocket: np.array(4, dtype=float) - [x, y, z, r], wird überschrieben
+    :param stored: np.array(dtype=float64 oder float32) - Feld, in dem die Pocket gespeichert wird
+    :return: kein Rückgabewert
+    """
+    rounded = np.empty(4, dtype=stored.dtype)
+    rounded[:] = pocket[:4]
+    pocket[:4] = rounded
+
 @jit(nopython=True)
 def lineDistance(rv1, sv1, rv2, sv2):
     """
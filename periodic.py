@@ -0,0 +1,108 @@
+"""
+Periodische Ränder in x- und y-Richtung (Minimum-Image-Konvention).
+
+Die Periode wird als np.array([px, py], dtype=float) übergeben, px bzw. py = 0 bedeutet keine Periodizität in dieser
+Richtung. Bei einer periodischen Kugelpackung liegen alle Kugelmittelpunkte im Raum [0, px) x [0, py), jede Kugel hat
+zusätzlich Bilder, die um Vielfache von px und py verschoben sind. Abstände werden zum nächstgelegenen Bild gemessen,
+Pockets aus den nächstgelegenen Bildern ihrer Erzeugendenkugeln berechnet und ihr Mittelpunkt in den Raum
+zurückverschoben. Ist die Periode 0, liefern alle Funktionen dieselben Werte wie ohne periodische Ränder.
+"""
+
+import numpy as np
+from numba import jit # Just-In-Time-Compiler
+
+@jit(nopython=True)
+def minimumImage(d, period):
+    """
+    Differenz d zweier Koordinaten zum nächstgelegenen Bild.
+
+    :param d: float - Differenz der Koordinaten
+    :param period: float - Periode der Richtung (0: nicht periodisch)
+    :return: float - Differenz mit |d| <= period / 2 (bei period == 0 unverändert)
+    """
+    if period > 0:
+        return d - period * np.round(d / period)
+    return d
+
+@jit(nopython=True)
+def imageDistance(p1, p2, period):
+    """
+    Abstand der Mittelpunkte p1 und p2 zum nächstgelegenen Bild.
+
+    :param p1: np.array([x, y, z, ...], dtype=float) - Punkt 1
+    :param p2: np.array([x, y, z, ...], dtype=float) - Punkt 2
+    :param period: np.array(2, dtype=float) - Periode in x- und y-Richtung
+    :return: float - Abstand
+    """
+    d = p1[:3] - p2[:3]
+    d[0] = minimumImage(d[0], period[0])
+    d[1] = minimumImage(d[1], period[1])
+    return np.linalg.norm(d)
+
+@jit(nopython=True)
+def nearestImage(sphere, ref, period):
+    """
+    Bild der Kugel sphere, das dem Punkt ref am nächsten liegt.
+
+    :param sphere: np.array([x, y, z, r], dtype=float) - Kugel
+    :param ref: np.array([x, y, z, ...], dtype=float) - Bezugspunkt
+    :param period: np.array(2, dtype=float) - Periode in x- und y-Richtung
+    :return: np.array([x, y, z, r], dtype=float) - verschobene Kopie der Kugel
+    """
+    image = sphere.copy()
+    for d in range(2):
+        if period[d] > 0:
+            image[d] -= period[d] * np.round((sphere[d] - ref[d]) / period[d])
+    return image
+
+@jit(nopython=True)
+def nearestImageRows(spheres, refs, period):
+    """
+    Bilder der Kugeln spheres[k], die dem Punkt refs[k] am nächsten liegen (siehe nearestImage).
+
+    :param spheres: np.array((m, 4), dtype=float) - Kugeln
+    :param refs: np.array((m, >=3), dtype=float) - Bezugspunkte
+    :param period: np.array(2, dtype=float) - Periode in x- und y-Richtung
+    :return: np.array((m, 4), dtype=float) - verschobene Kopien der Kugeln
+    """
+    images = np.empty((len(spheres), 4))
+    for k in range(len(spheres)):
+        images[k] = nearestImage(spheres[k], refs[k], period)
+    return images
+
+@jit(nopython=True)
+def wrapCoordinate(v, period):
+    """
+    Verschieben der Koordinate v in das Intervall [0, period).
+
+    :param v: float - Koordinate
+    :param period: float - Periode der Richtung (0: nicht periodisch)
+    :return: float - verschobene Koordinate (bei period == 0 unverändert)
+    """
+    if period > 0:
+        v -= period * np.floor(v / period)
+        if v >= period: # Rundung bei sehr kleinen negativen Koordinaten
+            v -= period
+    return v
+
+@jit(nopython=True)
+def wrapPosition(point, period):
+    """
+    Verschieben des Punktes point in den Raum [0, px) x [0, py) (in periodischen Richtungen).
+
+    :param point: np.array([x, y, z, ...], dtype=float) - Punkt, wird überschrieben
+    :param period: np.array(2, dtype=float) - Periode in x- und y-Richtung
+    :return: kein Rückgabewert
+    """
+    point[0] = wrapCoordinate(point[0], period[0])
+    point[1] = wrapCoordinate(point[1], period[1])
+
+@jit(nopython=True)
+def imageShifts(period):
+    """
+    Anzahl Verschiebungen je Richtung, unter denen eine Umgebungssuche wiederholt wird.
+
+    :param period: np.array(2, dtype=float) - Periode in x- und y-Richtung
+    :return: int, int - 1 in periodischen Richtungen (Verschiebungen -1, 0, 1), sonst 0 (nur Verschiebung 0)
+    """
+    return (1 if period[0] > 0 else 0), (1 if period[1] > 0 else 0)
@@ -0,0 +1,126 @@
+"""
+Quelle für die Radien der Kugeln einer VariableSizedPacking.
+
+Die Radien werden blockweise (self.blockSize Radien auf einmal) aus einem numpy.random.Generator gezogen, statt für
+jede Kugel scipy.stats aufzurufen. Mit demselben Startwert entsteht dieselbe Folge von Radien.
+
+Unterstützte Verteilungen:
+- 'uniform': Gleichverteilung im Intervall [minRadius, maxRadius]
+- 'beta': Beta-Verteilung mit den Parametern p und q, skaliert auf [minRadius, maxRadius]
+- 'table': empirische Partikelgrößenverteilung aus einer Tabelle (siehe readRadiusTable), gezogen über die Inverse
+  der stückweise linearen Verteilungsfunktion
+"""
+
+import csv
+import numpy as np
+
+class RadiusSource:
+    def __init__(self, minRadius, maxRadius, distribution='uniform', beta_p=2, beta_q=2, seed=None, table=None,
+                 blockSize=4096):
+        """
+        Konstruktor einer Radiusquelle.
+
+        :param minRadius: float - minimaler Radius
+        :param maxRadius: float - maximaler Radius
+        :param distribution: string - Verteilung der Radien ('uniform', 'beta' oder 'table')
+        :param beta_p: float - Parameter p der Beta-Verteilung
+        :param beta_q: float - Parameter q der Beta-Verteilung
+        :param seed: int, Liste aus int oder None - Startwert des Zufallszahlengenerators (None: zufälliger Startwert)
+        :param table: string oder None - Dateiname der Tabelle bei distribution == 'table' (leer: keine Tabelle)
+        :param blockSize: int - Anzahl Radien, die auf einmal gezogen werden
+        """
+        self.minRadius = minRadius
+        self.maxRadius = maxRadius
+        self.distribution = distribution
+        self.beta_p = beta_p
+        self.beta_q = beta_q
+        self.blockSize = blockSize
+        self.rng = np.random.default_rng(seed)
+        if self.distribution == 'table':
+            if not table: # in den Eingabedaten ist keine Radiustabelle angegeben ('')
+                raise ValueError("Verteilung 'table' benötigt eine Radiustabelle (Eingabe 'Radiustabelle')")
+            self.tableRadius, self.tableCdf = readRadiusTable(table)
+            if self.tableRadius[0] < minRadius or self.tableRadius[-1] > maxRadius:
+                raise ValueError(f"Radien der Tabelle {table} liegen nicht im Intervall [{minRadius}, {maxRadius}]")
+        self.block = np.empty(0)
+        self.pos = 0
+
+    def next(self):
+        """
+        Nächster Radius.
+
+        :return: float - Radius
+        """
+        if self.pos >= len(self.block):
+            self.block = self.draw(self.blockSize)
+            self.pos = 0
+        radius = self.block[self.pos]
+        self.pos += 1
+        return radius
+
+    def putBack(self):
+        """
+        Zurücklegen des zuletzt mit next gezogenen Radius, der nächste Aufruf von next liefert ihn erneut.
+
+        :return: kein Rückgabewert
+        """
+        self.pos -= 1
+
+    def draw(self, n):
+        """
+        Ziehen von n Radien.
+
+        :param n: int - Anzahl Radien
+        :return: np.array(n, dtype=float) - Radien
+        """
+        if self.minRadius == self.maxRadius:
+            return np.full(n, float(self.minRadius))
+        elif self.distribution == 'uniform':
+            return self.rng.uniform(self.minRadius, self.maxRadius, n)
+        elif self.distribution == 'beta':
+            return self.minRadius + (self.maxRadius - self.minRadius) * self.rng.beta(self.beta_p, self.beta_q, n)
+        else: # self.distribution == 'table'
+            return np.interp(self.rng.random(n), self.tableCdf, self.tableRadius)
+
+    def mean(self):
+        """
+        Erwartungswert des Radius.
+
+        :return: float - mittlerer Radius
+        """
+        if self.minRadius == self.maxRadius:
+            return float(self.minRadius)
+        elif self.distribution == 'uniform':
+            return (self.minRadius + self.maxRadius) / 2
+        elif self.distribution == 'beta':
+            return self.minRadius + (self.maxRadius - self.minRadius) * self.beta_p / (self.beta_p + self.beta_q)
+        else: # self.distribution == 'table'
+            # Anteil am Anfang der Tabelle (Radius tableRadius[0]) und Mittelwert je linearem Abschnitt
+            return self.tableCdf[0] * self.tableRadius[0] \
+                   + np.sum(np.diff(self.tableCdf) * (self.tableRadius[1:] + self.tableRadius[:-1]) / 2)
+
+def readRadiusTable(datei):
+    """
+    Einlesen einer Partikelgrößenverteilung als csv-Datei.
+
+    Die Datei enthält eine Titelzeile und je Zeile einen Radius und den Summenanteil aller Kugeln mit einem Radius
+    kleiner oder gleich diesem Radius (Summenverteilung, z. B. in % oder als Anteil). Die Radien müssen aufsteigend
+    sortiert sein, die Summenanteile dürfen nicht fallen. Die Summenanteile werden auf den letzten Wert normiert.
+
+    :param datei: string - Dateiname der csv-Datei
+    :return: np.array(dtype=float), np.array(dtype=float) - Radien und normierte Verteilungsfunktion
+    """
+    radius = []
+    cdf = []
+    with open(datei, "r") as f:
+        reader = csv.reader(f)
+        next(reader) # Titelzeile überlesen
+        for row in reader: # zeilenweise einlesen
+            if len(row) >= 2:
+                radius.append(float(row[0]))
+                cdf.append(float(row[1]))
+    radius = np.array(radius)
+    cdf = np.array(cdf)
+    if len(radius) == 0 or np.any(np.diff(radius) <= 0) or np.any(np.diff(cdf) < 0) or cdf[0] < 0 or cdf[-1] <= 0:
+        raise ValueError(f"Radiustabelle {datei} ist keine gültige Summenverteilung")
+    return radius, cdf / cdf[-1]
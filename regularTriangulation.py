@@ -0,0 +1,204 @@
+"""
+Reguläre (gewichtete) Delaunay-Triangulierung der Kugelmittelpunkte einer Kugelpackung.
+
+Jeder Kugelmittelpunkt p_i mit Radius r_i wird mit dem Gewicht w_i = (r_i + radiusOffset)^2 in den R^4 gehoben:
+(p_i, |p_i|^2 - w_i). Die nach unten zeigenden Facetten der konvexen Hülle dieser Punkte sind die Tetraeder der
+regulären Triangulierung. Ein Tetraeder hat eine Umkugel im Sinne der Potenzdistanz, die keine weitere Kugel schneidet;
+mit radiusOffset = mittlerer Radius entspricht das näherungsweise einer leeren Kugel mit diesem Radius, die die 4 Kugeln
+berührt. Die Dreiecke (Seitenflächen der Tetraeder) sind daher Kandidaten für Pockets.
+
+Die Hülle wird mit Qhull (scipy.spatial.ConvexHull) inkrementell aufgebaut: neue Kugeln werden mit add angehängt, der
+Index eines Punktes ist der Index seiner Kugel. Die Dreiecke werden nicht für jede neue Kugel neu bestimmt, add
+liefert nur die Änderung: die neuen Dreiecke (siehe newFaces) und die entfernten (siehe removedFaces). Diese ergeben
+sich aus den Facetten der Hülle, die Qhull beim Einfügen entfernt (siehe alignFacets).
+
+Qhull-Objekte lassen sich nicht mit pickle speichern. Beim Speichern (z. B. in einem Snapshot der Kugelpackung) werden
+nur die gehobenen Punkte gespeichert, beim Laden wird die Hülle mit derselben Folge von Aufrufen wie beim ursprünglichen
+Aufbau erneut erzeugt und ist daher identisch.
+"""
+
+import numpy as np
+from numba import jit
+from scipy.spatial import ConvexHull
+
+class RegularTriangulation:
+    def __init__(self, spheres, radiusOffset):
+        """
+        Konstruktor der regulären Triangulierung der Kugeln spheres.
+
+        self.faces enthält die Dreiecke der Triangulierung der Kugeln spheres (siehe facesOf), für weitere Kugeln
+        liefert add die Änderung.
+
+        :param spheres: np.array((n, 4), dtype=float) - Kugeln (mind. 5, nicht alle in einer Ebene)
+        :param radiusOffset: float - Radius, der bei der Gewichtung zu jedem Kugelradius addiert wird
+        """
+        self.radiusOffset = radiusOffset
+        self.hull = ConvexHull(self.lift(spheres), incremental=True)
+        self.count = len(spheres)
+        self.initialCount = len(spheres) # Anzahl Punkte beim Erzeugen der Hülle, danach je Punkt ein add
+        self.readFacets()
+        self.faces = self.facesOf(self.simplices[self.lower])
+
+    def lift(self, spheres):
+        """
+        Heben der Kugeln in den R^4.
+
+        :param spheres: np.array((n, 4), dtype=float) - Kugeln
+        :return: np.array((n, 4), dtype=float) - gehobene Punkte
+        """
+        spheres = np.atleast_2d(spheres)
+        w = np.sum(spheres[:, :3] ** 2, axis=1) - (spheres[:, 3] + self.radiusOffset) ** 2
+        return np.column_stack([spheres[:, :3], w])
+
+    def add(self, sphere):
+        """
+        Hinzufügen einer Kugel (Index self.count).
+
+        Die Facetten der Hülle, die die neue Kugel nicht enthalten, sind alle bereits vorher vorhanden. Die entfernten
+        Facetten bestimmt alignFacets aus der Facettenliste vor und nach dem Einfügen. Nur in ihrer Umgebung ändern
+        sich die Dreiecke. Lässt sich die Änderung so nicht bestimmen, werden die Dreiecke vorher und nachher
+        vollständig verglichen.
+
+        :param sphere: np.array([x, y, z, r], dtype=float) - neue Kugel
+        :return: np.array((m, 3), dtype=int), np.array((k, 3), dtype=int) - neue Dreiecke, die die neue Kugel enthalten
+            (die neue Kugel steht in der letzten Spalte), und entfernte Dreiecke (beide aufsteigend sortierte Indizes,
+            zeilenweise lexikographisch sortiert)
+        """
+        previous, neighbors, lower = self.simplices, self.neighbors, self.lower
+        self.hull.add_points(self.lift(sphere))
+        self.count += 1
+        self.readFacets()
+        new = self.simplices[:, 3] == self.count - 1
+        removed = np.zeros(len(previous), dtype=bool)
+        tets = self.simplices[new & self.lower]
+        if alignFacets(previous, self.simplices[~new], removed):
+            return self.newFaces(tets), self.removedFaces(previous, neighbors, lower, removed, tets)
+        before = self.facesOf(previous[lower])
+        after = self.facesOf(self.simplices[self.lower])
+        return after[after[:, 2] == self.count - 1], before[~np.isin(self.faceKeys(before), self.faceKeys(after))]
+
+    def readFacets(self):
+        """
+        Übernehmen der Facetten der Hülle.
+
+        self.simplices enthält die Indizes jeder Facette aufsteigend sortiert, self.neighbors die Nachbarfacette
+        gegenüber jedem dieser Indizes (-1: keine) und self.lower für jede Facette, ob sie nach unten zeigt (Tetraeder
+        der Triangulierung).
+
+        :return: kein Rückgabewert
+        """
+        order = np.argsort(self.hull.simplices, axis=1)
+        self.simplices = np.take_along_axis(self.hull.simplices, order, axis=1)
+        self.neighbors = np.take_along_axis(self.hull.neighbors, order, axis=1)
+        self.lower = self.hull.equations[:, 3] < 0
+
+    def newFaces(self, tets):
+        """
+        Dreiecke der neuen Tetraeder tets, die die neue Kugel enthalten.
+
+        :param tets: np.array((m, 4), dtype=int) - neue Tetraeder (aufsteigend sortierte Indizes, die neue Kugel steht
+            in der letzten Spalte)
+        :return: np.array((k, 3), dtype=int) - Dreiecke (siehe add)
+        """
+        faces = np.concatenate([tets[:, [0, 1, 3]], tets[:, [0, 2, 3]], tets[:, [1, 2, 3]]])
+        return np.unique(faces, axis=0).reshape(-1, 3)
+
+    def removedFaces(self, previous, neighbors, lower, removed, tets):
+        """
+        Dreiecke, die mit den entfernten Tetraedern aus der Triangulierung fallen.
+
+        Ein Dreieck eines entfernten Tetraeders bleibt erhalten, wenn das Tetraeder auf seiner anderen Seite erhalten
+        bleibt oder es ein Dreieck eines neuen Tetraeders ist (ohne die neue Kugel).
+
+        :param previous: np.array((n, 4), dtype=int) - Facetten vor dem Einfügen (siehe readFacets)
+        :param neighbors: np.array((n, 4), dtype=int) - Nachbarfacetten vor dem Einfügen
+        :param lower: np.array(n, dtype=bool) - True für Tetraeder vor dem Einfügen
+        :param removed: np.array(n, dtype=bool) - True für entfernte Facetten
+        :param tets: np.array((m, 4), dtype=int) - neue Tetraeder
+        :return: np.array((k, 3), dtype=int) - Dreiecke (siehe add)
+        """
+        kept = set(map(tuple, tets[:, :3].tolist()))
+        faces = set()
+        for r in np.nonzero(removed & lower)[0]:
+            for k in range(4):
+                n = neighbors[r, k]
+                if n >= 0 and lower[n] and not removed[n]:
+                    continue # Dreieck des erhaltenen Nachbartetraeders
+                face = tuple(np.delete(previous[r], k).tolist())
+                if face not in kept:
+                    faces.add(face)
+        return np.array(sorted(faces), dtype=int).reshape(-1, 3)
+
+    def __getstate__(self):
+        """
+        Zustand zum Speichern mit pickle: alle Attribute außer der Hülle und ihren Facetten, stattdessen ihre gehobenen
+        Punkte.
+
+        :return: dict - Zustand
+        """
+        state = self.__dict__.copy()
+        state['hull'] = self.hull.points[:self.count].copy()
+        for name in ['simplices', 'neighbors', 'lower']:
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        """
+        Wiederherstellen aus dem mit __getstate__ gespeicherten Zustand. Die Hülle wird aus den ersten
+        self.initialCount Punkten erzeugt, jeder weitere Punkt wird wie in add einzeln hinzugefügt.
+
+        :param state: dict - Zustand
+        :return: kein Rückgabewert
+        """
+        points = state['hull']
+        self.__dict__.update(state)
+        self.hull = ConvexHull(points[:self.initialCount], incremental=True)
+        for i in range(self.initialCount, self.count):
+            self.hull.add_points(points[i:i + 1])
+        self.readFacets()
+
+    def facesOf(self, tets):
+        """
+        Alle Dreiecke der Tetraeder tets, jedes einmal als aufsteigend sortierte Indizes, nach ihrem Schlüssel (siehe
+        faceKeys) sortiert.
+
+        :param tets: np.array((m, 4), dtype=int) - Tetraeder (aufsteigend sortierte Indizes)
+        :return: np.array((k, 3), dtype=int) - Dreiecke
+        """
+        faces = np.concatenate([tets[:, [0, 1, 2]], tets[:, [0, 1, 3]], tets[:, [0, 2, 3]], tets[:, [1, 2, 3]]])
+        keys, idx = np.unique(self.faceKeys(faces), return_index=True)
+        return faces[idx]
+
+    def faceKeys(self, triples):
+        """
+        Eindeutiger Schlüssel je Dreieck, unabhängig von der Reihenfolge der Indizes.
+
+        :param triples: np.array((m, 3), dtype=int) - Kugelindizes je Dreieck
+        :return: np.array(m, dtype=int) - Schlüssel
+        """
+        t = np.sort(triples, axis=1).astype(np.int64)
+        n = np.int64(self.count + 1)
+        return (t[:, 0] * n + t[:, 1]) * n + t[:, 2]
+
+@jit(nopython=True)
+def alignFacets(previous, kept, removed):
+    """
+    Bestimmen der Facetten, die Qhull beim Einfügen eines Punktes entfernt hat.
+
+    Qhull entfernt die vom neuen Punkt aus sichtbaren Facetten aus seiner Facettenliste und hängt die neuen Facetten an,
+    die Reihenfolge der übrigen bleibt erhalten. Die Facetten ohne den neuen Punkt (kept) sind dann eine Teilfolge der
+    Facetten vor dem Einfügen (previous), die übersprungenen Facetten wurden entfernt. Da jede Facette nur einmal
+    vorkommt, ist die Zuordnung eindeutig.
+
+    :param previous: np.array((n, 4), dtype=int) - Facetten vor dem Einfügen
+    :param kept: np.array((m, 4), dtype=int) - Facetten nach dem Einfügen, die den neuen Punkt nicht enthalten
+    :param removed: np.array(n, dtype=bool) - Ausgabe: True für entfernte Facetten
+    :return: bool - False, wenn kept keine Teilfolge von previous ist (removed ist dann ungültig)
+    """
+    j = 0
+    for i in range(len(previous)):
+        if j < len(kept) and (previous[i] == kept[j]).all():
+            j += 1
+        else:
+            removed[i] = True
+    return j == len(kept)
@@ -16,6 +16,8 @@ class SpecialCase(Enum):
     NEWRADIUS = 4 # neuer Radius für zu platzierende Kugel konnte gefunden werden
     OVERLAPCALCPOC = 5 # Zu großer Überlapp von K4 zu K1, K2 oder K3
     OVERLAPALLNEI = 6 # Zu großer Überlapp von K4 zu irgendeiner Nachbarkugel
+    NOROOT = 7 # pq-Formel liefert keine Nullstelle (SpacingException in calcPocket)
+    UNKNOWN = 8 # unbekannter Fehler (UnknownError in calcPocket)
 
 def writeSpecialCase(counts, datei):
     """
@@ -8,12 +8,15 @@ Testen von Klassen und Methoden aus packing.py, equallySizedPacking.py, input.py
 
 from packing import *
 from equallySizedPacking import *
-from input import Input
+from variableSizedPacking import VariableSizedPacking
+from decomposedPacking import DecomposedPacking
+from equallySizedInput import EquallySizedInput
+from variableSizedInput import VariableSizedInput
 
 class Test:
     def __init__(self):
-        eingabe = "../resources/Eingabedaten.txt"
-        self.inp = Input(eingabe)
+        self.eingabe = "../resources/Eingabedaten.txt"
+        self.inp = EquallySizedInput(self.eingabe)
 
     def testReadWriteCsv(self):
         self.kupa = EquallySizedPacking(self.inp)
@@ -59,8 +62,372 @@ class Test:
         # elapsed_time = time.time() - start
         # print(elapsed_time)
 
+    def testPlacementCost(self):
+        """
+        Benchmark: Zeit pro platzierter Kugel bei wachsender Raumgröße für die Verwaltung der Pocketliste 'sort'
+        (Pocketliste wird nach jeder Platzierung durchsucht und sortiert) und 'heap' (überschnittene Pockets werden
+        über die Zellliste der Pockets gefunden). Im Modus 'heap' bleibt die Zeit pro Platzierung annähernd konstant.
+        """
+        for mode in ['sort', 'heap']:
+            self.inp._pocketQueue = mode
+            for size in [100, 150, 300, 600]: # erster Durchlauf kompiliert die numba-Funktionen
+                self.inp._x = size
+                self.inp._y = size
+                self.inp._z = 60
+                self.kupa = EquallySizedPacking(self.inp)
+                plane = initPlane(size, size, self.inp._radius)
+                self.kupa.reserveSpheres(len(plane))
+                self.kupa.spheres[:len(plane)] = plane
+                self.kupa.countSpheres = len(plane)
+                self.kupa.initPocketList()
+                start = time.time()
+                placed = 0
+                lowestPoc = self.kupa.nextPocket()
+                while lowestPoc is not None:
+                    self.kupa.reserveSpheres(self.kupa.countSpheres + 1)
+                    self.kupa.spheres[self.kupa.countSpheres] = lowestPoc[:4]
+                    self.kupa.countSpheres += 1
+                    self.kupa.updatePocketList()
+                    placed += 1
+                    lowestPoc = self.kupa.nextPocket()
+                elapsed_time = time.time() - start
+                print(f"{mode}: {size}x{size}x60, {placed} Kugeln, {elapsed_time / placed * 1000:.3f} ms pro Kugel")
+
+    def testPocketKernel(self):
+        """
+        Micro-Benchmark: Pocketberechnung mit pocketPossibleAlt und calculatePocket im Vergleich zu equalSizedPocket
+        für alle Dreierkombinationen entfernter Nachbarn einer Kugelpackung und für Grenzfälle (siehe
+        borderlineTriples). Beide Varianten laufen in einer kompilierten Schleife, gemessen wird der zweite Durchlauf
+        (ohne Kompilierzeit). Beide Varianten müssen dieselben Pockets liefern; verschieden entscheiden dürfen sie nur,
+        wenn Kugel 3 die Kugeln 1 und 2 berührt (dort entscheidet bei pocketPossibleAlt die Rundung).
+        """
+        self.inp._x = 300
+        self.inp._y = 300
+        self.inp._z = 60
+        self.inp._engine = 'numba'
+        self.kupa = EquallySizedPacking(self.inp)
+        plane = initPlane(self.inp._x, self.inp._y, self.inp._radius)
+        self.kupa.reserveSpheres(len(plane))
+        self.kupa.spheres[:len(plane)] = plane
+        self.kupa.countSpheres = len(plane)
+        self.kupa.initPocketList()
+        self.kupa.runDepositionLoop()
+        nb = self.kupa.distantNeighbors
+        triples = enumerateTriples(nb.count, nb.first, nb.blocks, nb.blockNext, self.kupa.countSpheres)
+        borderline = borderlineTriples(self.inp._radius)
+        spheres = np.concatenate([self.kupa.spheres[:self.kupa.countSpheres], borderline])
+        triples = np.concatenate([triples, self.kupa.countSpheres + np.arange(len(borderline)).reshape(-1, 3)])
+        results = []
+        for kernel in [pocketsPair, pocketsFused]:
+            result = np.empty((len(triples), 4))
+            results.append(result)
+            kernel(spheres, triples, result) # kompilieren
+            start = time.time()
+            found = kernel(spheres, triples, result)
+            elapsed_time = time.time() - start
+            print(f"{kernel.__name__}: {len(triples)} Dreierkombinationen, {found} Pockets, "
+                  f"{elapsed_time / len(triples) * 1e9:.1f} ns pro Dreierkombination")
+        pair = ~np.isnan(results[0][:, 2])
+        fused = ~np.isnan(results[1][:, 2])
+        k1, k2, k3 = spheres[triples[:, 0]], spheres[triples[:, 1]], spheres[triples[:, 2]]
+        touching = np.isclose(np.linalg.norm(k3[:, :3] - k1[:, :3], axis=1), 2 * k1[:, 3], rtol=1e-6) \
+            & np.isclose(np.linalg.norm(k3[:, :3] - k2[:, :3], axis=1), 2 * k1[:, 3], rtol=1e-6)
+        print(f"verschieden entschieden: {(pair != fused).sum()}, davon berührt Kugel 3 die Kugeln 1 und 2: "
+              f"{(touching & (pair != fused)).sum()}")
+        assert np.all(touching | (pair == fused))
+        both = pair & fused
+        assert np.allclose(results[0][both], results[1][both], rtol=0, atol=1e-6 * self.inp._radius)
+
+    def variablePacking(self, x=60, y=60, z=30, minRadius=5., maxRadius=8., **eingaben):
+        """
+        Kugelpackung aus Kugeln unterschiedlicher Größe auf einer Initialisierungsebene aus initPlane (Kugeln mit Radius
+        maxRadius), ohne Ein- und Ausgabedateien. Die Radien werden mit dem Startwert 0 gezogen.
+
+        :param x, y, z: int - Raumgröße
+        :param minRadius, maxRadius: float - kleinster und größter Radius
+        :param eingaben: Eingabedaten aus VariableSizedInput, die überschrieben werden (z. B. _pocketSearch='bound')
+        :return: VariableSizedPacking - fertige Kugelpackung
+        """
+        inp = VariableSizedInput(self.eingabe)
+        inp._x, inp._y, inp._z = x, y, z
+        inp._minRadius, inp._maxRadius = minRadius, maxRadius
+        inp._seed = 0
+        for name, wert in eingaben.items():
+            setattr(inp, name, wert)
+        kupa = VariableSizedPacking(inp)
+        plane = initPlane(x, y, maxRadius)
+        kupa.reserveSpheres(len(plane))
+        kupa.spheres[:len(plane)] = plane
+        kupa.countSpheres = len(plane)
+        kupa.startPacking()
+        kupa.placementLoop()
+        return kupa
+
+    def testPocketSearch(self):
+        """
+        Die Pocketsuchen 'bound' und 'parallel' müssen dieselbe Kugelpackung liefern wie 'scan', mit und ohne
+        Pocket-Cache (bei float32 werden auch neu berechnete Pockets wie im Cache gerundet).
+        """
+        for radiusBins, pocketDtype in [(0, 'float64'), (30, 'float64'), (30, 'float32')]:
+            spheres = {}
+            for search in ['scan', 'bound', 'parallel']:
+                kupa = self.variablePacking(_pocketSearch=search, _radiusBins=radiusBins, _pocketDtype=pocketDtype)
+                spheres[search] = kupa.spheres[:kupa.countSpheres].copy()
+                print(f"{search}, Radiusklassen {radiusBins}, {pocketDtype}: {kupa.countSpheres} Kugeln, "
+                      f"{kupa.counts[0]} Aufrufe calcPocket")
+            assert np.array_equal(spheres['scan'], spheres['bound'])
+            assert np.array_equal(spheres['scan'], spheres['parallel'])
+
+    def testSnapshot(self):
+        """
+        Eine aus ihrem letzten Snapshot fortgesetzte Kugelpackung muss dieselbe Kugelpackung liefern wie die
+        Kugelpackung ohne Abbruch.
+        """
+        kupa = self.variablePacking(_snapshotInterval=10, _suffix='_test_snapshot')
+        snapshot = kupa.fileName("_snapshot.pkl")
+        fortgesetzt = readSnapshot(snapshot)
+        os.remove(snapshot)
+        print(f"Snapshot mit {fortgesetzt.countSpheres} von {kupa.countSpheres} Kugeln")
+        assert fortgesetzt.countSpheres < kupa.countSpheres
+        fortgesetzt.placementLoop()
+        assert np.array_equal(kupa.spheres[:kupa.countSpheres], fortgesetzt.spheres[:fortgesetzt.countSpheres])
+
+    def testBatchPlacement(self):
+        """
+        Die Stapelplatzierung muss dieselbe Kugelpackung liefern wie die Platzierung einzelner Kugeln.
+        """
+        for eingaben in [dict(_pocketSearch='scan'), dict(_pocketSearch='bound', _radiusBins=30),
+                         dict(_pocketSearch='parallel'), dict(_pocketCandidates='triangulation')]:
+            spheres = {}
+            for batchSize in [1, 4]:
+                kupa = self.variablePacking(minRadius=3., _batchSize=batchSize, **eingaben)
+                spheres[batchSize] = kupa.spheres[:kupa.countSpheres].copy()
+                print(f"{eingaben}, Batchplatzierung {batchSize}: {kupa.countSpheres} Kugeln")
+            assert np.array_equal(spheres[1], spheres[4])
+
+    def testSaturation(self):
+        """
+        Auch ohne Pocket-Cache (Radiusklassen 0) endet die Platzierungsschleife, sobald keine Pocket mehr eine Kugel mit
+        dem kleinsten Radius aufnehmen kann, und nicht erst nach loopLimit erfolglosen Durchläufen.
+        """
+        kupa = self.variablePacking(_radiusBins=0)
+        print(f"{kupa.countSpheres} Kugeln, {kupa.countPockets} Pockets, {kupa.loopCounter} Durchläufe seit der letzten "
+              f"Platzierung (loopLimit {kupa.loopLimit:.1f})")
+        assert kupa.saturated()
+        assert kupa.loopCounter < kupa.loopLimit
+
+    def testDecomposedPacking(self):
+        """
+        Eine zerlegte Kugelpackung aus 2x2 Kacheln darf an keiner Naht zu große Überlappungen enthalten: jedes Kugelpaar
+        (außer zwei Kugeln der Initialisierungsebene) wird nach der Methode 'single' geprüft. Jede platzierte Kugel muss
+        auf drei vorhandenen Erzeugendenkugeln mit kleinerem Index liegen (sie berühren oder überschneiden). Die
+        Bereiche werden in einem Prozess gepackt.
+        """
+        inp = VariableSizedInput(self.eingabe)
+        inp._x, inp._y, inp._z = 100, 100, 30
+        inp._minRadius, inp._maxRadius = 4., 8.
+        inp._seed = 0
+        inp._methodOverlap = 'single'
+        inp._tiles = (2, 2)
+        inp._processes = 1
+        kupa = DecomposedPacking(inp)
+        plane = initPlane(inp._x, inp._y, inp._maxRadius)
+        kupa.reserveSpheres(len(plane))
+        kupa.spheres[:len(plane)] = plane
+        kupa.countSpheres = len(plane)
+        kupa.packTiles()
+        spheres = kupa.spheres[:kupa.countSpheres]
+        print(f"Kacheln 2x2: {kupa.countSpheres} Kugeln")
+        assert kupa.countSpheres > len(plane)
+        generators = kupa.sphereGenerators[len(plane):kupa.countSpheres]
+        index = np.arange(len(plane), kupa.countSpheres)[:, None]
+        assert np.all((generators >= 0) & (generators < index))
+        gap = np.linalg.norm(spheres[generators, :3] - spheres[index, :3], axis=2) \
+            - spheres[generators, 3] - spheres[index, 3]
+        assert np.all(gap <= 1e-6 * inp._minRadius), np.max(gap)
+        for i in range(len(plane), kupa.countSpheres):
+            for j in range(i):
+                ovl = calcOverlap(spheres[i], spheres[j])
+                assert ovl / sphereVolume(spheres[i, 3]) <= inp._pOverlap * (1 + 1e-9) \
+                    and ovl / sphereVolume(spheres[j, 3]) <= inp._pOverlap * (1 + 1e-9), (i, j)
+
+    def testPeriodicPacking(self):
+        """
+        Eine periodische Kugelpackung darf auch über die Ränder keine zu großen Überlappungen enthalten: alle
+        Kugelpaare werden mit dem Abstand zum nächstgelegenen Bild geprüft (außer zwei Kugeln der Initialisierungsebene,
+        die sich innerhalb des Raumes überschneiden). Gleich große Kugeln dürfen sich nicht überschneiden, bei
+        unterschiedlich großen Kugeln gilt die Methode 'single'.
+        """
+        inp = VariableSizedInput(self.eingabe)
+        inp._x, inp._y, inp._z = 80, 80, 30
+        inp._minRadius, inp._maxRadius = 5., 8.
+        inp._seed = 0
+        inp._methodOverlap = 'single'
+        inp._periodic = True
+        kupa = VariableSizedPacking(inp)
+        plane = initPlane(inp._x, inp._y, inp._maxRadius)
+        kupa.reserveSpheres(len(plane))
+        kupa.spheres[:len(plane)] = plane
+        kupa.countSpheres = len(plane)
+        kupa.wrapInitialSpheres()
+        countInitial = kupa.countSpheres
+        kupa.startPacking()
+        kupa.placementLoop()
+        overlaps = periodicOverlaps(kupa.spheres[:kupa.countSpheres], kupa.period, countInitial)
+        print(f"unterschiedlich große Kugeln: {countInitial} Kugeln der Initialisierungsebene, {kupa.countSpheres} "
+              f"Kugeln, {len(overlaps)} Überschneidungen")
+        for i, j, d, relative in overlaps:
+            assert relative <= kupa.pOverlap * (1 + 1e-9), (i, j)
+
+        self.inp._x, self.inp._y, self.inp._z = 150, 150, 60
+        self.inp._periodic = True
+        self.kupa = EquallySizedPacking(self.inp)
+        plane = initPlane(self.inp._x, self.inp._y, self.inp._radius)
+        self.kupa.reserveSpheres(len(plane))
+        self.kupa.spheres[:len(plane)] = plane
+        self.kupa.countSpheres = len(plane)
+        self.kupa.wrapInitialSpheres()
+        countInitial = self.kupa.countSpheres
+        self.kupa.initPocketList()
+        self.kupa.runDepositionLoop()
+        overlaps = periodicOverlaps(self.kupa.spheres[:self.kupa.countSpheres], self.kupa.period, countInitial)
+        print(f"gleich große Kugeln: {countInitial} Kugeln der Initialisierungsebene, {self.kupa.countSpheres} Kugeln")
+        for i, j, d, relative in overlaps:
+            assert d >= -0.0001, (i, j)
+
     def test(self):
-        self.testRuntime()
+        """
+        Ausführen aller Tests mit Prüfungen, jeder mit neu eingelesenen Eingabedaten (die Tests ändern self.inp).
+        """
+        for name in ['testPocketKernel', 'testPocketSearch', 'testSnapshot', 'testBatchPlacement', 'testSaturation',
+                     'testDecomposedPacking', 'testPeriodicPacking']:
+            self.inp = EquallySizedInput(self.eingabe)
+            getattr(self, name)()
+            print(f"{name}: ok")
+
+@jit(nopython=True)
+def pocketsPair(spheres, triples, result):
+    """
+    Berechnung der Pockets aller Dreierkombinationen mit pocketPossibleAlt und calculatePocket.
+
+    :param spheres: np.array((n, 4), dtype=float) - Kugelliste
+    :param triples: np.array((m, 3), dtype=int) - Indizes der Erzeugendenkugeln
+    :param result: np.array((m, 4), dtype=float) - berechnete Pockets (NaN: keine Pocket möglich)
+    :return: int - Anzahl möglicher Pockets
+    """
+    found = 0
+    for t in range(len(triples)):
+        k1, k2, k3 = spheres[triples[t, 0]], spheres[triples[t, 1]], spheres[triples[t, 2]]
+        result[t, :] = np.nan
+        if pocketPossibleAlt(k1, k2, k3):
+            temp = calculatePocket(k1, k2, k3)
+            if temp is not None:
+                result[t, :] = temp
+                found += 1
+    return found
+
+@jit(nopython=True)
+def pocketsFused(spheres, triples, result):
+    """
+    Berechnung der Pockets aller Dreierkombinationen mit equalSizedPocket.
+
+    :param spheres: np.array((n, 4), dtype=float) - Kugelliste
+    :param triples: np.array((m, 3), dtype=int) - Indizes der Erzeugendenkugeln
+    :param result: np.array((m, 4), dtype=float) - berechnete Pockets (NaN: keine Pocket möglich)
+    :return: int - Anzahl möglicher Pockets
+    """
+    found = 0
+    for t in range(len(triples)):
+        possible, px, py, pz, pr = equalSizedPocket(spheres[triples[t, 0]], spheres[triples[t, 1]],
+                                                    spheres[triples[t, 2]])
+        result[t, :] = np.nan
+        if possible:
+            result[t, 0], result[t, 1], result[t, 2], result[t, 3] = px, py, pz, pr
+            found += 1
+    return found
+
+def periodicOverlaps(spheres, period, countInitial):
+    """
+    Alle sich überschneidenden Kugelpaare einer periodischen Kugelpackung, Abstände zum nächstgelegenen Bild. Paare
+    aus zwei Kugeln der Initialisierungsebene werden nur berücksichtigt, wenn sie sich über den Rand überschneiden.
+
+    :param spheres: np.array((n, 4), dtype=float) - Kugelliste
+    :param period: np.array(2, dtype=float) - Periode in x- und y-Richtung
+    :param countInitial: int - Anzahl Kugeln der Initialisierungsebene (am Anfang der Kugelliste)
+    :return: Liste aus (int, int, float, float) - Indizes, Abstand der Kugeloberflächen und größter relativer Überlapp
+    """
+    diff = spheres[:, None, :3] - spheres[None, :, :3]
+    image = diff.copy()
+    image[:, :, :2] -= period * np.round(diff[:, :, :2] / period)
+    d = np.linalg.norm(image, axis=2) - (spheres[:, 3, None] + spheres[None, :, 3])
+    overlaps = []
+    for i, j in zip(*np.nonzero(d < 0)):
+        if i >= j or (j < countInitial and np.array_equal(image[i, j], diff[i, j])):
+            continue
+        k = spheres[j].copy()
+        k[:3] = spheres[i, :3] - image[i, j] # Bild der Kugel j, das Kugel i am nächsten liegt
+        ovl = calcOverlap(spheres[i], k)
+        overlaps.append((i, j, d[i, j], max(ovl / sphereVolume(spheres[i, 3]), ovl / sphereVolume(k[3]))))
+    return overlaps
+
+def borderlineTriples(radius, count=200, seed=0):
+    """
+    Grenzfälle der Pocketberechnung aus 3 gleich großen Kugeln, je 3 aufeinanderfolgende Kugeln bilden eine
+    Dreierkombination (zufällig gedreht und verschoben): Kugeln, die sich paarweise berühren, Umkreisradius
+    2 * radius * (1 +- 1e-6), Abstand der Kugeln 1 und 2 von sqrt(12) * radius * (1 +- 1e-9) (h = radius), Kugeln auf
+    einer Geraden und Dreiecke in einer senkrechten Ebene.
+
+    :param radius: float - Kugelradius
+    :param count: int - Anzahl Dreierkombinationen je Grenzfall
+    :param seed: int - Startwert des Zufallszahlengenerators
+    :return: np.array((3m, 4), dtype=float) - Kugeln der Dreierkombinationen
+    """
+    rng = np.random.default_rng(seed)
+    r = radius
+    triangles = []
+    for i in range(count):
+        triangles.append(rng.permutation([[0, 0, 0], [2 * r, 0, 0], [r, np.sqrt(3) * r, 0]]))
+        for eps in [-1e-6, 1e-6]:
+            angle = np.sort(rng.uniform(0, 2 * np.pi, 3))
+            triangles.append(2 * r * (1 + eps) * np.stack([np.cos(angle), np.sin(angle), np.zeros(3)], axis=1))
+        for eps in [-1e-9, 1e-9]:
+            a = np.sqrt(12) * r * (1 + eps)
+            triangles.append([[0, 0, 0], [a, 0, 0], [a / 2 + rng.normal(), rng.uniform(2, 3) * r, rng.normal()]])
+        triangles.append([[0, 0, 0], [2 * r, 0, 0], [(4 + i % 3 - 1) * r, 0, 0]])
+    spheres = []
+    for triangle in triangles:
+        rotation = np.linalg.qr(rng.normal(size=(3, 3)))[0]
+        spheres += [[*point, r] for point in np.asarray(triangle) @ rotation.T + rng.uniform(0, 100, 3)]
+    for i in range(count): # senkrechte Ebene (n[2] = 0), ohne Drehung
+        spheres += [[0, 0, 50, r], [0, 2 * r, 50, r], [0, r, 50 + (1 + i / count) * r, r]]
+    return np.array(spheres)
+
+def initPlane(x, y, radius, eps=0.2, seed=1):
+    """
+    Erzeugt eine Initialisierungsebene wie untersteEbeneFuellen in Kugelpackung.java: Kugeln in versetzten Reihen
+    mit dem Abstand eps * radius, zufällig um bis zu eps * radius verschoben.
+
+    :param x: int - Raumgröße in x-Richtung
+    :param y: int - Raumgröße in y-Richtung
+    :param radius: float - Kugelradius
+    :param eps: float - Abstand zwischen den Kugeln
+    :param seed: int - Startwert des Zufallszahlengenerators
+    :return: np.array((n, 4), dtype=float) - Kugeln der Initialisierungsebene
+    """
+    rng = np.random.default_rng(seed)
+    spheres = []
+    i = 0
+    px = radius * eps
+    while px <= x - radius * eps:
+        py = radius * eps if i % 2 == 0 else radius + eps * radius
+        while py <= y - radius * eps:
+            move = (-1 + 2 * rng.random(3)) * radius * eps
+            spheres.append([px + move[0], py + move[1], radius + move[2], radius])
+            py += 2 * radius + eps * radius
+        i += 1
+        px += 2 * radius * np.sin(np.radians(60)) + eps * radius
+    return np.array(spheres)
 
-t = Test()
-t.test()
\ No newline at end of file
+if __name__ == '__main__': # nicht in den Prozessen einer zerlegten Kugelpackung (sie importieren das Hauptmodul)
+    t = Test()
+    t.test()
@@ -27,6 +27,8 @@ class TestPocketBerechnung:#(unittest.TestCase):
         #self.test_optimization()
         #self.drawRadikand()
         #self.testRadikand()
+        #self.test_pocketsBatch()
+        #self.test_pocketsCached()
 
     def load_test_data(self):
         datentyp = {"test": str, "x1": str, "y1": str, "z1": str, "r1": str, "x2": str, "y2": str, "z2": str, "r2": str,
@@ -79,6 +81,84 @@ class TestPocketBerechnung:#(unittest.TestCase):
                 #funk.generateCSV(kugeln, "geometrisch_opt")
         print("Zeit", time.time() - start)
 
+    def test_pocketsBatch(self):
+        """
+        Vergleich von calcPocketBatch mit calcPocket für alle Testfälle aus testdata.xlsx.
+
+        Die kompilierte Schleife muss für jede Zeile denselben Erfolg, denselben Status und dieselbe Pocket liefern wie
+        ein einzelner Aufruf von calcPocket.
+        """
+        p1 = self.data[['x1', 'y1', 'z1', 'r1']].to_numpy(dtype=float)
+        p2 = self.data[['x2', 'y2', 'z2', 'r2']].to_numpy(dtype=float)
+        p3 = self.data[['x3', 'y3', 'z3', 'r3']].to_numpy(dtype=float)
+        r4 = self.data['r4'].to_numpy(dtype=float)
+        success, pockets, status = funk.calcPocketBatch(p1, p2, p3, r4, 0.01, 'average')
+        fehler = []
+        for k, row in self.data.iterrows():
+            ok, p41, case = self.calcPocketReferenz(p1[k], p2[k], p3[k], r4[k], 0.01, 'average')
+            equal = ok == success[k] and case == status[k] and (not ok or np.array_equal(p41, pockets[k]))
+            print(f"{row['test']}: {SpecialCase(status[k]).name} {'ok' if equal else 'FEHLER'}")
+            if not equal:
+                fehler.append(row['test'])
+        assert not fehler, f"calcPocketBatch weicht von calcPocket ab: {fehler}"
+
+    def test_pocketsCached(self, anzahl=20000, seed=0):
+        """
+        Vergleich von calcPocketCached mit calcPocket für die Testfälle aus testdata.xlsx und zufällige
+        Dreierkombinationen.
+
+        Die Invarianten werden je Dreierkombination einmal mit calcInvariants berechnet und für mehrere Radien r4
+        verwendet. Erfolg, Status und Pocket müssen bitgleich mit calcPocket sein.
+
+        :param anzahl: int - Anzahl zufälliger Dreierkombinationen
+        :param seed: int - Startwert des Zufallsgenerators
+        """
+        rng = np.random.default_rng(seed)
+        p = np.empty((anzahl, 3, 4))
+        p[:, :, :3] = rng.uniform(0, 20, (anzahl, 3, 3))
+        p[:, :, 3] = rng.uniform(1, 10, (anzahl, 3))
+        # ein Teil der Dreierkombinationen liegt (annähernd) auf einer Geraden
+        gerade = rng.random(anzahl) < 0.05
+        t = rng.uniform(0, 2, (gerade.sum(), 1))
+        p[gerade, 2, :3] = p[gerade, 0, :3] + t * (p[gerade, 1, :3] - p[gerade, 0, :3])
+        testdaten = np.stack([self.data[[f'x{i}', f'y{i}', f'z{i}', f'r{i}']].to_numpy(dtype=float)
+                              for i in (1, 2, 3)], axis=1)
+        p = np.concatenate([testdaten, p])
+        radien = np.concatenate([self.data['r4'].to_numpy(dtype=float), rng.uniform(1, 10, anzahl)])
+        fehler = []
+        faelle = np.zeros(len(SpecialCase), dtype=int)
+        inv = np.empty(funk.NUM_INVARIANTS)
+        for k in range(len(p)):
+            funk.calcInvariants(p[k, 0], p[k, 1], p[k, 2], inv)
+            for r4 in (radien[k], 0.5 * radien[k], 2 * radien[k]):
+                for method in ('single', 'average'):
+                    ok, p41, case = self.calcPocketReferenz(p[k, 0], p[k, 1], p[k, 2], r4, 0.01, method)
+                    ok2, p42, case2 = funk.calcPocketCached(p[k, 0], p[k, 1], p[k, 2], r4, 0.01, method, inv)
+                    faelle[case] += 1
+                    if ok != ok2 or case != case2 or (ok and not np.array_equal(p41, p42)):
+                        fehler.append((k, r4, method))
+        print('Fälle:', {SpecialCase(i).name: int(n) for i, n in enumerate(faelle) if n})
+        assert not fehler, f"calcPocketCached weicht von calcPocket ab: {fehler[:10]}"
+
+    @staticmethod
+    def calcPocketReferenz(p1, p2, p3, r4, pOverlap, methodOverlap):
+        """
+        Aufruf von calcPocket, bei dem Exceptions wie in calcPocketStatus auf Statuswerte abgebildet werden.
+
+        :return: Boolean, np.array([x, y, z, r], dtype=float), int - Erfolg, Pocketposition und -radius, Statuswert
+        """
+        try:
+            ok, p4, case = funk.calcPocket(p1, p2, p3, r4, pOverlap, methodOverlap)
+            return ok, p4, case.value
+        except OverlapException:
+            return False, np.zeros(4), SpecialCase.OVERLAPCALCPOC.value
+        except StraightException:
+            return False, np.zeros(4), SpecialCase.STRAIGHT.value
+        except SpacingException:
+            return False, np.zeros(4), SpecialCase.NOROOT.value
+        except UnknownError:
+            return False, np.zeros(4), SpecialCase.UNKNOWN.value
+
     def test_optimization(self):
         start = time.time()
         kugeln = []
@@ -15,6 +15,18 @@ einzulesene Werte aus Eingabedatei:
 - self._z: int - z-Dimension des Raumes
 - self._radius: float - Radius der Kugeln
 - self._suf: string - Zusatz zur Dateibezeichnung (optional)
+- self._radiusBins: int - Anzahl Radiusklassen für den Pocket-Cache (0: kein Cache)
+- self._pocketSearch: string - Suche der niedrigsten Pocket ('scan', 'bound' oder 'parallel')
+- self._pocketEngine: string - Pocketberechnung mit calcPocket ('python') oder calcPocketStatus ('numba')
+- self._pocketCandidates: string - Kandidaten für Pockets ('box' oder 'triangulation')
+- self._seed: int - Startwert für das Ziehen der Radien (None: zufälliger Startwert)
+- self._radiusTable: string - csv-Datei der Partikelgrößenverteilung bei Verteilung 'table'
+- self._batchSize: int - max. Anzahl Kugeln, die in einem Schleifendurchlauf platziert werden (Stapelplatzierung)
+- self._pocketDtype: string - Datentyp der gespeicherten Pocketkoordinaten ('float64' oder 'float32')
+- self._snapshotInterval: int - Anzahl platzierter Kugeln zwischen zwei Snapshots (0: kein Snapshot)
+- self._tiles: (int, int) - Anzahl Kacheln in x- und y-Richtung bei zerlegter Kugelpackung ((1, 1): nicht zerlegt)
+- self._processes: int - Anzahl Prozesse bei zerlegter Kugelpackung (0: Anzahl Prozessorkerne)
+- self._periodic: bool - periodische Ränder in x- und y-Richtung
 """
 
 from input import *
@@ -51,6 +63,19 @@ class VariableSizedInput(Input):
         self._beta_q = 2
         self._pOverlap = 0.05
         self._methodOverlap = 'single'
+        self._radiusBins = 0
+        self._pocketSearch = 'scan'
+        self._pocketEngine = 'python'
+        self._pocketCandidates = 'box'
+        self._seed = None
+        self._radiusTable = ''
+        self._batchSize = 1
+        self._pocketDtype = 'float64'
+        self._snapshotInterval = 0
+        self._tiles = (1, 1)
+        self._processes = 0
+        self._periodic = False
+        self._testcase = 0
         #self.eps = 5.0
         self._suf = ''
         self._suffix = ''
@@ -74,6 +99,19 @@ class VariableSizedInput(Input):
         print(f"Kugelradius: {self._minRadius} - {self._maxRadius}")
         print(f"prozentualer Überlapp: {self._pOverlap}")
         print(f"Verteilung: {self._distribution}")
+        print(f"Radiusklassen: {self._radiusBins}")
+        print(f"Pocketsuche: {self._pocketSearch}")
+        print(f"Pocketberechnung: {self._pocketEngine}")
+        print(f"Pocketkandidaten: {self._pocketCandidates}")
+        print(f"Startwert: {self._seed}")
+        print(f"Batchplatzierung: {self._batchSize}")
+        print(f"Pocketkoordinaten: {self._pocketDtype}")
+        print(f"Snapshotintervall: {self._snapshotInterval}")
+        print(f"Kacheln: {self._tiles[0]}x{self._tiles[1]}")
+        print(f"Prozesse: {self._processes}")
+        print(f"Periodisch: {self._periodic}")
+        if self._distribution == 'table':
+            print(f"Radiustabelle: {self._radiusTable}")
 
     def readInput(self):
         """
@@ -152,6 +190,9 @@ class VariableSizedInput(Input):
                         self._distribution = line.split(':')[1].strip() # Leerzeichen entfernen
                         if not (len(self._distribution) > 0):
                             self._distribution = 'uniform' # Default
+                        elif self._distribution not in ['uniform', 'beta', 'table']:
+                            self._distribution = 'uniform' # Default
+                            defined = False
                     elif line.startswith('Beta-Verteilung p'):
                         try:
                             temp = float(line.split(':')[1])
@@ -170,6 +211,89 @@ class VariableSizedInput(Input):
                                 defined = False  # Default
                         except ValueError:
                             defined = False # Default
+                    elif line.startswith('Radiusklassen'):
+                        try:
+                            temp = int(line.split(':')[1])
+                            if temp >= 0:
+                                self._radiusBins = temp
+                            else:
+                                defined = False # Default
+                        except ValueError:
+                            defined = False # Default
+                    elif line.startswith('Pocketsuche'):
+                        temp = line.split(':')[1].strip() # Leerzeichen entfernen
+                        if temp in ['scan', 'bound', 'parallel']:
+                            self._pocketSearch = temp
+                        else:
+                            defined = False # Default
+                    elif line.startswith('Pocketkandidaten'):
+                        temp = line.split(':')[1].strip() # Leerzeichen entfernen
+                        if temp in ['box', 'triangulation']:
+                            self._pocketCandidates = temp
+                        else:
+                            defined = False # Default
+                    elif line.startswith('Startwert'):
+                        temp = line.split(':')[1].strip() # Leerzeichen entfernen
+                        if len(temp) == 0 or temp == 'none':
+                            self._seed = None # zufälliger Startwert
+                        else:
+                            try:
+                                self._seed = int(temp)
+                            except ValueError:
+                                defined = False # Default
+                    elif line.startswith('Batchplatzierung'):
+                        try:
+                            temp = int(line.split(':')[1])
+                            if temp > 0:
+                                self._batchSize = temp
+                            else:
+                                defined = False # Default
+                        except ValueError:
+                            defined = False # Default
+                    elif line.startswith('Snapshotintervall'):
+                        try:
+                            temp = int(line.split(':')[1])
+                            if temp >= 0:
+                                self._snapshotInterval = temp
+                            else:
+                                defined = False # Default
+                        except ValueError:
+                            defined = False # Default
+                    elif line.startswith('Kacheln'):
+                        try:
+                            temp = tuple(int(v) for v in line.split(':')[1].lower().split('x'))
+                            if len(temp) == 2 and min(temp) > 0:
+                                self._tiles = temp
+                            else:
+                                defined = False # Default
+                        except ValueError:
+                            defined = False # Default
+                    elif line.startswith('Prozesse'):
+                        try:
+                            temp = int(line.split(':')[1])
+                            if temp >= 0:
+                                self._processes = temp
+                            else:
+                                defined = False # Default
+                        except ValueError:
+                            defined = False # Default
+                    elif line.startswith('Periodisch'):
+                        # true: periodische Ränder in x- und y-Richtung, alle anderen Eingaben ergeben false
+                        self._periodic = line.split(':')[1].strip() == 'true'
+                    elif line.startswith('Pocketkoordinaten'):
+                        temp = line.split(':')[1].strip() # Leerzeichen entfernen
+                        if temp in ('float64', 'float32'):
+                            self._pocketDtype = temp
+                        else:
+                            defined = False # Default
+                    elif line.startswith('Radiustabelle'):
+                        self._radiusTable = line.split(':', 1)[1].strip() # Leerzeichen entfernen
+                    elif line.startswith('Pocketberechnung'):
+                        temp = line.split(':')[1].strip() # Leerzeichen entfernen
+                        if temp in ['python', 'numba']:
+                            self._pocketEngine = temp
+                        else:
+                            defined = False # Default
                     elif line.startswith('suffix'):
                         self._suffix = line.split(':')[1].strip() # Leerzeichen entfernen
                         if len(self._suffix) > 0:
@@ -7,11 +7,18 @@ Klasse zum Erzeugen von Kugelpackungen aus Kugeln unterschiedlicher Größe.
 """
 
 # Module importieren
+import os
+import copy
+import numba
+from numba import jit, prange # Just-In-Time-Compiler
 import scipy.stats
 from scipy.stats import uniform, beta
 
 # eigene Module importieren
 from packing import *
+from hierarchicalGrid import HierarchicalGrid, gridCoord
+from radiusSource import RadiusSource
+from regularTriangulation import RegularTriangulation
 from funktionen import *
 from specialCases import SpecialCase, writeSpecialCase
 
@@ -32,19 +39,101 @@ class VariableSizedPacking(Packing):
         self.beta_q = input._beta_q
         self.pOverlap = input._pOverlap
         self.methodOverlap = input._methodOverlap
+        # Radien werden blockweise aus einem Zufallszahlengenerator mit dem Startwert [Startwert, Testcase] gezogen
+        seed = None if input._seed is None else [input._seed, input._testcase]
+        self.radiusSource = RadiusSource(self.minRadius, self.maxRadius, self.distribution, self.beta_p, self.beta_q,
+                                         seed, input._radiusTable)
         Packing.__init__(self, input)
 
         self.loopLimit = 1/16 * (self.x * self.y * self.z) / np.power(self.maxRadius, 3)
-        n = self.maxNumOfSpheres()
-        # max. Anzahl Pockets in einem Raum
-        self._numOfPockets = int(self.x * self.y)
-            #10 * self.x * self.y / (np.pi * np.power(self.minRadius, 2)))  ##TODO: wie viele Pockets max.?
+        # Anfangsgröße der Pocketliste, sie wird bei Bedarf verdoppelt (siehe reservePockets)
+        self._numOfPockets = INITIAL_CAPACITY
         # Feld aus Pockets
         # jede Zeile: [i1, i2, i3]
-        #   Index der Kugeln 1 bis 3, die eine mögliche Pocket darstellen
-        self.pockets = np.full((self._numOfPockets, 3), -1, dtype=int)
+        #   Index der Kugeln 1 bis 3, die eine mögliche Pocket darstellen (int32)
+        self.pockets = np.full((self._numOfPockets, 3), -1, dtype=np.int32)
         self.countPockets = 0  # Zähler, wie viele Pockets belegt sind
+        # Anzahl Pockets am Anfang der Pocketliste, die nach Erzeugendenkugel 1 sortiert sind (siehe deletePockets)
+        self.sortedPockets = 0
         self.countCalcPockets = 0
+        # Kandidaten für Pockets:
+        #   'box': alle Paare entfernter Nachbarn einer Kugel (Quaderfilter), die pocketPossible erfüllen
+        #   'triangulation': nur Dreiecke der regulären Triangulierung der Kugelmittelpunkte (siehe
+        #                    regularTriangulation.py), die pocketPossible erfüllen
+        self.pocketCandidates = input._pocketCandidates
+        self.triangulation = None
+        # neue Pockets der platzierten Kugeln, die noch nicht in die Pocketliste eingetragen sind (siehe placeSphere)
+        self.newTriples = []
+        # max. Anzahl Kugeln je Schleifendurchlauf (Stapelplatzierung, siehe generatePacking)
+        self.batchSize = input._batchSize
+        # Snapshot des gesamten Zustands alle self.snapshotInterval platzierten Kugeln (0: kein Snapshot), siehe
+        # continuePacking
+        self.snapshotInterval = input._snapshotInterval
+        # Eingabedaten dieses Testcases (Kopie, der Generator ändert die Testcase-Nummer der Eingabedaten), aus denen
+        # nach dem Fortsetzen eines Snapshots die übrigen Testcases erzeugt werden (siehe generator.py) und die eine
+        # zerlegte Kugelpackung an ihre Prozesse übergibt (siehe decomposedPacking.py)
+        self.input = copy.copy(input)
+        # hierarchisches Gitter der platzierten Kugeln (eine Ebene je Radiusklasse, siehe hierarchicalGrid.py) für alle
+        # Nachbarsuchen: Kugeln, die eine Pocket überschneiden (pocketValid), und entfernte Nachbarkugeln (Abstand der
+        # Mittelpunkte kleiner r_i + r_j + 2 * self.maxRadius, siehe neighborPairs)
+        self.grid = HierarchicalGrid(self.x, self.y, self.z, self.minRadius, self.maxRadius, len(self.spheres),
+                                     self.period)
+        # Erzeugendenkugeln der Pocket, in der jede Kugel platziert wurde (Indizes in self.spheres, -1: Kugel der
+        # Initialisierungsebene oder vorgegebene Kugel), auf ihnen liegt die Kugel auf (siehe decomposedPacking.py)
+        self.sphereGenerators = np.full((len(self.spheres), 3), -1, dtype=np.int32)
+        if self.periodic:
+            # jede Kugel darf bei der Suche nach entfernten Nachbarn (halbe Kantenlänge des Suchquaders bis
+            # 4 * self.maxRadius) nur unter einer Verschiebung gefunden werden
+            if min(self.x, self.y) < 8 * self.maxRadius:
+                raise ValueError(f"periodischer Raum zu klein: {min(self.x, self.y)} < {8 * self.maxRadius}")
+            if self.pocketCandidates == 'triangulation':
+                raise ValueError("Pocketkandidaten 'triangulation' unterstützen keine periodischen Ränder")
+        # Bereich, in dem der Mittelpunkt einer neuen Kugel liegen darf: [x_min, x_max, y_min, y_max, z_min, z_max]
+        # (ganzer Raum, bei zerlegten Kugelpackungen eine Kachel oder ein Nahtstreifen, siehe decomposedPacking.py)
+        self.bounds = np.array([0., self.x, 0., self.y, 0., self.z])
+
+        # Suche der niedrigsten Pocket:
+        #   'scan': alle Pockets werden berechnet
+        #   'bound': wie 'scan', aber Pockets, deren untere Schranke self.pocketBound über der bisher niedrigsten
+        #            gültigen Pocket liegt, werden nicht berechnet, wenn calcPocket sie nicht löschen kann (siehe
+        #            deletable)
+        #   'parallel': wie 'scan', aber in self.scanChunks Abschnitten parallel (siehe scanParallel)
+        self.pocketSearch = input._pocketSearch
+        self.scanChunks = 4 * numba.get_num_threads()
+        # Pocketberechnung: 'python' (calcPocket) oder 'numba' (calcPocketCached)
+        self.pocketEngine = input._pocketEngine
+        # untere Schranke der z-Koordinate jeder Pocket mit Radius r4: self.pocketBound - r4 * self.pocketSlope
+        # (siehe lowerBound)
+        self.pocketBound = np.zeros(self._numOfPockets, dtype=float)
+        self.pocketSlope = np.ones(self._numOfPockets, dtype=float)
+        # kleinster Radius, für den calcPocket nicht mit SpecialCase.DISTANCE abbricht (siehe reachRadius)
+        self.pocketMinRadius = np.zeros(self._numOfPockets, dtype=float)
+        # kleinster Radius, den die Pocket aufnehmen kann (siehe hostRadius). Pockets, die keinen Radius bis
+        # self.maxRadius aufnehmen können, werden nicht eingetragen.
+        self.pocketHostRadius = np.zeros(self._numOfPockets, dtype=float)
+        # vom Radius unabhängige Größen der Pocketberechnung je Pocket (Spalten siehe INV_* in funktionen.py), werden
+        # beim Anlegen einer Pocket einmal berechnet und von calcPocketCached verwendet
+        self.pocketInvariants = np.zeros((self._numOfPockets, NUM_INVARIANTS), dtype=float)
+
+        # Pocket-Cache: Radien werden in self.radiusBins gleich breite Klassen eingeteilt und auf die Klassenmitte
+        # gerundet. Das Ergebnis von calcPocket hängt nur von den 3 Erzeugendenkugeln und dem Radius ab und wird je
+        # Pocket (Zeile in self.pockets) und Klasse gespeichert. Ob eine berechnete Pocket gültig ist, ändert sich nur,
+        # wenn in ihrer Umgebung eine neue Kugel platziert wird (siehe invalidateCache).
+        self.radiusBins = input._radiusBins
+        if self.radiusBins > 0:
+            width = (self.maxRadius - self.minRadius) / self.radiusBins
+            self.binRadius = self.minRadius + (np.arange(self.radiusBins) + 0.5) * width # Radius je Klasse
+            # SpecialCase-Wert des Ergebnisses von calcPocket (-1: nicht berechnet)
+            self.cacheCase = np.full((self._numOfPockets, self.radiusBins), -1, dtype=np.int8)
+            self.cacheSuccess = np.zeros((self._numOfPockets, self.radiusBins), dtype=bool)
+            # berechnete Pocket [x, y, z, r] im Datentyp aus der Eingabe (float64 oder float32). Auch neu berechnete
+            # Pockets werden vor der Prüfung auf diesen Datentyp gerundet (siehe roundPocket), sonst hinge die
+            # Kugelpackung davon ab, ob eine Pocket aus dem Cache gelesen wird.
+            self.cachePocket = np.zeros((self._numOfPockets, self.radiusBins, 4), dtype=input._pocketDtype)
+            self.cacheValid = np.zeros((self._numOfPockets, self.radiusBins), dtype=bool) # True: pocketValid erfüllt
+            # Radiusklassen, für die seit der letzten Platzierung keine Pocket gefunden wurde. Ohne neue Kugel kann sich
+            # daran nichts ändern (die Pocketliste wird nur kleiner), diese Radien werden ohne Suche verworfen.
+            self.deadBins = np.zeros(self.radiusBins, dtype=bool)
 
     def maxNumOfSpheres(self):
         """
@@ -64,8 +153,10 @@ class VariableSizedPacking(Packing):
             expectedRadius = self.maxRadius
         elif self.distribution == 'uniform':
             expectedRadius = uniform(loc=self.minRadius, scale=self.maxRadius-self.minRadius).mean()
-        else: # self.distribution == 'beta'
+        elif self.distribution == 'beta':
             expectedRadius = beta(self.beta_p, self.beta_q).expect(lambda x: (self.maxRadius - self.minRadius) * x + self.minRadius)
+        else: # self.distribution == 'table'
+            expectedRadius = self.radiusSource.mean()
 
         # Raumvolumen v_r:
         # bei Platzierung ist entscheidend, ob Mittelpunkt im Raum liegt
@@ -80,49 +171,39 @@ class VariableSizedPacking(Packing):
         """
         Prüft, ob die übergebene Pocket gültig ist.
 
-        Eine Pocket ist gültig, wenn der Mittelpunkt innerhalb des Raumes mit den Seitenlängen x, y und z liegt
-        und die Überlappung einer Pocket mit einer bereits existierenden Kugeln nicht zu groß ist.
+        Eine Pocket ist gültig, wenn der Mittelpunkt innerhalb des Bereichs self.bounds (ganzer Raum mit den
+        Seitenlängen x, y und z) liegt und die Überlappung einer Pocket mit einer bereits existierenden Kugeln nicht zu
+        groß ist. Die Kugeln in der Umgebung der Pocket werden über das hierarchische Gitter self.grid gefunden (siehe
+        validPocket). Bei periodischen Rändern wird der Bereich nur in z-Richtung geprüft.
 
-        Eine
         :param pocket: np.array(4, dtype=float) - [x, y, z, r]
             x, y und z: Position Mittelpunkt Pocket
             r: Radius Pocket
-        :return: bool - true, wenn Pocket gültig
-        """
-        if (pocket[0] < 0) or (pocket[0] > self.x) or (pocket[1] < 0) or (pocket[1] > self.y) or (pocket[2] < 0) \
-                or (pocket[2] > self.z):
-            #print("außerhalb Raum")
-            return False, 0 # Mittelpunkt der Pocket liegt nicht im Raum
-        # Überprüfung: Überschneidung Pocket mit einer bereits platzierten Kugel
-        dist = pocket[3] + self.maxRadius # max. Abstand, damit Kugeln benachbart sein können
-        # Bedingungen, die erfüllt sein müssen, damit Kugel entfernte Nachbarkugel der neuen Kugel sein kann
-        con1 = (self.spheres[:, 0] > pocket[0] - (self.spheres[:, 3] + pocket[3])) \
-               & (self.spheres[:, 0] < pocket[0] + (self.spheres[:, 3] + pocket[3]))
-        con2 = (self.spheres[:, 1] > pocket[1] - (self.spheres[:, 3] + pocket[3])) \
-               & (self.spheres[:, 1] < pocket[1] + (self.spheres[:, 3] + pocket[3]))
-        con3 = (self.spheres[:, 2] > pocket[2] - (self.spheres[:, 3] + pocket[3])) \
-               & (self.spheres[:, 2] < pocket[2] + (self.spheres[:, 3] + pocket[3]))
-        con4 = (self.spheres[:, 0] >= 0) & (self.spheres[:, 1] >= 0) & (self.spheres[:, 2] >= 0)
-        # Anzahl Kugeln, die die Bedingungen (con1 - con4) (nicht) erfüllen
-        n = (con1 & con2 & con3 & con4).sum()
-        nr = len(self.spheres) - n  # (con1 & con2 & con3 & con4).sum() = Anzahl True in Array
-        # Indizes der Kugeln, die die Bedingungen (con1 - con4) erfüllen
-        indices = (con1 & con2 & con3 & con4).argsort()[nr:]
-
-        ovl = 0
-        vol = 0
-        for ind in indices:
-            if sphereDistance(self.spheres[ind], pocket) < 0:
-                if self.methodOverlap == 'average':
-                    ovl += calcOverlap(self.spheres[ind], pocket)
-                    vol += sphereVolume(self.spheres[ind, 3])
-                else: ## self.methodOverlap == 'single'
-                    ovl = calcOverlap(self.spheres[ind], pocket)
-                    if ovl / sphereVolume(self.spheres[ind, 3]) > self.pOverlap or ovl / sphereVolume(pocket[3]) > self.pOverlap:
-                        return False, 1
-        if self.methodOverlap == 'average' and ovl / vol > self.pOverlap:
-            return False, 1
-        return True, 0
+        :return: bool, int - true, wenn Pocket gültig, und 1, wenn die Pocket wegen zu großer Überlappung ungültig ist
+        """
+        grid = self.grid
+        return validPocket(pocket, self.spheres, grid.head, grid.next, grid.offset, grid.dims, grid.cellSize,
+                           grid.radius, self.bounds, self.period, self.pOverlap, self.methodOverlap)
+
+    def generatorSpheres(self, i1, i2, i3):
+        """
+        Erzeugendenkugeln einer oder mehrerer Pockets.
+
+        Bei periodischen Rändern werden die Kugeln 2 und 3 durch ihr Bild ersetzt, das Kugel 1 am nächsten liegt (siehe
+        periodic.py). Die daraus berechnete Pocket liegt bei Kugel 1 und kann außerhalb des Raumes liegen, sie wird erst
+        beim Platzieren in den Raum verschoben (siehe placeSphere).
+
+        :param i1, i2, i3: int oder np.array(m, dtype=int) - Indizes der Erzeugendenkugeln 1 bis 3
+        :return: np.array(4, dtype=float) oder np.array((m, 4), dtype=float) je Erzeugendenkugel
+        """
+        k1 = self.spheres[i1]
+        k2 = self.spheres[i2]
+        k3 = self.spheres[i3]
+        if self.periodic:
+            image = nearestImage if np.ndim(i1) == 0 else nearestImageRows
+            k2 = image(k2, k1, self.period)
+            k3 = image(k3, k1, self.period)
+        return k1, k2, k3
 
     def initPocketList(self):
         """
@@ -133,91 +214,704 @@ class VariableSizedPacking(Packing):
 
         :return: kein Rückgabewert
         """
-        for i in range(self.countSpheres):
-            dist = (self.spheres[:, 3] + self.spheres[i, 3] + 2 * self.maxRadius)
-            con1 = (self.spheres[:, 0] > self.spheres[i, 0] - dist) \
-                   & (self.spheres[:, 0] < self.spheres[i, 0] + dist)
-            con2 = (self.spheres[:, 1] > self.spheres[i, 1] - dist) \
-                   & (self.spheres[:, 1] < self.spheres[i, 1] + dist)
-            con3 = (self.spheres[:, 2] > self.spheres[i, 2] - dist) \
-                   & (self.spheres[:, 2] < self.spheres[i, 2] + dist)
-            con4 = (self.spheres[:, 0] >= 0) & (self.spheres[:, 1] >= 0) & (self.spheres[:, 2] >= 0)
-            # Anzahl Kugeln, die die Bedingungen (con1 - con4) (nicht) erfüllen
-            n = (con1 & con2 & con3 & con4).sum()
-            nr = len(self.spheres) - n  # (con1 & con2 & con3 & con4).sum() = Anzahl True in Array
-            # Indizes der Kugeln, die die Bedingungen (con1 - con4) erfüllen
-            indices = (con1 & con2 & con3 & con4).argsort()[nr:]
-            indices = indices[indices > i]
-
-            # mögliche dreier Kombinationen an Kugeln durchgehen
-            for ind1 in range(len(indices)):
-                for ind2 in range(ind1+1, len(indices)):
-                    idx1 = indices[ind1]
-                    idx2 = indices[ind2]
-                    if pocketPossible(self.spheres[i], self.spheres[idx1], self.spheres[idx2], self.maxRadius,
-                                              self.minRadius):
-                        self.pockets[self.countPockets] = np.array([i, idx1, idx2])
-                        self.countPockets += 1
+        if self.pocketCandidates == 'triangulation':
+            self.triangulation = RegularTriangulation(self.spheres[:self.countSpheres],
+                                                      (self.minRadius + self.maxRadius) / 2)
+            triples = [(i, idx1, idx2) for i, idx1, idx2 in self.triangulation.faces
+                       if pocketPossible(self.spheres[i], self.spheres[idx1], self.spheres[idx2], self.maxRadius,
+                                         self.minRadius)]
+        else:
+            triples = []
+            for i in range(self.countSpheres):
+                indices = self.distantNeighbors(i)
+                indices = indices[indices > i]
+
+                # mögliche dreier Kombinationen an Kugeln durchgehen
+                for ind1 in range(len(indices)):
+                    for ind2 in range(ind1+1, len(indices)):
+                        idx1 = indices[ind1]
+                        idx2 = indices[ind2]
+                        if pocketPossible(*self.generatorSpheres(i, idx1, idx2), self.maxRadius, self.minRadius):
+                            triples.append((i, idx1, idx2))
+        triples = np.array(triples, dtype=int).reshape(-1, 3)
+        invariants = np.empty((len(triples), NUM_INVARIANTS))
+        calcInvariantsRows(self.spheres, triples, self.period, invariants)
+        self.storePockets(triples, invariants)
 
     def updatePocketList(self):
         """
-        Pocketliste aktualisieren nachdem eine neue Kugel platziert wurde.
+        Pocketliste aktualisieren nachdem neue Kugeln platziert wurden.
 
-        Es müssen alle neuen Pockets (mögliche dreier Kombinationen an entfernten Nachbarkugeln) berechnet werden,
-        die sich aus der geraden platzierten Kugel und ihren entfernten Nachbarkugeln ergeben.
+        Die neuen Pockets (mögliche dreier Kombinationen an entfernten Nachbarkugeln), die sich aus jeder gerade
+        platzierten Kugel und ihren entfernten Nachbarkugeln ergeben, wurden bereits bei der Platzierung berechnet
+        (siehe placeSphere) und werden hier für alle Kugeln seit der letzten Aktualisierung eingetragen. Die neuen
+        Pockets jeder Kugel bis auf die letzte werden danach einsortiert (siehe deletePockets), wie nach der Suche, die
+        auf ihre Platzierung folgt. Die Pocketliste ist damit dieselbe wie bei der Aktualisierung nach jeder einzelnen
+        Kugel.
 
         :return: kein Rückgabewert
         """
-        # Nachbarn der neuen Kugel bestimmen
-        kugelId = self.countSpheres - 1 # Index der neusten platzierten Kugel
-        dist = (self.spheres[:kugelId, 3] + self.spheres[kugelId, 3] + 2 * self.maxRadius)
-        con1 = (self.spheres[:kugelId, 0] > self.spheres[kugelId, 0] - dist) \
-               & (self.spheres[:kugelId, 0] < self.spheres[kugelId, 0] + dist)
-        con2 = (self.spheres[:kugelId, 1] > self.spheres[kugelId, 1] - dist) \
-               & (self.spheres[:kugelId, 1] < self.spheres[kugelId, 1] + dist)
-        con3 = (self.spheres[:kugelId, 2] > self.spheres[kugelId, 2] - dist) \
-               & (self.spheres[:kugelId, 2] < self.spheres[kugelId, 2] + dist)
-        con4 = (self.spheres[:kugelId, 0] >= 0) & (self.spheres[:kugelId, 1] >= 0) & (self.spheres[:kugelId, 2] >= 0)
-        # Anzahl Kugeln, die die Bedingungen (con1 - con3) (nicht) erfüllen
-        n = (con1 & con2 & con3 & con4).sum()
-        #nr = len(self.spheres) - n  # (con1 & con2 & con3).sum() = Anzahl True in Array
-        nr = kugelId - n
-        # Indizes der Kugeln, die die Bedingungen (con1 - con3) erfüllen
-        indices = (con1 & con2 & con3 & con4).argsort()[nr:]
-
-        # mögliche dreier Kombinationen an Kugeln durchgehen
+        groups = self.newTriples
+        self.newTriples = []
         sum = 0
-        vorher = self.countPockets
-        for ind1 in range(len(indices)):
-            for ind2 in range(ind1 + 1, len(indices)):
-                idx1 = indices[ind1]
-                idx2 = indices[ind2]
-                if pocketPossible(self.spheres[kugelId], self.spheres[idx1], self.spheres[idx2], self.maxRadius,
-                                           self.minRadius):
-                    self.pockets[self.countPockets] = np.array([idx1, idx2, kugelId])
-                    self.countPockets += 1
-                    sum += 1
+        for k, (triples, invariants) in enumerate(groups):
+            if k > 0:
+                self.deletePockets([]) # neue Pockets der vorherigen Kugel einsortieren
+            sum += self.storePockets(triples, invariants)
         print("updatePocketList: ", self.countPockets, "davon neu: ", sum)
 
+    def storePockets(self, triples, invariants):
+        """
+        Anhängen neuer Pockets an die Pocketliste.
+
+        Je Pocket werden die untere Schranke der z-Koordinate (lowerBound), der kleinste Radius ohne
+        SpecialCase.DISTANCE (reachRadius), die Invarianten und der kleinste aufnehmbare Radius (hostRadius)
+        gespeichert. Pockets, die keinen Radius bis self.maxRadius aufnehmen können, werden nicht eingetragen.
+
+        :param triples: np.array((m, 3), dtype=int) - Indizes der Erzeugendenkugeln je Pocket
+        :param invariants: np.array((m, NUM_INVARIANTS), dtype=float) - Invarianten je Pocket
+        :return: int - Anzahl eingetragener Pockets
+        """
+        bound, slope = self.lowerBound(triples)
+        minRadius = self.reachRadius(triples)
+        host = self.hostRadius(invariants, bound, slope, minRadius)
+        keep = host < self.maxRadius * (1 + 1e-9)
+        vorher = self.countPockets
+        self.reservePockets(vorher + keep.sum())
+        self.countPockets += keep.sum()
+        self.pockets[vorher:self.countPockets] = triples[keep]
+        self.pocketBound[vorher:self.countPockets] = bound[keep]
+        self.pocketSlope[vorher:self.countPockets] = slope[keep]
+        self.pocketMinRadius[vorher:self.countPockets] = minRadius[keep]
+        self.pocketInvariants[vorher:self.countPockets] = invariants[keep]
+        self.pocketHostRadius[vorher:self.countPockets] = host[keep]
+        if self.radiusBins > 0:
+            self.cacheCase[vorher:self.countPockets] = -1
+            self.cacheValid[vorher:self.countPockets] = False
+        return keep.sum()
+
+    def placeSphere(self, sphere, generators):
+        """
+        Platzieren einer neuen Kugel.
+
+        Die Kugel wird mit ihren Erzeugendenkugeln in die Kugel- und Zellliste eingetragen (bei periodischen Rändern in
+        den Raum verschoben) und der Pocket-Cache in ihrer Umgebung zurückgesetzt.
+        Ihre neuen Pockets werden berechnet (Kandidaten 'box' oder 'triangulation', die pocketPossible erfüllen) und mit
+        ihren Invarianten je Kugel in self.newTriples gesammelt, bis updatePocketList sie einträgt.
+
+        :param sphere: np.array([x, y, z, r], dtype=float) - neue Kugel
+        :param generators: np.array(3, dtype=int) - Indizes der Erzeugendenkugeln der Pocket
+        :return: kein Rückgabewert
+        """
+        kugelId = self.countSpheres
+        self.reserveSpheres(kugelId + 1)
+        self.spheres[kugelId] = sphere
+        self.sphereGenerators[kugelId] = generators
+        wrapPosition(self.spheres[kugelId], self.period)
+        self.grid.insert(kugelId, self.spheres[kugelId])
+        self.countSpheres += 1
+        if self.radiusBins > 0:
+            self.invalidateCache(kugelId)
+            self.deadBins[:] = False
+        if self.pocketCandidates == 'triangulation':
+            pairs = self.triangulationPairs(kugelId)
+        else:
+            pairs = self.neighborPairs(kugelId)
+
+        # mögliche dreier Kombinationen an Kugeln durchgehen
+        triples = [(idx1, idx2, kugelId) for idx1, idx2 in pairs
+                   if pocketPossible(*self.generatorSpheres(kugelId, idx1, idx2), self.maxRadius, self.minRadius)]
+        triples = np.array(triples, dtype=int).reshape(-1, 3)
+        invariants = np.empty((len(triples), NUM_INVARIANTS))
+        calcInvariantsRows(self.spheres, triples, self.period, invariants)
+        self.newTriples.append((triples, invariants))
+
+    def batchIndependent(self, radius):
+        """
+        Prüft, ob die gerade ausgeführte Suche mit Radius radius in der Pocketliste ohne die neuen Pockets der Kugeln,
+        die seit der letzten Aktualisierung platziert wurden, dasselbe Ergebnis hat wie die Suche in der aktualisierten
+        Pocketliste (Stapelplatzierung).
+
+        In der aktualisierten Pocketliste stehen die neuen Pockets der letzten Kugel am Ende, die aller früheren Kugeln
+        sind nach Erzeugendenkugel 1 einsortiert (siehe updatePocketList). Vor jeder neuen Pocket liegen also die
+        Pockets der Pocketliste mit einer Erzeugendenkugel 1 größer oder gleich ihrer (bzw. alle). Die Suche prüft sie,
+        wenn calcPocket eine Position niedriger als die bis dahin niedrigste gültige Pocket liefert (siehe
+        self.searchBest). Ist keine geprüfte neue Pocket gültig, ändern die neuen Pockets weder die Wahl noch die
+        Prüfung der übrigen Pockets. Die Suche in der aktualisierten Pocketliste würde dann zusätzlich die geprüften
+        neuen Pockets und die Sonderfälle SpecialCase.STRAIGHT und SpecialCase.OVERLAPCALCPOC löschen. Diese werden aus
+        self.newTriples entfernt, die Kugelpackung ist damit dieselbe wie bei der Platzierung einzelner Kugeln.
+        Neue Pockets, die storePockets nicht einträgt (siehe hostRadius), werden nicht betrachtet.
+
+        :param radius: float - Radius der zu platzierenden Kugel
+        :return: bool - True, wenn das Ergebnis nachweislich dasselbe ist
+        """
+        if self.sortedPockets < self.countPockets:
+            return False
+        groups = []
+        for triples, invariants in self.newTriples:
+            bound, slope = self.lowerBound(triples)
+            keep = self.hostRadius(invariants, bound, slope, self.reachRadius(triples)) < self.maxRadius * (1 + 1e-9)
+            groups.append((triples[keep], invariants[keep]))
+        triples = np.concatenate([t for t, inv in groups])
+        if len(triples) == 0:
+            self.newTriples = groups
+            return True
+        invariants = np.concatenate([inv for t, inv in groups])
+        # Anzahl Pockets der Pocketliste vor jeder neuen Pocket in der aktualisierten Pocketliste
+        keys = -self.pockets[:self.countPockets, 0]
+        before = np.full(len(triples), self.countPockets)
+        early = len(triples) - len(groups[-1][0]) # neue Pockets der früheren Kugeln
+        before[:early] = np.searchsorted(keys, -triples[:early, 0], side='right')
+        # bis dahin niedrigste gültige Pocket
+        rows, z = self.searchBest
+        k = np.searchsorted(rows, before) - 1
+        best = np.where(k >= 0, z[np.maximum(k, 0)], np.inf)
+
+        success, pockets, status = calcPocketBatch(*self.generatorSpheres(*triples.T), radius, self.pOverlap,
+                                                   self.methodOverlap, invariants)
+        if (status == STATUS_UNKNOWN).any():
+            return False
+        if self.radiusBins > 0: # wie in searchPocket
+            pockets = pockets.astype(self.cachePocket.dtype).astype(float)
+        checked = success & (pockets[:, 2] < best)
+        for i in np.nonzero(checked)[0]:
+            if self.pocketValid(pockets[i])[0]:
+                return False
+        delete = checked | (status == STATUS_STRAIGHT) | (status == STATUS_OVERLAPCALCPOC)
+        offset = 0
+        self.newTriples = []
+        for t, inv in groups:
+            keep = ~delete[offset:offset + len(t)]
+            self.newTriples.append((t[keep], inv[keep]))
+            offset += len(t)
+        return True
+
+    def neighborPairs(self, kugelId):
+        """
+        Alle Paare entfernter Nachbarkugeln der Kugel kugelId (Pocketkandidaten 'box').
+
+        :param kugelId: int - Index der neuen Kugel
+        :return: Liste aus Paaren von Kugelindizes
+        """
+        # Nachbarn der neuen Kugel bestimmen
+        indices = self.distantNeighbors(kugelId)
+        indices = indices[indices < kugelId]
+        return [(indices[ind1], indices[ind2]) for ind1 in range(len(indices))
+                for ind2 in range(ind1 + 1, len(indices))]
+
+    def distantNeighbors(self, kugelId):
+        """
+        Entfernte Nachbarkugeln der Kugel kugelId.
+
+        Das sind alle Kugeln j ohne negative Koordinate, deren Mittelpunkt in jeder Richtung einen Abstand kleiner
+        r_i + r_j + 2 * self.maxRadius zur Kugel i = kugelId hat. Nur diese Kugeln können mit Kugel i eine Pocket
+        bilden. Sie werden im hierarchischen Gitter self.grid gesucht.
+
+        :param kugelId: int - Index der Kugel
+        :return: np.array(dtype=int) - Indizes der Nachbarkugeln (aufsteigend sortiert, einschließlich kugelId)
+        """
+        sphere = self.spheres[kugelId]
+        indices = self.grid.neighbors(self.spheres, sphere, sphere[3] + 2 * self.maxRadius)
+        return indices[(self.spheres[indices, :3] >= 0).all(axis=1)]
+
+    def triangulationPairs(self, kugelId):
+        """
+        Aktualisieren der regulären Triangulierung mit der Kugel kugelId (Pocketkandidaten 'triangulation').
+
+        Pockets, deren Dreierkombination durch die neue Kugel aus der Triangulierung entfernt wurde, werden gelöscht
+        (siehe faceRows), ebenso die noch nicht eingetragenen neuen Pockets früherer Kugeln (Stapelplatzierung, siehe
+        placementLoop). Neue Pockets sind die Dreiecke, die die neue Kugel enthalten.
+
+        :param kugelId: int - Index der neuen Kugel
+        :return: np.array((m, 2), dtype=int) - Paare von Kugelindizes, die mit kugelId ein Dreieck bilden
+        """
+        faces, removed = self.triangulation.add(self.spheres[kugelId])
+        self.deletePockets(list(faceRows(self.pockets, self.sortedPockets, self.countPockets, removed)))
+        if len(removed) > 0:
+            keys = self.triangulation.faceKeys(removed)
+            self.newTriples = [(triples[current], invariants[current]) for triples, invariants in self.newTriples
+                               for current in [~np.isin(self.triangulation.faceKeys(triples), keys)]]
+        return faces[:, :2]
+
     def deletePockets(self, pocList):
         """
         Löschen aller Pockets an den Positionen, die in pocList gespeichert sind.
 
+        Die belegten Pockets stehen immer in den Zeilen 0 bis self.countPockets - 1, absteigend sortiert nach dem Index
+        ihrer Erzeugendenkugel 1 und bei gleichem Index in der Reihenfolge, in der sie eingetragen wurden. Neue Pockets
+        werden am Ende angehängt (siehe updatePocketList) und beim nächsten Aufruf einsortiert. Die Reihenfolge der
+        Pocketliste, von der die Auswahl bei gleicher z-Koordinate und die Menge der geprüften Pockets abhängen, ist
+        damit dieselbe wie beim Sortieren der gesamten Pocketliste nach jeder Suche (bisher ohne festgelegte Reihenfolge
+        bei gleichem Index).
+        Gelöschte Zeilen werden entfernt, nur die angehängten Pockets werden (stabil) sortiert und mit binärer Suche
+        hinter den gleichen Indizes des bereits sortierten Teils eingefügt, der sortierte Teil wird nicht erneut
+        sortiert. Zeilen vor der ersten Änderung werden nicht verschoben. Ohne gelöschte und angehängte Pockets bleibt
+        die Pocketliste unverändert.
+
         :param pocList: Liste aus Pocketindices, die gelöscht werden sollen
         :return: kein Rückgabewert
         """
         print("deletePockets", self.countPockets, "davon löschen: ", len(pocList))
-        for idx in pocList:
-            a = self.spheres[self.pockets[idx, 0]]
-            b = self.spheres[self.pockets[idx, 1]]
-            c = self.spheres[self.pockets[idx, 2]]
-            #print("\t", self.pockets[idx], np.linalg.norm(a-b), np.linalg.norm(a-c), np.linalg.norm(b-c))
-            self.pockets[idx] = np.full((3), -1)
-            self.countPockets -= 1
-        self.pockets = self.pockets[self.pockets[:,0].argsort()][::-1]
-        # Ausgabe aller Pockets:
-        #for i in range(self.pockets.shape[0]):
-        #    print(self.pockets[i])
+        n = self.countPockets
+        m = self.sortedPockets
+        if len(pocList) == 0 and m == n:
+            return
+        deleted = np.unique(np.asarray(pocList, dtype=int))
+        keep = np.ones(n, dtype=bool)
+        keep[deleted] = False
+        appended = m + np.nonzero(keep[m:])[0]
+        appended = appended[np.argsort(-self.pockets[appended, 0], kind='stable')]
+        # Einfügestelle hinter allen Zeilen des sortierten Teils mit gleichem oder größerem Index (aufsteigende Sicht
+        # auf den absteigend sortierten Teil), abzüglich der davor gelöschten Zeilen
+        at = m - np.searchsorted(self.pockets[:m][::-1, 0], self.pockets[appended, 0], side='left')
+        at -= np.searchsorted(deleted, at)
+        order = np.insert(np.nonzero(keep[:m])[0], at, appended)
+        start = min(deleted[0] if len(deleted) > 0 else n, at[0] if len(at) > 0 else n) # erste Zeile, die sich ändert
+        for name, fill in self.pocketArrays(): # Cache in derselben Reihenfolge wie die Pocketliste
+            array = getattr(self, name)
+            array[start:len(order)] = array[order[start:]]
+        self.countPockets = len(order)
+        self.sortedPockets = self.countPockets
+        self.pockets[self.countPockets:n] = -1
+
+    def pocketArrays(self):
+        """
+        Alle Felder mit einer Zeile je Pocket (Pocketliste, Schranken, Invarianten und Pocket-Cache).
+
+        :return: Liste aus (string, Wert) - Attributname jedes Feldes und Belegung unbenutzter Zeilen
+        """
+        arrays = [('pockets', -1), ('pocketBound', 0.), ('pocketSlope', 1.), ('pocketMinRadius', 0.),
+                  ('pocketInvariants', 0.), ('pocketHostRadius', 0.)]
+        if self.radiusBins > 0:
+            arrays += [('cacheCase', -1), ('cacheSuccess', False), ('cachePocket', 0.), ('cacheValid', False)]
+        return arrays
+
+    def reservePockets(self, n):
+        """
+        Sicherstellen, dass die Pocketliste mindestens n Pockets aufnehmen kann.
+
+        Ist sie zu klein, wird die Kapazität aller Felder aus pocketArrays verdoppelt (mindestens auf n).
+
+        :param n: int - benötigte Anzahl Pockets
+        :return: kein Rückgabewert
+        """
+        if n <= len(self.pockets):
+            return
+        capacity = max(2 * len(self.pockets), n)
+        for name, fill in self.pocketArrays():
+            setattr(self, name, growBuffer(getattr(self, name), capacity, fill))
+        self.recordMemory()
+
+    def spheresGrown(self, capacity):
+        """
+        Vergrößern des hierarchischen Gitters und der Erzeugendenkugeln je Kugel, nachdem die Kugelliste auf capacity
+        Kugeln vergrößert wurde.
+
+        :param capacity: int - neue Kapazität der Kugelliste
+        :return: kein Rückgabewert
+        """
+        self.grid.grow(capacity)
+        self.sphereGenerators = growBuffer(self.sphereGenerators, capacity, -1)
+
+    def trimBuffers(self):
+        """
+        Kürzen der Kugelliste und der Erzeugendenkugeln je Kugel auf die platzierten Kugeln und aller Felder aus
+        pocketArrays auf die verbliebenen Pockets (nach dem Generieren der Kugelpackung).
+
+        :return: kein Rückgabewert
+        """
+        Packing.trimBuffers(self)
+        self.sphereGenerators = self.sphereGenerators[:self.countSpheres].copy()
+        for name, fill in self.pocketArrays():
+            setattr(self, name, getattr(self, name)[:self.countPockets].copy())
+
+    def lowerBound(self, pockets):
+        """
+        Untere Schranke der z-Koordinate der übergebenen Pockets in Abhängigkeit vom Radius r4.
+
+        calcPocket liefert den höheren der beiden Punkte, die symmetrisch zur Ebene E durch die Mittelpunkte M_i der 3
+        Erzeugendenkugeln liegen. Die Pocket liegt daher nicht tiefer als ihr Lotfußpunkt H in E. H hat zu jedem M_i
+        höchstens den Abstand r_i + r4, und ein Vektor der Länge d in E ändert die z-Koordinate um höchstens d * s,
+        wobei s der Sinus des Neigungswinkels von E ist. Daraus folgt:
+            z(Pocket) >= max(z_i - (r_i + r4) * s) = max(z_i - r_i * s) - r4 * s
+
+        :param pockets: np.array((m, 3), dtype=int) - Indizes der Erzeugendenkugeln
+        :return: np.array(m, dtype=float), np.array(m, dtype=float) - max(z_i - r_i * s) und s je Pocket
+        """
+        p1, p2, p3 = (k[:, :3] for k in self.generatorSpheres(*pockets.T))
+        n = np.cross(p1 - p2, p3 - p2)
+        nn = (n * n).sum(axis=1)
+        slope = np.ones(len(pockets)) # Mittelpunkte auf einer Geraden: keine Einschränkung durch die Ebene
+        plane = nn > 0
+        slope[plane] = np.sqrt(np.maximum(1 - n[plane, 2] ** 2 / nn[plane], 0))
+        bound = (self.spheres[pockets, 2] - self.spheres[pockets, 3] * slope[:, None]).max(axis=1, initial=-np.inf)
+        return bound, slope
+
+    def reachRadius(self, pockets):
+        """
+        Kleinster Radius einer neuen Kugel, die zwei Erzeugendenkugeln der übergebenen Pockets gleichzeitig berühren
+        kann.
+
+        calcSLines bricht ab (SpecialCase.DISTANCE), wenn der Abstand d zweier Erzeugendenkugeln größer ist als
+        r_i + r_j + 2 * r4, also für r4 < (d - r_i - r_j) / 2.
+
+        :param pockets: np.array((m, 3), dtype=int) - Indizes der Erzeugendenkugeln
+        :return: np.array(m, dtype=float) - max((d - r_i - r_j) / 2) über alle Paare von Erzeugendenkugeln je Pocket
+        """
+        radius = np.full(len(pockets), -np.inf)
+        spheres = self.generatorSpheres(*pockets.T)
+        for i, j in [(0, 1), (1, 2), (2, 0)]:
+            k1 = spheres[i]
+            k2 = spheres[j]
+            d = np.linalg.norm(k1[:, :3] - k2[:, :3], axis=1)
+            radius = np.maximum(radius, (d - k1[:, 3] - k2[:, 3]) / 2)
+        return radius
+
+    def hostRadius(self, invariants, bound, slope, minRadius):
+        """
+        Kleinster Radius einer neuen Kugel, die die übergebenen Pockets aufnehmen können.
+
+        Für kleinere Radien liefert calcPocket keine Pocket innerhalb des Raumes:
+        - Abstandsprüfung in calcSLines (SpecialCase.DISTANCE): r4 < minRadius (siehe reachRadius)
+        - Radikand der Tetraederhöhe: er ist ein Polynom vom Grad 2 in r4 mit positivem Leitkoeffizienten (Quadrat der
+          Grundfläche), also negativ zwischen den Nullstellen x2 <= x1 der pq-Formel. Ist x2 <= 0, gibt es keine
+          überlappende Position (SpecialCase.HEIGHT) für r4 < x1. Wegen der Rundungsfehler der pq-Formel wird x1 um
+          den relativen Sicherheitsabstand 1e-6 verkleinert.
+        - Raumgrenze: z(Pocket) >= bound - r4 * slope (siehe lowerBound) liegt über self.z für
+          r4 < (bound - self.z) / slope
+
+        :param invariants: np.array((m, NUM_INVARIANTS), dtype=float) - Invarianten je Pocket
+        :param bound: np.array(m, dtype=float) - untere Schranke je Pocket (siehe lowerBound)
+        :param slope: np.array(m, dtype=float) - Neigung je Pocket (siehe lowerBound)
+        :param minRadius: np.array(m, dtype=float) - Ergebnis von reachRadius je Pocket
+        :return: np.array(m, dtype=float) - kleinster aufnehmbarer Radius je Pocket (inf: kein Radius)
+        """
+        radius = minRadius.copy()
+        pq = (invariants[:, INV_PQ] != 0) & (invariants[:, INV_PQ + 2] <= 0)
+        radius[pq] = np.maximum(radius[pq], invariants[pq, INV_PQ + 1] * (1 - 1e-6))
+        top = np.full(len(bound), -np.inf)
+        tilted = slope > 0
+        top[tilted] = (bound[tilted] - self.z) / slope[tilted]
+        top[~tilted & (bound > self.z)] = np.inf
+        return np.maximum(radius, top)
+
+    def deletable(self, radius):
+        """
+        Pockets, die calcPocket mit Radius radius löschen könnte (SpecialCase.STRAIGHT oder SpecialCase.OVERLAPCALCPOC).
+
+        Beide Fälle treten nur auf, wenn das Kreuzprodukt der Richtungsvektoren verschwindet (INV_U_LENGTH) oder die
+        überlappende Position über die pq-Formel berechnet wird, also eine ihrer Nullstellen in (0, radius] liegt
+        (siehe calcPocketCached). Das Ergebnis ist eine Obermenge der tatsächlich gelöschten Pockets.
+
+        :param radius: float - Radius der zu platzierenden Kugel
+        :return: np.array(self.countPockets, dtype=bool) - True, wenn calcPocket die Pocket löschen könnte
+        """
+        inv = self.pocketInvariants[:self.countPockets]
+        x1 = inv[:, INV_PQ + 1]
+        x2 = inv[:, INV_PQ + 2]
+        pq = (inv[:, INV_PQ] != 0) & (((x1 > 0) & (x1 <= radius)) | ((x2 > 0) & (x2 <= radius)))
+        return (inv[:, INV_U_LENGTH] < 1e-9) | pq
+
+    def discardRows(self, radius):
+        """
+        Pockets, die eine Suche mit Radius radius berechnen muss, wenn keine Pocket den Radius aufnehmen kann (siehe
+        hostable).
+
+        Die Suche findet dann keine gültige Pocket und löscht alle Pockets, die calcPocket löscht (siehe deletable)
+        oder für die calcPocket eine (ungültige) Position liefert. Für alle anderen Pockets bricht calcPocket sicher
+        ohne Position ab: mit SpecialCase.DISTANCE für radius < self.pocketMinRadius (siehe reachRadius) oder mit
+        SpecialCase.HEIGHT für radius unterhalb der Nullstelle x1 der pq-Formel (siehe hostRadius). Nur sie werden
+        übersprungen, die Suche löscht daher dieselben Pockets wie eine Suche über alle Pockets.
+
+        :param radius: float - Radius der zu platzierenden Kugel
+        :return: np.array(dtype=int) - Zeilen der Pocketliste (aufsteigend)
+        """
+        inv = self.pocketInvariants[:self.countPockets]
+        distance = self.pocketMinRadius[:self.countPockets] >= radius * (1 + 1e-9)
+        height = (inv[:, INV_PQ] != 0) & (inv[:, INV_PQ + 2] <= 0) & (radius < inv[:, INV_PQ + 1] * (1 - 1e-6))
+        return np.nonzero(~(distance | height) | self.deletable(radius))[0]
+
+    def hostable(self, radius):
+        """
+        Prüft, ob mindestens eine Pocket der Pocketliste eine Kugel mit Radius radius aufnehmen kann (siehe hostRadius).
+
+        :param radius: float - Radius der zu platzierenden Kugel
+        :return: bool - False, wenn die Suche sicher keine Pocket findet
+        """
+        return self.countPockets > 0 and self.pocketHostRadius[:self.countPockets].min() < radius * (1 + 1e-9)
+
+    def saturated(self):
+        """
+        Prüft, ob keine Pocket mehr eine Kugel aufnehmen kann.
+
+        Das ist der Fall, wenn die Pocketliste leer ist (Pockets, die keinen Radius bis self.maxRadius aufnehmen können,
+        werden nicht eingetragen), wenn keine Pocket eine Kugel mit Radius self.minRadius aufnehmen kann (siehe
+        hostRadius, Pockets, die nur größere Radien aufnehmen können, bleiben ungefüllt) oder, bei Pocket-Cache, seit
+        der letzten Platzierung für jede Radiusklasse keine Pocket gefunden wurde.
+
+        :return: bool - True, wenn die Kugelpackung gesättigt ist
+        """
+        return not self.hostable(self.minRadius) or (self.radiusBins > 0 and self.deadBins.all())
+
+    def radiusBin(self, radius):
+        """
+        Bestimmung der Radiusklasse des Radius radius.
+
+        :param radius: float - Radius zwischen self.minRadius und self.maxRadius
+        :return: int - Index der Radiusklasse
+        """
+        width = (self.maxRadius - self.minRadius) / self.radiusBins
+        if width <= 0:
+            return 0
+        return min(max(int((radius - self.minRadius) / width), 0), self.radiusBins - 1)
+
+    def invalidateCache(self, kugelId):
+        """
+        Zurücksetzen der gespeicherten Gültigkeit aller Pockets in der Umgebung der neuen Kugel kugelId.
+
+        Eine Pocket mit Radius r4 kann sich nur mit der neuen Kugel überschneiden, wenn jede ihrer Erzeugendenkugeln
+        einen Abstand kleiner r_i + r_neu + 2 * self.maxRadius zur neuen Kugel hat (wie bei der Nachbarsuche in
+        updatePocketList). Es genügt daher, die Pockets zurückzusetzen, deren Erzeugendenkugel 1 eine dieser
+        Nachbarkugeln ist. Für alle anderen Pockets bleibt das Ergebnis von pocketValid unverändert.
+        Die Nachbarkugeln liefert das hierarchische Gitter, ihre Pockets findet invalidateRows in der nach
+        Erzeugendenkugel 1 sortierten Pocketliste, ohne die übrigen Pockets zu betrachten.
+
+        :param kugelId: int - Index der neuen Kugel
+        :return: kein Rückgabewert
+        """
+        sphere = self.spheres[kugelId]
+        indices = self.grid.neighbors(self.spheres, sphere, sphere[3] + 2 * self.maxRadius)
+        invalidateRows(self.pockets, self.sortedPockets, self.countPockets, indices[indices < kugelId],
+                       self.cacheValid)
+
+    def evaluatePocket(self, i, radius):
+        """
+        Berechnung der Pocket in Zeile i der Pocketliste für eine Kugel mit Radius radius.
+
+        Bei self.pocketEngine == 'numba' wird die kompilierte Funktion calcPocketCached mit den gespeicherten
+        Invarianten der Pocket verwendet, sonst calcPocket, dessen Exceptions und SpecialCases in Statuswerte
+        umgewandelt werden (UnknownError wird weitergegeben).
+
+        :param i: int - Zeile der Pocket in self.pockets
+        :param radius: float - Radius der zu platzierenden Kugel
+        :return: Boolean, np.array([x, y, z, r], dtype=float), int - wie calcPocketStatus in funktionen.py
+        """
+        p1, p2, p3 = self.generatorSpheres(*self.pockets[i])
+        if self.pocketEngine == 'numba':
+            return calcPocketCached(p1, p2, p3, radius, self.pOverlap, self.methodOverlap, self.pocketInvariants[i])
+        try:
+            success, p4, case = calcPocket(p1, p2, p3, radius, self.pOverlap, self.methodOverlap)
+        except OverlapException:
+            return False, np.zeros(4), STATUS_OVERLAPCALCPOC
+        except StraightException:
+            return False, np.zeros(4), STATUS_STRAIGHT
+        except SpacingException: # TODO: nur bei calcPocket_v2
+            return False, np.zeros(4), STATUS_NOROOT
+        return success, p4, case.value
+
+    def scanParallel(self, radius, b):
+        """
+        Parallele Suche der niedrigsten gültigen Pocket (Pocketsuche 'parallel').
+
+        Die Pocketliste wird in self.scanChunks zusammenhängende Abschnitte geteilt, die scanPocketChunks parallel wie
+        die serielle Schleife in generatePacking durchsucht. Jeder Abschnitt prüft dabei mit validPocket nur Pockets,
+        die niedriger als seine eigene niedrigste gültige Pocket sind. reduceScan bestimmt daraus die Pocket, die auch
+        die serielle Suche wählt (bei gleicher z-Koordinate die mit dem kleineren Index), sowie die Pockets, die die
+        serielle Suche geprüft hätte. Nur diese werden gelöscht bzw. gezählt, sodass delPockets und die Sonderfälle
+        unabhängig von der Anzahl Abschnitte exakt mit 'scan' übereinstimmen.
+
+        :param radius: float - Radius der zu platzierenden Kugel
+        :param b: int - Radiusklasse für den Pocket-Cache (-1: kein Cache)
+        :return: int, list, list - Zeile der niedrigsten gültigen Pocket (-1: keine gefunden), zu löschende Pockets und
+            Anzahl der Aufrufe von calcPocket und der Sonderfälle [calcPocket, sf1, sf2, sf3, sf4, sf5, sf6]
+        """
+        n = self.countPockets
+        if b >= 0:
+            cache = (self.cacheCase, self.cacheSuccess, self.cachePocket, self.cacheValid)
+        else: # Platzhalter, werden nicht gelesen
+            cache = (np.full((1, 1), -1, dtype=np.int8), np.zeros((1, 1), dtype=bool), np.zeros((1, 1, 4)),
+                     np.zeros((1, 1), dtype=bool))
+        chunkSize = max(-(-n // self.scanChunks), 1)
+        grid = self.grid
+        success, result, status, computed, checked, valid, plus, chunkBest = scanPocketChunks(
+            self.spheres, self.pockets[:n], self.pocketInvariants[:n], grid.head, grid.next, grid.offset, grid.dims,
+            grid.cellSize, grid.radius, radius, self.pOverlap, self.methodOverlap, self.bounds, self.period, chunkSize,
+            b, *cache)
+        if (status[computed] == STATUS_UNKNOWN).any():
+            raise UnknownError('calcPocket')
+        pocIdx, serial = reduceScan(result, checked, chunkBest, chunkSize)
+        self.scanResult = result
+        self.scanStatus = status
+        self.scanBest = np.nonzero(serial & valid)[0] # gültige geprüfte Pockets
+
+        deleted = computed & ((status == STATUS_STRAIGHT) | (status == STATUS_OVERLAPCALCPOC))
+        delPockets = list(np.nonzero(deleted | (serial & ~valid))[0])
+        counts = [computed.sum(),
+                  (computed & (status == STATUS_STRAIGHT)).sum(),
+                  (computed & (status == STATUS_DISTANCE)).sum(),
+                  (computed & ((status == STATUS_HEIGHT) | (status == STATUS_NEWRADIUS))).sum(),
+                  (computed & (status == STATUS_NEWRADIUS)).sum(),
+                  (computed & (status == STATUS_OVERLAPCALCPOC)).sum(),
+                  plus[serial].sum()]
+        if b >= 0: # wie in der seriellen Schleife: berechnete Pockets und geprüfte Gültigkeit speichern
+            rows = np.nonzero(computed & ~deleted)[0]
+            self.cacheCase[rows, b] = status[rows]
+            self.cacheSuccess[rows, b] = success[rows]
+            self.cachePocket[rows, b] = result[rows]
+            rows = np.nonzero(serial)[0]
+            self.cacheValid[rows, b] = valid[rows]
+        return pocIdx, delPockets, counts
+
+    def nextRadius(self):
+        """
+        Radius der nächsten Kugel aus self.radiusSource.
+
+        :return: float, int - Radius (bei Pocket-Cache auf die Mitte seiner Klasse gerundet) und Radiusklasse (-1: kein
+            Cache)
+        """
+        radius = self.radiusSource.next()
+        if self.radiusBins > 0: # Radius auf die Mitte seiner Klasse runden
+            b = self.radiusBin(radius)
+            return self.binRadius[b], b
+        return radius, -1
+
+    def searchPocket(self, radius, b, rows=None):
+        """
+        Suche der niedrigsten gültigen Pocket für eine Kugel mit Radius radius (Pocketsuche 'scan', 'bound' oder
+        'parallel') in allen Pockets oder nur in den Zeilen rows (siehe discardRows).
+
+        Pockets, die sich nicht berechnen lassen (SpecialCase.STRAIGHT, SpecialCase.OVERLAPCALCPOC) oder bei der Suche
+        als ungültig erkannt werden, werden zum Löschen vorgemerkt. Die Pocketliste selbst wird nicht verändert.
+        Die Pockets werden in der Reihenfolge der Pocketliste durchlaufen, geprüft wird jede Pocket, die niedriger als
+        die bisher niedrigste gültige Pocket liegt. 'bound' überspringt nur Pockets, die weder geprüft noch gelöscht
+        würden: untere Schranke (siehe lowerBound) über der bisher niedrigsten gültigen Pocket und kein möglicher
+        Sonderfall STRAIGHT oder OVERLAPCALCPOC (siehe deletable). Gewählte Pocket und gelöschte Pockets sind daher
+        dieselben wie bei 'scan'.
+        Die Zeilen und z-Koordinaten, mit denen sich die bisher niedrigste gültige Pocket im Verlauf der Suche ändert,
+        werden in self.searchBest gespeichert (siehe batchIndependent).
+
+        :param radius: float - Radius der zu platzierenden Kugel
+        :param b: int - Radiusklasse für den Pocket-Cache (-1: kein Cache)
+        :param rows: np.array(dtype=int) - aufsteigende Zeilen, die seriell durchsucht werden (None: alle Pockets)
+        :return: int, np.array([x, y, z, r], dtype=float), bool, list, np.array(7, dtype=int) - Zeile der niedrigsten
+            gültigen Pocket (-1: keine gefunden), berechnete Pocket, False bei überlappend berechneter Pocket
+            (SpecialCase.NEWRADIUS), zu löschende Pockets und Anzahl der Aufrufe von calcPocket und der Sonderfälle
+            [calcPocket, sf1, sf2, sf3, sf4, sf5, sf6]
+        """
+        counts = np.zeros(7, dtype=int)
+        pocDetected = False
+        pocIdx = -1
+        lowestPoc = np.zeros(4)
+        delPockets = []
+        bestRows, bestZ = [], [] # Verlauf der niedrigsten gültigen Pocket
+        # alle möglichen Pockets durchgehen
+        normalPocket = True
+        pruned = rows is None and self.pocketSearch == 'bound'
+        if rows is not None:
+            order = rows
+        elif self.pocketSearch == 'bound':
+            bound = (self.pocketBound[:self.countPockets] - radius * self.pocketSlope[:self.countPockets]).tolist()
+            deletable = self.deletable(radius).tolist()
+            # Pockets, für die calcPocket sicher mit SpecialCase.DISTANCE abbricht, werden nicht berechnet
+            # (Sicherheitsabstand gegen Rundungsfehler am Rand)
+            reachable = self.pocketMinRadius[:self.countPockets] < radius * (1 + 1e-9)
+            counts[2] += self.countPockets - reachable.sum()
+            order = np.nonzero(reachable)[0].tolist()
+        elif self.pocketSearch == 'parallel':
+            order = [] # alle Pockets werden in scanParallel berechnet
+            pocIdx, delPockets, scanCounts = self.scanParallel(radius, b)
+            counts += scanCounts
+            if pocIdx >= 0:
+                lowestPoc = self.scanResult[pocIdx].copy()
+                normalPocket = self.scanStatus[pocIdx] != STATUS_NEWRADIUS
+            bestRows, bestZ = list(self.scanBest), list(self.scanResult[self.scanBest, 2])
+        else:
+            order = range(self.countPockets)
+        batchIdx = None
+        if rows is None and self.pocketEngine == 'numba' and self.pocketSearch == 'scan':
+            # alle benötigten Pockets werden vorab mit calcPocketBatch berechnet (bei 'bound' nicht, da die meisten
+            # Pockets übersprungen werden)
+            rows = np.arange(self.countPockets)
+            if self.radiusBins > 0:
+                rows = rows[self.cacheCase[rows, b] < 0]
+            batchIdx = np.full(self.countPockets, -1)
+            batchIdx[rows] = np.arange(len(rows))
+            batchSuccess, batchPockets, batchStatus = calcPocketBatch(
+                *self.generatorSpheres(*self.pockets[rows].T), radius, self.pOverlap, self.methodOverlap,
+                self.pocketInvariants[rows])
+        for i in order:
+            if pruned and pocDetected and bound[i] > lowestPoc[2] and not deletable[i]:
+                continue # Pocket liegt höher als die niedrigste gültige Pocket, wird weder geprüft noch gelöscht
+            if self.radiusBins > 0 and self.cacheCase[i, b] >= 0:
+                # Ergebnis von calcPocket aus dem Cache (Sonderfälle wurden bei der Berechnung gezählt)
+                success = self.cacheSuccess[i, b]
+                p4 = self.cachePocket[i, b].astype(float)
+                case = self.cacheCase[i, b]
+            else:
+                counts[0] += 1
+                if batchIdx is not None:
+                    k = batchIdx[i]
+                    success, p4, case = batchSuccess[k], batchPockets[k], batchStatus[k]
+                else:
+                    success, p4, case = self.evaluatePocket(i, radius)
+                if self.radiusBins > 0:
+                    roundPocket(p4, self.cachePocket) # wie bei einem Treffer im Cache
+                # Sonderfälle zählen
+                if case == STATUS_OVERLAPCALCPOC:
+                    counts[5] += 1
+                    delPockets.append(i)
+                    continue
+                elif case == STATUS_STRAIGHT:
+                    counts[1] += 1
+                    delPockets.append(i)
+                    continue
+                elif case == STATUS_UNKNOWN:
+                    raise UnknownError('calcPocket')
+                elif case == STATUS_DISTANCE:
+                    counts[2] += 1
+                elif case == STATUS_HEIGHT:
+                    counts[3] += 1
+                elif case == STATUS_NEWRADIUS:
+                    counts[3] += 1
+                    counts[4] += 1
+                if self.radiusBins > 0:
+                    self.cacheCase[i, b] = case
+                    self.cacheSuccess[i, b] = success
+                    self.cachePocket[i, b] = p4
+            # bei gleicher z-Koordinate wird die Pocket mit dem kleineren Index gewählt
+            if success and (not pocDetected or (pocDetected and (p4[2] < lowestPoc[2]
+                                                                 or (p4[2] == lowestPoc[2] and i < pocIdx)))):
+                if self.radiusBins > 0 and self.cacheValid[i, b]:
+                    valid, plus = True, 0 # seit der letzten Prüfung keine neue Kugel in der Umgebung
+                else:
+                    valid, plus = self.pocketValid(p4)
+                    counts[6] += plus
+                    if self.radiusBins > 0:
+                        self.cacheValid[i, b] = valid
+                if valid:
+                    pocDetected = True
+                    lowestPoc = p4
+                    pocIdx = i # Index der aktuell niedrigsten Pocket, die gefüllt werden soll
+                    bestRows.append(i)
+                    bestZ.append(p4[2])
+                    if case == STATUS_NEWRADIUS:
+                        normalPocket = False
+                    else:
+                        normalPocket = True
+                else:
+                    delPockets.append(i)
+        self.searchBest = (np.array(bestRows, dtype=int), np.array(bestZ, dtype=float))
+        return pocIdx, lowestPoc, normalPocket, delPockets, counts
+
+    def fileName(self, ending):
+        """
+        Dateiname einer Datei der Kugelpackung im Ausgabeordner.
+
+        :param ending: string - Endung des Dateinamens (z. B. '_kupa.csv')
+        :return: string - Dateiname
+        """
+        return f"../resources/output/{self.x}x{self.y}x{self.z}_{self.distribution}_{int(self.minRadius)}_" \
+               f"{int(self.maxRadius)}{self.suffix}{ending}"
 
     def generatePacking(self):
         """
@@ -228,92 +922,371 @@ class VariableSizedPacking(Packing):
         Mit diesem Radius wird eine neue Kugel an der niedrigsten möglichen Pocket platziert. Dafür werden für alle
         dreier Kombinationen an Nachbarkugeln, falls möglich, Kugelpositionen berechnet. Nachdem eine Kugel platziert
         wurde, wird die Pocketliste aktualisiert. Dieser Vorgang wird solange wiederholt bis der gesamte Raum mit
-        Kugeln gefüllt ist und es daher keine freien Pockets mehr gibt.
+        Kugeln gefüllt ist und es daher keine freien Pockets mehr gibt (siehe placementLoop).
 
         :return: kein Rückgabewert
         """
-        csvIn = f"../resources/output/{self.x}x{self.y}x{self.z}_{self.distribution}_{int(self.minRadius)}_{int(self.maxRadius)}{self.suffix}_initialisierungsebene.csv"
-        csvOut = f"../resources/output/{self.x}x{self.y}x{self.z}_{self.distribution}_{int(self.minRadius)}_{int(self.maxRadius)}{self.suffix}_kupa.csv"
-        fileOut = f"../resources/output/{self.x}x{self.y}x{self.z}_{self.distribution}_{int(self.minRadius)}_{int(self.maxRadius)}{self.suffix}_anzahl_sonderfaelle.txt"
-        self.initialize(csvIn) # Initialisierungsebene einlesen
+        self.initialize(self.fileName("_initialisierungsebene.csv")) # Initialisierungsebene einlesen
+        self.startPacking()
+        self.continuePacking()
+
+    def startPacking(self):
+        """
+        Vorbereiten der Platzierungsschleife: die vorhandenen Kugeln (Initialisierungsebene) werden in das Gitter
+        eingetragen, alle möglichen Pockets berechnet und die Zähler zurückgesetzt.
+
+        :return: kein Rückgabewert
+        """
+        for i in range(self.countSpheres):
+            self.grid.insert(i, self.spheres[i])
         self.initPocketList()
 
-        count_sf1 = 0  # 3 Kugeln auf einer Geraden
-        count_sf2 = 0  # Abstand zwischen 2 Kugeln zu groß
-        count_sf3 = 0  # Fehler bei Berechnung Pyramidenhöhe
-        count_sf4 = 0  # Anzahl Fälle, die überlappend berechnet werden (pq-Formel) liefert passende Lösung
-        count_sf5 = 0  # Überlapp-Exception in calcPocket
-        count_sf6 = 0  # Überlapp unter allen Nachbarkugeln zu groß
-        count_overlappedSpheres = 0
-
-        loopCounter = 0
-        while self.countPockets > 0 and loopCounter < self.loopLimit:
-            loopCounter += 1
-            pocDetected = False
-            pocIdx = -1
-            lowestPoc = np.zeros(4)
-            delPockets = []
-            if self.minRadius == self.maxRadius:
-                radius = self.minRadius
-            elif self.distribution == 'uniform':
-                radius = uniform.rvs(loc=self.minRadius, scale=self.maxRadius-self.minRadius)
-            else: # self.distribution == 'beta':
-                radius = beta.rvs(self.beta_p, self.beta_q, loc=self.minRadius, scale=(self.maxRadius - self.minRadius))
+        # Anzahl Aufrufe calcPocket und Sonderfälle:
+        #   sf1: 3 Kugeln auf einer Geraden
+        #   sf2: Abstand zwischen 2 Kugeln zu groß
+        #   sf3: Fehler bei Berechnung Pyramidenhöhe
+        #   sf4: Anzahl Fälle, die überlappend berechnet werden (pq-Formel) liefert passende Lösung
+        #   sf5: Überlapp-Exception in calcPocket
+        #   sf6: Überlapp unter allen Nachbarkugeln zu groß
+        self.counts = np.zeros(7, dtype=int)
+        self.countOverlappedSpheres = 0
+        self.loopCounter = 0
+        self.snapshotSpheres = self.countSpheres # Anzahl Kugeln beim letzten Snapshot
+
+    def continuePacking(self):
+        """
+        Fortsetzen der Platzierungsschleife (siehe placementLoop) bis zur fertigen Kugelpackung, danach werden die
+        Kugelpackung und die Anzahl der Sonderfälle geschrieben.
+
+        :return: kein Rückgabewert
+        """
+        self.placementLoop()
+        self.finishPacking()
+
+    def finishPacking(self):
+        """
+        Schreiben der fertigen Kugelpackung und der Anzahl der Sonderfälle, Löschen des Snapshots und Ausgabe des
+        Speicherbedarfs.
+
+        :return: kein Rückgabewert
+        """
+        self.countCalcPockets = self.counts[0]
+        print("Anzahl Aufrufe calcPocket:", self.countCalcPockets)
+        self.writeCsvFile(self.fileName("_kupa.csv"))
+        writeSpecialCase(list(self.counts) + [self.countOverlappedSpheres], self.fileName("_anzahl_sonderfaelle.txt"))
+        snapshot = self.fileName("_snapshot.pkl")
+        if os.path.exists(snapshot):
+            os.remove(snapshot)
+        self.trimBuffers()
+        self.reportMemory()
+
+    def placementLoop(self):
+        """
+        Platzierungsschleife: solange die Kugelpackung nicht gesättigt ist, wird mit dem nächsten Radius eine Kugel an
+        der niedrigsten gültigen Pocket platziert.
+
+        Stapelplatzierung (self.batchSize > 1): nach einer Kugel werden mit den nächsten Radien weitere Kugeln in der
+        noch nicht aktualisierten Pocketliste platziert, solange batchIndependent nachweist, dass die neuen Pockets der
+        bisherigen Kugeln des Stapels die Suche nicht ändern (die Kugelpackung ist dieselbe wie ohne Stapel). Die
+        Pocketliste wird danach einmal für alle Kugeln aktualisiert. Der Radius, mit dem der Stapel endet, wird
+        zurückgelegt und im nächsten Durchlauf verwendet.
+
+        Radien, deren Radiusklasse seit der letzten Platzierung erfolglos gesucht wurde, werden ohne Suche verworfen
+        (die Suche würde wieder nichts finden und nichts löschen). Kann keine Pocket den Radius aufnehmen (siehe
+        hostRadius), werden nur die Pockets berechnet, die die Suche löschen würde (siehe discardRows). Die
+        Kugelpackung ist damit dieselbe wie bei einer Suche für jeden Radius. Die Schleife endet, sobald die
+        Kugelpackung gesättigt ist (siehe saturated).
+
+        Snapshot (self.snapshotInterval > 0): zu Beginn eines Durchlaufs, sobald seit dem letzten Snapshot mindestens
+        self.snapshotInterval Kugeln platziert wurden, wird der gesamte Zustand mit writeSnapshot gespeichert. Der
+        gesamte Zustand der Schleife liegt zu diesem Zeitpunkt in den Attributen der Kugelpackung. Eine mit
+        packing.readSnapshot eingelesene Kugelpackung setzt mit continuePacking genau so fort, wie die ursprüngliche
+        Kugelpackung weitergelaufen wäre. Nach dem Schreiben der Kugelpackung wird der Snapshot gelöscht.
+
+        :return: kein Rückgabewert
+        """
+        snapshot = self.fileName("_snapshot.pkl")
+        while not self.saturated() and self.loopCounter < self.loopLimit:
+            if self.snapshotInterval > 0 and self.countSpheres - self.snapshotSpheres >= self.snapshotInterval:
+                self.snapshotSpheres = self.countSpheres
+                self.writeSnapshot(snapshot)
+            self.loopCounter += 1
+            radius, b = self.nextRadius()
             print("Radius: ", radius)
-            # alle möglichen Pockets durchgehen
-            normalPocket = True
-            for i in range(self.countPockets):
-                p1 = self.spheres[self.pockets[i, 0]]
-                p2 = self.spheres[self.pockets[i, 1]]
-                p3 = self.spheres[self.pockets[i, 2]]
-
-                try:
-                    self.countCalcPockets += 1
-                    success, p4, case = calcPocket(p1, p2, p3, radius, self.pOverlap, self.methodOverlap)
-                except OverlapException:
-                    count_sf5 += 1
-                    delPockets.append(i)
-                except StraightException:
-                    count_sf1 += 1
-                    delPockets.append(i)
-                except SpacingException: # TODO: nur bei calcPocket_v2
-                    pass
-                else:
-                    # Sonderfälle zählen
-                    if case == SpecialCase.DISTANCE:
-                        count_sf2 += 1
-                    elif case == SpecialCase.HEIGHT:
-                        count_sf3 += 1
-                    elif case == SpecialCase.NEWRADIUS:
-                        count_sf3 += 1
-                        count_sf4 += 1
-                    if success and (not pocDetected or (pocDetected and p4[2] < lowestPoc[2])):
-                        valid, plus = self.pocketValid(p4)
-                        count_sf6 += plus
-                        if valid:
-                            pocDetected = True
-                            lowestPoc = p4
-                            pocIdx = i # Index der aktuell niedrigsten Pocket, die gefüllt werden soll
-                            if case == SpecialCase.NEWRADIUS:
-                                normalPocket = False
-                            else:
-                                normalPocket = True
-                        else:
-                            delPockets.append(i)
-            if pocDetected:
-                self.spheres[self.countSpheres] = lowestPoc
-                self.countSpheres += 1
+            if b >= 0 and self.deadBins[b]:
+                continue # Radius ohne Suche verwerfen
+            # kann keine Pocket den Radius aufnehmen, werden nur die Pockets berechnet, die die Suche löschen würde
+            rows = None if self.hostable(radius) else self.discardRows(radius)
+            pocIdx, lowestPoc, normalPocket, delPockets, found = self.searchPocket(radius, b, rows)
+            self.counts += found
+            if pocIdx < 0:
+                self.deletePockets(delPockets)
+                if b >= 0:
+                    self.deadBins[b] = True
+                continue
+            placed = 0
+            while True:
+                generators = self.pockets[pocIdx].copy()
                 delPockets.append(pocIdx)
                 self.deletePockets(delPockets)
-                self.updatePocketList()
+                self.placeSphere(lowestPoc, generators)
                 print("neu:", lowestPoc)
-                loopCounter = 0
                 if normalPocket == False:
-                    count_overlappedSpheres += 1
+                    self.countOverlappedSpheres += 1
+                placed += 1
+                if placed >= self.batchSize:
+                    break
+                radius, b = self.nextRadius()
+                if not self.hostable(radius):
+                    self.radiusSource.putBack() # neue Pockets des Stapels könnten den Radius aufnehmen
+                    break
+                pocIdx, lowestPoc, normalPocket, delPockets, found = self.searchPocket(radius, b)
+                if pocIdx < 0 or not self.batchIndependent(radius):
+                    self.radiusSource.putBack() # Suche wird nach der Aktualisierung wiederholt
+                    break
+                self.counts += found
+            self.updatePocketList()
+            self.loopCounter = 0
+
+@jit(nopython=True)
+def validPocket(pocket, spheres, gridHead, gridNext, gridOffset, gridDims, gridCellSize, gridRadius, bounds, period,
+                pOverlap, methodOverlap):
+    """
+    Prüft wie VariableSizedPacking.pocketValid, ob die Pocket gültig ist.
+
+    Es werden nur die Kugeln betrachtet, die das hierarchische Gitter in jeder Ebene l im Quader um die Pocket mit der
+    halben Kantenlänge r4 + gridRadius[l] findet. Kugeln mit einer negativen
+    Koordinate werden wie bisher nicht berücksichtigt. Bei der Methode 'single' endet die Prüfung bei der ersten zu
+    großen Überlappung, bei 'average' werden Überlappung und Volumen aller überlappenden Kugeln aufsummiert (ohne
+    überlappende Kugel ist die Pocket gültig).
+    In periodischen Richtungen wird der Bereich nicht geprüft, stattdessen werden auch die um eine Periode verschobenen
+    Bilder der Pocket geprüft, deren Suchquader den Raum schneidet (wie hierarchicalGrid.collectNeighbors).
+
+    :param pocket: np.array(4, dtype=float) - [x, y, z, r]
+    :param spheres: np.array((n, 4), dtype=float) - Kugelliste
+    :param gridHead, gridNext, gridOffset, gridDims, gridCellSize, gridRadius: hierarchisches Gitter der Kugeln (siehe
+        hierarchicalGrid.HierarchicalGrid)
+    :param bounds: np.array(6, dtype=float) - erlaubter Bereich des Mittelpunkts [x_min, x_max, y_min, y_max, z_min,
+        z_max]
+    :param period: np.array(2, dtype=float) - Periode in x- und y-Richtung (siehe periodic.py)
+    :param pOverlap: float - maximal erlaubter relativer Überlapp
+    :param methodOverlap: string - Methode, wie der Überlapp berechnet wird ('single' oder 'average')
+    :return: bool, int - True, wenn die Pocket gültig ist, und 1, wenn sie wegen zu großer Überlappung ungültig ist
+    """
+    if (period[0] == 0 and ((pocket[0] < bounds[0]) or (pocket[0] > bounds[1]))) \
+            or (period[1] == 0 and ((pocket[1] < bounds[2]) or (pocket[1] > bounds[3]))) \
+            or (pocket[2] < bounds[4]) or (pocket[2] > bounds[5]):
+        return False, 0 # Mittelpunkt der Pocket liegt nicht im Bereich
+    ovl = 0.
+    vol = 0.
+    shiftsX, shiftsY = imageShifts(period)
+    image = pocket[:4].copy() # Bild der Pocket
+    for l in range(len(gridRadius)):
+        reach = pocket[3] + gridRadius[l]
+        for sx in range(-shiftsX, shiftsX + 1):
+            image[0] = pocket[0] + sx * period[0]
+            if sx != 0 and (image[0] + reach < 0 or image[0] - reach > period[0]):
+                continue # Suchquader des Bildes liegt außerhalb des Raumes
+            for sy in range(-shiftsY, shiftsY + 1):
+                image[1] = pocket[1] + sy * period[1]
+                if sy != 0 and (image[1] + reach < 0 or image[1] - reach > period[1]):
+                    continue
+                for ix in range(gridCoord(image[0] - reach, l, 0, gridDims, gridCellSize),
+                                gridCoord(image[0] + reach, l, 0, gridDims, gridCellSize) + 1):
+                    for iy in range(gridCoord(image[1] - reach, l, 1, gridDims, gridCellSize),
+                                    gridCoord(image[1] + reach, l, 1, gridDims, gridCellSize) + 1):
+                        for iz in range(gridCoord(image[2] - reach, l, 2, gridDims, gridCellSize),
+                                        gridCoord(image[2] + reach, l, 2, gridDims, gridCellSize) + 1):
+                            ind = gridHead[gridOffset[l] + (ix * gridDims[l, 1] + iy) * gridDims[l, 2] + iz]
+                            while ind >= 0:
+                                k = spheres[ind]
+                                ind = gridNext[ind]
+                                d = k[3] + image[3]
+                                if k[0] < 0 or k[1] < 0 or k[2] < 0 or abs(k[0] - image[0]) >= d \
+                                        or abs(k[1] - image[1]) >= d or abs(k[2] - image[2]) >= d:
+                                    continue # Kugel kann die Pocket nicht überschneiden
+                                if sphereDistance(k, image) < 0:
+                                    if methodOverlap == 'average':
+                                        ovl += calcOverlap(k, image)
+                                        vol += sphereVolume(k[3])
+                                    else: # methodOverlap == 'single'
+                                        ovl = calcOverlap(k, image)
+                                        if ovl / sphereVolume(k[3]) > pOverlap \
+                                                or ovl / sphereVolume(image[3]) > pOverlap:
+                                            return False, 1
+    if methodOverlap == 'average' and vol > 0 and ovl / vol > pOverlap:
+        return False, 1
+    return True, 0
+
+@jit(nopython=True)
+def invalidateRows(pockets, sortedPockets, countPockets, indices, cacheValid):
+    """
+    Zurücksetzen der gespeicherten Gültigkeit aller Pockets, deren Erzeugendenkugel 1 in indices enthalten ist (siehe
+    VariableSizedPacking.invalidateCache).
+
+    Die Zeilen 0 bis sortedPockets - 1 sind absteigend nach Erzeugendenkugel 1 sortiert (siehe deletePockets), die
+    Pockets einer Kugel bilden dort einen zusammenhängenden Abschnitt, dessen Anfang binär gesucht wird. Die danach
+    angehängten Zeilen bis countPockets - 1 werden einzeln geprüft.
+
+    :param pockets: np.array((m, 3), dtype=int32) - Pocketliste
+    :param sortedPockets: int - Anzahl sortierter Zeilen am Anfang der Pocketliste
+    :param countPockets: int - Anzahl belegter Zeilen
+    :param indices: np.array(dtype=int) - Indizes der Kugeln (aufsteigend sortiert)
+    :param cacheValid: np.array((m, radiusBins), dtype=bool) - gespeicherte Gültigkeit je Pocket und Radiusklasse
+    :return: kein Rückgabewert
+    """
+    for j in indices:
+        lo = 0
+        hi = sortedPockets
+        while lo < hi: # erste Zeile mit Erzeugendenkugel 1 <= j
+            mid = (lo + hi) // 2
+            if pockets[mid, 0] > j:
+                lo = mid + 1
             else:
-                self.deletePockets(delPockets)
-        print("Anzahl Aufrufe calcPocket:", self.countCalcPockets)
-        self.writeCsvFile(csvOut)
-        counts = [self.countCalcPockets, count_sf1, count_sf2, count_sf3, count_sf4, count_sf5, count_sf6, count_overlappedSpheres]
-        writeSpecialCase(counts, fileOut)
+                hi = mid
+        while lo < sortedPockets and pockets[lo, 0] == j:
+            cacheValid[lo, :] = False
+            lo += 1
+    for row in range(sortedPockets, countPockets):
+        k = np.searchsorted(indices, pockets[row, 0])
+        if k < len(indices) and indices[k] == pockets[row, 0]:
+            cacheValid[row, :] = False
+
+@jit(nopython=True)
+def faceRows(pockets, sortedPockets, countPockets, faces):
+    """
+    Zeilen aller Pockets, deren Erzeugendenkugeln eines der Dreiecke faces bilden (siehe
+    VariableSizedPacking.triangulationPairs).
+
+    Bei Pocketkandidaten 'triangulation' sind die Indizes der Erzeugendenkugeln jeder Pocket aufsteigend sortiert. Wie
+    in invalidateRows wird in den Zeilen 0 bis sortedPockets - 1 der Abschnitt mit der Erzeugendenkugel 1 jedes
+    Dreiecks binär gesucht, die danach angehängten Zeilen bis countPockets - 1 werden einzeln geprüft.
+
+    :param pockets: np.array((m, 3), dtype=int32) - Pocketliste
+    :param sortedPockets: int - Anzahl sortierter Zeilen am Anfang der Pocketliste
+    :param countPockets: int - Anzahl belegter Zeilen
+    :param faces: np.array((k, 3), dtype=int) - Dreiecke (aufsteigend sortierte Indizes)
+    :return: np.array(dtype=int) - Zeilen der Pockets
+    """
+    rows = np.empty(countPockets, dtype=np.int64)
+    count = 0
+    for f in range(len(faces)):
+        lo = 0
+        hi = sortedPockets
+        while lo < hi: # erste Zeile mit Erzeugendenkugel 1 <= faces[f, 0]
+            mid = (lo + hi) // 2
+            if pockets[mid, 0] > faces[f, 0]:
+                lo = mid + 1
+            else:
+                hi = mid
+        while lo < sortedPockets and pockets[lo, 0] == faces[f, 0]:
+            if pockets[lo, 1] == faces[f, 1] and pockets[lo, 2] == faces[f, 2]:
+                rows[count] = lo
+                count += 1
+            lo += 1
+    for row in range(sortedPockets, countPockets):
+        for f in range(len(faces)):
+            if pockets[row, 0] == faces[f, 0] and pockets[row, 1] == faces[f, 1] and pockets[row, 2] == faces[f, 2]:
+                rows[count] = row
+                count += 1
+                break
+    return rows[:count]
+
+@jit(nopython=True, parallel=True)
+def scanPocketChunks(spheres, pockets, invariants, gridHead, gridNext, gridOffset, gridDims, gridCellSize, gridRadius,
+                     radius, pOverlap, methodOverlap, bounds, period, chunkSize, b, cacheCase, cacheSuccess,
+                     cachePocket, cacheValid):
+    """
+    Parallele Suche der niedrigsten gültigen Pocket je Abschnitt der Pocketliste (siehe scanParallel).
+
+    Jeder Abschnitt aus chunkSize Pockets wird wie in der seriellen Schleife von generatePacking durchlaufen. Jeder
+    Durchlauf schreibt nur in die Zeilen seines Abschnitts, der Cache wird nur gelesen.
+
+    :param spheres: np.array((n, 4), dtype=float) - platzierte Kugeln
+    :param pockets: np.array((m, 3), dtype=int32) - Pocketliste
+    :param invariants: np.array((m, NUM_INVARIANTS), dtype=float) - Invarianten je Pocket (siehe calcInvariants)
+    :param gridHead, gridNext, gridOffset, gridDims, gridCellSize, gridRadius: hierarchisches Gitter der Kugeln (siehe
+        hierarchicalGrid.HierarchicalGrid)
+    :param radius: float - Radius der zu platzierenden Kugel
+    :param pOverlap: float - maximal erlaubter relativer Überlapp
+    :param methodOverlap: string - Methode, wie der Überlapp berechnet wird ('single' oder 'average')
+    :param bounds: np.array(6, dtype=float) - erlaubter Bereich der Pocketmittelpunkte (siehe validPocket)
+    :param period: np.array(2, dtype=float) - Periode in x- und y-Richtung (siehe periodic.py)
+    :param chunkSize: int - Anzahl Pockets je Abschnitt
+    :param b: int - Radiusklasse für den Pocket-Cache (-1: kein Cache)
+    :param cacheCase, cacheSuccess, cachePocket, cacheValid: Pocket-Cache (siehe VariableSizedPacking)
+    :return: je Pocket Erfolg, Pocket, Statuswert, ob calcPocketCached aufgerufen wurde, ob die Gültigkeit geprüft
+        wurde, Gültigkeit und Sonderfall sf6 (0 oder 1), sowie je Abschnitt die Zeile der niedrigsten gültigen Pocket
+        (-1: keine gefunden)
+    """
+    m = len(pockets)
+    numChunks = max(-(-m // chunkSize), 1)
+    success = np.zeros(m, dtype=np.bool_)
+    result = np.zeros((m, 4))
+    status = np.zeros(m, dtype=np.int8)
+    computed = np.zeros(m, dtype=np.bool_)
+    checked = np.zeros(m, dtype=np.bool_)
+    valid = np.zeros(m, dtype=np.bool_)
+    plus = np.zeros(m, dtype=np.int64)
+    chunkBest = np.full(numChunks, -1, dtype=np.int64)
+    periodic = period[0] > 0 or period[1] > 0
+    for c in prange(numChunks):
+        best = -1
+        for i in range(c * chunkSize, min((c + 1) * chunkSize, m)):
+            if b >= 0 and cacheCase[i, b] >= 0:
+                success[i] = cacheSuccess[i, b]
+                result[i] = cachePocket[i, b]
+                status[i] = cacheCase[i, b]
+            else:
+                p1 = spheres[pockets[i, 0]]
+                p2 = spheres[pockets[i, 1]]
+                p3 = spheres[pockets[i, 2]]
+                if periodic: # Bilder der Erzeugendenkugeln 2 und 3, die Kugel 1 am nächsten liegen
+                    p2 = nearestImage(p2, p1, period)
+                    p3 = nearestImage(p3, p1, period)
+                ok, p4, st = calcPocketCached(p1, p2, p3, radius, pOverlap, methodOverlap, invariants[i])
+                success[i] = ok
+                result[i] = p4
+                if b >= 0:
+                    roundPocket(result[i], cachePocket) # wie bei einem Treffer im Cache
+                status[i] = st
+                computed[i] = True
+            # bei gleicher z-Koordinate bleibt die Pocket mit dem kleineren Index
+            if success[i] and (best < 0 or result[i, 2] < result[best, 2]):
+                checked[i] = True
+                if b >= 0 and cacheValid[i, b]:
+                    valid[i] = True
+                else:
+                    valid[i], plus[i] = validPocket(result[i], spheres, gridHead, gridNext, gridOffset, gridDims,
+                                                    gridCellSize, gridRadius, bounds, period, pOverlap, methodOverlap)
+                if valid[i]:
+                    best = i
+        chunkBest[c] = best
+    return success, result, status, computed, checked, valid, plus, chunkBest
+
+@jit(nopython=True)
+def reduceScan(result, checked, chunkBest, chunkSize):
+    """
+    Zusammenführen der Abschnitte von scanPocketChunks in der Reihenfolge der seriellen Suche.
+
+    Die niedrigste gültige Pocket eines Abschnitts ist seine beste Pocket chunkBest, da jede niedrigere Pocket im
+    Abschnitt geprüft wurde. Die serielle Suche prüft Pocket i genau dann, wenn sie niedriger als die beste Pocket der
+    vorherigen Abschnitte und niedriger als die beste vorherige Pocket ihres Abschnitts ist.
 
+    :param result: np.array((m, 4), dtype=float) - Pockets
+    :param checked: np.array(m, dtype=bool) - im Abschnitt geprüfte Pockets
+    :param chunkBest: np.array(dtype=int) - Zeile der niedrigsten gültigen Pocket je Abschnitt (-1: keine gefunden)
+    :param chunkSize: int - Anzahl Pockets je Abschnitt
+    :return: int, np.array(m, dtype=bool) - Zeile der niedrigsten gültigen Pocket (-1: keine gefunden) und die von der
+        seriellen Suche geprüften Pockets
+    """
+    m = len(result)
+    serial = np.zeros(m, dtype=np.bool_)
+    best = -1
+    for c in range(len(chunkBest)):
+        for i in range(c * chunkSize, min((c + 1) * chunkSize, m)):
+            if checked[i] and (best < 0 or result[i, 2] < result[best, 2]):
+                serial[i] = True
+        if chunkBest[c] >= 0 and (best < 0 or result[chunkBest[c], 2] < result[best, 2]):
+            best = chunkBest[c]
+    return best, serial